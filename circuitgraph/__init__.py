@@ -11,6 +11,10 @@ Features include:
 - easy circuit composition
 - synthesis interface to Genus and Yosys
 - SAT, #SAT, and approx-#SAT solver integration via `pysat` and `approxmc`
+- exact #SAT through BDD compilation via `dd`
+- bit-parallel logic simulation
+- compact array-backed circuits for very large netlists
+- priority cut enumeration with truth tables
 - implementations of common circuit transformations
 
 Look at the examples in `circuitgraph.circuit.Circuit` for a quickstart guide.
@@ -23,13 +27,15 @@ from circuitgraph.circuit import (
     addable_types,
     supported_types,
 )
+from circuitgraph.compact import CompactCircuit
 from circuitgraph.io import (
     generic_flop,
     dc_flops,
     from_file,
+    from_files,
     from_lib,
     genus_flops,
     to_file,
 )
 from circuitgraph.utils import lint, visualize
-from circuitgraph import logic, props, sat, tx, utils
+from circuitgraph import bdd, cuts, logic, props, sat, sim, tx, utils
@@ -0,0 +1,403 @@
+"""
+Functions for exact counting using binary decision diagrams.
+
+Circuit nodes are compiled into BDDs over the circuit startpoints. Compiled
+nodes are stored in a `CircuitBdd`, so cones that are shared between
+queried nodes are only compiled once. Probabilities, model counts, and
+influences are then computed by traversing the diagrams.
+
+BDDs can grow exponentially for some functions, so a node budget can be
+given. If the budget is exceeded, `BddBudgetExceeded` is raised.
+
+This functionality requires the `dd` package.
+
+Examples
+--------
+>>> import circuitgraph as cg
+>>> c = cg.Circuit()
+>>> c.add("i0", "input")
+'i0'
+>>> c.add("i1", "input")
+'i1'
+>>> c.add("g0", "or", fanin=["i0", "i1"])
+'g0'
+>>> b = cg.bdd.CircuitBdd(c)
+>>> b.probability("g0")
+0.75
+>>> b.model_count({"g0": True})
+3
+>>> b.influence("g0", "i0")
+0.5
+
+"""
+
+
+class BddBudgetExceeded(Exception):
+    """Raised if a BDD grows past its node budget."""
+
+
+class CircuitBdd:
+    """Class for compiling circuit nodes into BDDs."""
+
+    def __init__(self, c, max_nodes=None, order=None):
+        """
+        Create a new `CircuitBdd`.
+
+        Nodes are compiled on demand.
+
+        Parameters
+        ----------
+        c : Circuit
+                Circuit to compile.
+        max_nodes : int
+                Maximum number of BDD nodes. If None, the size is not limited.
+        order : list of str
+                Variable order for the startpoints of the circuit. If None,
+                the order in which startpoints are reached by a depth-first
+                search from the outputs is used.
+
+        """
+        try:
+            from dd.autoref import BDD
+        except ImportError as e:
+            raise ImportError("Install 'dd' to use BDD functionality") from e
+
+        if c.is_cyclic():
+            raise ValueError("Cannot compile cyclic circuit")
+
+        self.c = c
+        self.max_nodes = max_nodes
+        self.manager = BDD()
+
+        startpoints = c.startpoints()
+        if order is None:
+            order = [
+                n
+                for n in _dfs_order(c, sorted(c.outputs()) + sorted(c.nodes()))
+                if n in startpoints
+            ]
+        elif set(order) != startpoints:
+            raise ValueError("order must contain each startpoint exactly once")
+        self.startpoints = list(order)
+        self._startpoint_set = set(order)
+        self.manager.declare(*self.startpoints)
+        self.functions = {n: self.manager.var(n) for n in self.startpoints}
+
+    def __len__(self):
+        """Count the number of BDD nodes."""
+        return len(self.manager)
+
+    def _check_budget(self):
+        if self.max_nodes is not None and len(self.manager) > self.max_nodes:
+            self.manager.collect_garbage()
+            if len(self.manager) > self.max_nodes:
+                raise BddBudgetExceeded(
+                    f"BDD size exceeds budget of {self.max_nodes} nodes"
+                )
+
+    def function(self, n):
+        """
+        Compile a node into a BDD.
+
+        Parameters
+        ----------
+        n : str
+                Node to compile.
+
+        Returns
+        -------
+        dd.autoref.Function
+                BDD of the node over the circuit startpoints.
+
+        Raises
+        ------
+        BddBudgetExceeded
+                If the BDD grows past the node budget.
+
+        """
+        if n in self.functions:
+            return self.functions[n]
+
+        manager = self.manager
+        for m in _dfs_order(self.c, [n], stop=self.functions):
+            t = self.c.type(m)
+            fanin = [self.functions[f] for f in self.c.fanin(m)]
+            if t == "0":
+                f = manager.false
+            elif t == "1":
+                f = manager.true
+            elif t == "x":
+                raise ValueError(f"Cannot compile 'x' node '{m}'")
+            elif not fanin:
+                raise ValueError(f"'{t}' node '{m}' has no fanin")
+            elif t in ["buf", "bb_input"]:
+                f = fanin[0]
+            elif t == "not":
+                f = ~fanin[0]
+            elif t in ["and", "nand"]:
+                f = manager.true
+                for g in fanin:
+                    f &= g
+            elif t in ["or", "nor"]:
+                f = manager.false
+                for g in fanin:
+                    f |= g
+            elif t in ["xor", "xnor"]:
+                f = manager.false
+                for g in fanin:
+                    f = manager.apply("xor", f, g)
+            else:
+                raise ValueError(f"Unknown gate type '{t}'")
+            if t in ["nand", "nor", "xnor"]:
+                f = ~f
+            self.functions[m] = f
+            self._check_budget()
+
+        return self.functions[n]
+
+    def _assumptions_function(self, assumptions):
+        f = self.manager.true
+        for n, v in assumptions.items():
+            if n not in self.c:
+                raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+            f &= self.function(n) if v else ~self.function(n)
+        return f
+
+    def _postorder(self, f):
+        """Order the regular nodes of a BDD so that successors come first."""
+        manager = self.manager
+        order = []
+        visited = set()
+        stack = [(f, False)]
+        while stack:
+            u, expanded = stack.pop()
+            if u.negated:
+                u = ~u
+            if u == manager.true:
+                continue
+            key = int(u)
+            if expanded:
+                order.append(u)
+            elif key not in visited:
+                visited.add(key)
+                stack.append((u, True))
+                stack.append((u.high, False))
+                stack.append((u.low, False))
+        return order
+
+    def _probability(self, f, bias):
+        manager = self.manager
+        probabilities = {}
+
+        def value(u):
+            if u == manager.true:
+                return 1.0
+            if u == manager.false:
+                return 0.0
+            if u.negated:
+                return 1.0 - probabilities[int(~u)]
+            return probabilities[int(u)]
+
+        for u in self._postorder(f):
+            p = bias.get(u.var, 0.5)
+            probabilities[int(u)] = (1 - p) * value(u.low) + p * value(u.high)
+        return value(f)
+
+    def _count(self, f):
+        manager = self.manager
+        nvars = len(self.startpoints)
+        counts = {}
+
+        # counts are over the variables at and below the level of a node
+        def value(u):
+            if u == manager.true:
+                return 1
+            if u == manager.false:
+                return 0
+            if u.negated:
+                return 2 ** (nvars - u.level) - counts[int(~u)]
+            return counts[int(u)]
+
+        for u in self._postorder(f):
+            counts[int(u)] = sum(
+                value(v) * 2 ** (v.level - u.level - 1) for v in (u.low, u.high)
+            )
+        return value(f) * 2**f.level
+
+    def probability(self, n, bias=None):
+        """
+        Compute the probability of a node being true.
+
+        Parameters
+        ----------
+        n : str
+                Node.
+        bias : dict of str:float
+                Probability of each startpoint being true. Startpoints that
+                are not present are true with probability 0.5.
+
+        Returns
+        -------
+        float
+                Probability.
+
+        """
+        if bias is None:
+            bias = {}
+        return self._probability(self.function(n), bias)
+
+    def model_count(self, assumptions=None):
+        """
+        Count the startpoint assignments that satisfy the assumptions.
+
+        Parameters
+        ----------
+        assumptions : dict of str:bool
+                Nodes to assume True or False.
+
+        Returns
+        -------
+        int
+                Count.
+
+        """
+        if assumptions is None:
+            assumptions = {}
+        f = self._assumptions_function(assumptions)
+        return self._count(f)
+
+    def influence(self, n, s):
+        """
+        Compute the influence of a startpoint on a node.
+
+        The influence is the probability that flipping `s` flips `n`.
+
+        Parameters
+        ----------
+        n : str
+                Node.
+        s : str
+                Startpoint.
+
+        Returns
+        -------
+        float
+                Influence.
+
+        """
+        if s not in self._startpoint_set:
+            raise ValueError(f"'{s}' is not a startpoint")
+        f = self.function(n)
+        d = self.manager.apply(
+            "xor", self.manager.let({s: False}, f), self.manager.let({s: True}, f)
+        )
+        self._check_budget()
+        return self._probability(d, {})
+
+
+def _dfs_order(c, ns, stop=None):
+    """
+    Order the transitive fanin of nodes so that fanin comes first.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit.
+    ns : list of str
+            Nodes to start from.
+    stop : container of str
+            Nodes to not expand or return.
+
+    Returns
+    -------
+    list of str
+            Ordered nodes.
+
+    """
+    if stop is None:
+        stop = set()
+    order = []
+    visited = set()
+    for root in ns:
+        if root in visited or root in stop:
+            continue
+        visited.add(root)
+        stack = [(root, iter(sorted(c.fanin(root))))]
+        while stack:
+            n, fanin = stack[-1]
+            for f in fanin:
+                if f not in visited and f not in stop:
+                    visited.add(f)
+                    stack.append((f, iter(sorted(c.fanin(f)))))
+                    break
+            else:
+                stack.pop()
+                order.append(n)
+    return order
+
+
+def signal_probability(c, n, max_nodes=None):
+    """
+    Compute the probability of node `n` being true using a BDD.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    n : str
+            Node to determine probability for.
+    max_nodes : int
+            Maximum number of BDD nodes.
+
+    Returns
+    -------
+    float
+            Probability.
+
+    """
+    return CircuitBdd(c, max_nodes).probability(n)
+
+
+def model_count(c, assumptions=None, max_nodes=None):
+    """
+    Determine the number of solutions to circuit using a BDD.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    assumptions : dict of str:bool
+            Nodes to assume True or False.
+    max_nodes : int
+            Maximum number of BDD nodes.
+
+    Returns
+    -------
+    int
+            Count.
+
+    """
+    return CircuitBdd(c, max_nodes).model_count(assumptions)
+
+
+def influence(c, n, max_nodes=None):
+    """
+    Compute the influence of each startpoint of node `n` using a BDD.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    n : str
+            Node to compute influences for.
+    max_nodes : int
+            Maximum number of BDD nodes.
+
+    Returns
+    -------
+    dict of str:float
+            The influence each startpoint has on the node.
+
+    """
+    b = CircuitBdd(c, max_nodes)
+    return {s: b.influence(n, s) for s in c.startpoints(n)}
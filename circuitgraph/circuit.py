@@ -128,11 +128,25 @@ by passing the blackbox into `from_file`
 >>> c = cg.from_file("/path/to/file.v", blackboxes=[flop]) # doctest: +SKIP
 
 """
-from functools import reduce
-from itertools import combinations, product
+from itertools import count
 
 import networkx as nx
 
+from circuitgraph.cuts import priority_cuts
+
+# version stamps are drawn from one counter so they are never reused
+_versions = count()
+
+# attributes that are rebuilt on demand, so they are not pickled
+_cache_attributes = (
+    "_type_index",
+    "_output_index",
+    "_indexed_nodes",
+    "_version",
+    "_structure",
+    "_encoder",
+)
+
 primitive_gates = [
     "buf",
     "and",
@@ -186,6 +200,198 @@ class Circuit:
         else:
             self.blackboxes = {}
 
+        self._reachability_index = False
+
+    @property
+    def graph(self):
+        """
+        Return the underlying graph.
+
+        The circuit keeps an index of nodes by type and of outputs, and
+        caches structural properties such as the topological order. These
+        are kept up to date by the `Circuit` methods. If the graph is
+        modified directly, set the graph again to reset them.
+
+        Returns
+        -------
+        networkx.DiGraph
+                Graph of the circuit.
+
+        """
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+        self._type_index = None
+        self._output_index = None
+        self._version = next(_versions)
+        self._structure = {}
+
+    def _modified(self):
+        """Invalidate cached structural properties."""
+        self._version = next(_versions)
+
+    def _cached(self, key, compute):
+        """Return a structural property, computing it if the cache is stale."""
+        # nodes added or removed directly through the graph change the stamp
+        stamp = (self._version, len(self._graph))
+        try:
+            cached_stamp, value = self._structure[key]
+            if cached_stamp == stamp:
+                return value
+        except KeyError:
+            pass
+        value = compute()
+        self._structure[key] = (stamp, value)
+        return value
+
+    def _topo_order(self):
+        """Return a list of nodes in topological order, or None if cyclic."""
+
+        def compute():
+            try:
+                return list(nx.topological_sort(self._graph))
+            except nx.NetworkXUnfeasible:
+                return None
+
+        return self._cached("topo_order", compute)
+
+    def _reachability(self, fanin):
+        """
+        Return the transitive fanin or fanout of every node as bitsets.
+
+        Bit `i` of a bitset corresponds to node `i` of the topological
+        order. Returns None if the circuit is cyclic.
+
+        """
+
+        def compute():
+            order = self._topo_order()
+            if order is None:
+                return None
+            position = {n: i for i, n in enumerate(order)}
+            if fanin:
+                adjacent = self.graph.predecessors
+            else:
+                adjacent = self.graph.successors
+                order = order[::-1]
+            bits = {}
+            for n in order:
+                b = 0
+                for a in adjacent(n):
+                    b |= bits[a] | 1 << position[a]
+                bits[n] = b
+            return bits
+
+        return self._cached(("reachability", fanin), compute)
+
+    def _transitive(self, ns, fanin):
+        if isinstance(ns, str):
+            ns = [ns]
+
+        bits = self._reachability(fanin) if self._reachability_index else None
+        if bits is None:
+            reach = nx.ancestors if fanin else nx.descendants
+            gates = set()
+            for n in ns:
+                gates |= reach(self.graph, n)
+            return gates
+
+        b = 0
+        for n in ns:
+            try:
+                b |= bits[n]
+            except KeyError as e:
+                raise nx.NetworkXError(f"The node {n} is not in the graph.") from e
+
+        # find set bits in C rather than shifting the integer
+        order = self._topo_order()
+        flags = bin(b)[:1:-1]
+        gates = set()
+        i = flags.find("1")
+        while i >= 0:
+            gates.add(order[i])
+            i = flags.find("1", i + 1)
+        return gates
+
+    def set_reachability_index(self, enable=True):
+        """
+        Enable or disable the reachability index.
+
+        When enabled, the transitive fanin and fanout of every node are
+        computed once per revision of the circuit as bitsets over the
+        topological order. Transitive fanin and fanout queries, including
+        those made by `startpoints` and `endpoints`, then reduce to bitwise
+        ORs, which is much faster when many overlapping cones are queried.
+        The index uses memory quadratic in the number of nodes in the
+        worst case, so it is disabled by default. It is not used for cyclic
+        circuits.
+
+        Parameters
+        ----------
+        enable : bool
+                Whether or not to use the index.
+
+        Examples
+        --------
+        >>> import circuitgraph as cg
+        >>> c = cg.from_lib("c432")
+        >>> c.set_reachability_index()
+        >>> cones = {o: c.transitive_fanin(o) for o in c.outputs()}
+
+        """
+        self._reachability_index = enable
+
+    def _index(self):
+        """Return the type and output indices, building them if needed."""
+        # nodes added or removed directly through the graph invalidate the index
+        if self._type_index is None or self._indexed_nodes != len(self._graph):
+            self._type_index = {t: set() for t in supported_types}
+            self._output_index = set()
+            self._indexed_nodes = 0
+            for n in self._graph:
+                self._index_insert(n)
+        return self._type_index, self._output_index
+
+    def _index_insert(self, n):
+        if self._type_index is None:
+            return
+        attributes = self._graph.nodes[n]
+        self._type_index.setdefault(attributes.get("type"), set()).add(n)
+        if attributes.get("output"):
+            self._output_index.add(n)
+        self._indexed_nodes += 1
+
+    def _index_discard(self, n):
+        if self._type_index is None or n not in self._graph:
+            return
+        attributes = self._graph.nodes[n]
+        self._type_index.get(attributes.get("type"), set()).discard(n)
+        self._output_index.discard(n)
+        self._indexed_nodes -= 1
+
+    def _update_graph(self, g):
+        """Add the nodes and edges of a graph, overwriting node attributes."""
+        self._modified()
+        for n in g:
+            self._index_discard(n)
+        self._graph.update(g)
+        for n in g:
+            self._index_insert(n)
+
+    def __getstate__(self):
+        """Drop cached structures, which are rebuilt when needed."""
+        state = self.__dict__.copy()
+        for key in _cache_attributes:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restore a pickled circuit with empty caches."""
+        self.__dict__.update(state)
+        self.graph = self._graph
+
     def __contains__(self, n):
         """Check if a node is in the circuit."""
         return self.graph.__contains__(n)
@@ -208,9 +414,14 @@ class Circuit:
                 Copy of the circuit.
 
         """
-        return Circuit(
+        c = Circuit(
             graph=self.graph.copy(), name=self.name, blackboxes=self.blackboxes.copy()
         )
+        # cached values are never modified, so they can be shared
+        c._reachability_index = self._reachability_index
+        c._version = self._version
+        c._structure = self._structure.copy()
+        return c
 
     def set_type(self, ns, t):
         """
@@ -230,7 +441,12 @@ class Circuit:
         if isinstance(ns, str):
             ns = [ns]
         for n in ns:
+            if n not in self.graph:
+                raise KeyError(f"Node {n} does not exist.")
+            self._modified()
+            self._index_discard(n)
             self.graph.nodes[n]["type"] = t
+            self._index_insert(n)
 
     def type(self, ns):
         """
@@ -332,7 +548,8 @@ class Circuit:
             if t not in supported_types:
                 raise ValueError(f"type {t} not supported.")
 
-        return {n for n in self.graph.nodes if self.graph.nodes[n]["type"] in types}
+        type_index, _ = self._index()
+        return set().union(*(type_index.get(t, ()) for t in types))
 
     def add_subcircuit(self, sc, name, connections=None, strip_io=True):
         """
@@ -374,7 +591,7 @@ class Circuit:
 
         # add sub circuit
         g = nx.relabel_nodes(sc.graph, mapping)
-        self.graph.update(g)
+        self._update_graph(g)
         if strip_io:
             for n in sc.inputs():
                 self.set_type(f"{name}_{n}", "buf")
@@ -471,7 +688,7 @@ class Circuit:
 
         # extend circuit
         g = nx.relabel_nodes(c.graph, mapping)
-        self.graph.update(g)
+        self._update_graph(g)
         for n in self.blackboxes[name].inputs():
             self.set_type(f"{name}_{n}", "buf")
         for n in self.blackboxes[name].outputs():
@@ -597,7 +814,10 @@ class Circuit:
             raise ValueError(f"cannot add node starting with int: {n}")
 
         # add node
+        self._modified()
+        self._index_discard(n)
         self.graph.add_node(n, type=node_type, output=output)
+        self._index_insert(n)
 
         # connect
         if add_connected_nodes:
@@ -621,6 +841,11 @@ class Circuit:
         """
         if isinstance(ns, str):
             ns = [ns]
+        else:
+            ns = list(ns)
+        self._modified()
+        for n in ns:
+            self._index_discard(n)
         self.graph.remove_nodes_from(ns)
 
     def relabel(self, mapping):
@@ -633,7 +858,14 @@ class Circuit:
                 mapping of old to new names
 
         """
+        self._modified()
+        affected = set(mapping) | set(mapping.values())
+        for n in affected:
+            self._index_discard(n)
         nx.relabel_nodes(self.graph, mapping, copy=False)
+        for n in affected:
+            if n in self.graph:
+                self._index_insert(n)
 
     def connect(self, us, vs):
         """
@@ -686,6 +918,7 @@ class Circuit:
                     raise ValueError(f"fanout of {t} '{u}' cannot be greater than 1.")
 
         # connect
+        self._modified()
         self.graph.add_edges_from((u, v) for u in us for v in vs)
 
     def disconnect(self, us, vs):
@@ -704,6 +937,7 @@ class Circuit:
             us = [us]
         if isinstance(vs, str):
             vs = [vs]
+        self._modified()
         self.graph.remove_edges_from((u, v) for u in us for v in vs)
 
     def fanin(self, ns):
@@ -774,12 +1008,7 @@ class Circuit:
                 Nodes in transitive fanin.
 
         """
-        if isinstance(ns, str):
-            ns = [ns]
-        gates = set()
-        for n in ns:
-            gates |= nx.ancestors(self.graph, n)
-        return gates
+        return self._transitive(ns, True)
 
     def transitive_fanout(self, ns):
         """
@@ -796,17 +1025,44 @@ class Circuit:
                 Nodes in transitive fanout.
 
         """
+        return self._transitive(ns, False)
+
+    def _depth(self, ns, fanin, maximum):
+        """Compute the depth of nodes in a single pass over their cone."""
+        if self.is_cyclic():
+            raise ValueError("Cannot compute depth of cyclic circuit")
+
         if isinstance(ns, str):
             ns = [ns]
-        gates = set()
-        for n in ns:
-            gates |= nx.descendants(self.graph, n)
-        return gates
+        adjacent = self.graph.predecessors if fanin else self.graph.successors
+        select = max if maximum else min
+
+        # iterative post-order traversal so deep circuits do not recurse
+        depths = {}
+        for root in ns:
+            stack = [root]
+            while stack:
+                n = stack[-1]
+                if n in depths:
+                    stack.pop()
+                    continue
+                pending = [a for a in adjacent(n) if a not in depths]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    stack.pop()
+                    adjacent_depths = [depths[a] for a in adjacent(n)]
+                    depths[n] = select(adjacent_depths) + 1 if adjacent_depths else 0
+
+        return select(depths[n] for n in ns)
 
     def fanout_depth(self, ns, maximum=True):
         """
         Compute the combinational fanout depth of a node(s).
 
+        The depth is the length of the longest (or shortest) path from a node
+        to a node without fanout.
+
         Parameters
         ----------
         ns : str or iterable of str
@@ -821,46 +1077,15 @@ class Circuit:
                 Depth.
 
         """
-
-        def visit_node(n, visited, reachable, depth):
-            if n in visited:
-                visited[n] = (
-                    max(visited[n], depth) if maximum else min(visited[n], depth)
-                )
-            else:
-                visited[n] = depth
-
-            # check if all reachable fanin has been visited
-            if all(fi in visited for fi in self.fanin(n) & reachable):
-                for fo in self.fanout(n):
-                    visited = visit_node(fo, visited, reachable, visited[n] + 1)
-            return visited
-
-        # is acyclic
-        if self.is_cyclic():
-            raise ValueError("Cannot compute depth of cyclic circuit")
-
-        depth = 0
-
-        # find reachable group and init visited
-        reachable = self.transitive_fanout(ns)
-
-        # set up visited
-        if isinstance(ns, str):
-            visited = {ns: depth}
-        else:
-            visited = {n: depth for n in ns}
-
-        # recurse
-        for f in self.fanout(ns):
-            visited = visit_node(f, visited, reachable, depth + 1)
-
-        return max(visited.values()) if maximum else min(visited.values())
+        return self._depth(ns, False, maximum)
 
     def fanin_depth(self, ns, maximum=True):
         """
         Compute the combinational fanin depth of a node(s).
 
+        The depth is the length of the longest (or shortest) path to a node
+        from a node without fanin.
+
         Parameters
         ----------
         ns : str or iterable of str
@@ -875,41 +1100,7 @@ class Circuit:
                 Depth.
 
         """
-
-        def visit_node(n, visited, reachable, depth):
-            if n in visited:
-                visited[n] = (
-                    max(visited[n], depth) if maximum else min(visited[n], depth)
-                )
-            else:
-                visited[n] = depth
-
-            # check if all reachable fanin has been visited
-            if all(fo in visited for fo in self.fanout(n) & reachable):
-                for fi in self.fanin(n):
-                    visited = visit_node(fi, visited, reachable, visited[n] + 1)
-            return visited
-
-        # is acyclic
-        if self.is_cyclic():
-            raise ValueError("Cannot compute depth of cyclic circuit")
-
-        depth = 0
-
-        # find reachable group and init visited
-        reachable = self.transitive_fanin(ns)
-
-        # set up visited
-        if isinstance(ns, str):
-            visited = {ns: depth}
-        else:
-            visited = {n: depth for n in ns}
-
-        # recurse
-        for f in self.fanin(ns):
-            visited = visit_node(f, visited, reachable, depth + 1)
-
-        return max(visited.values()) if maximum else min(visited.values())
+        return self._depth(ns, True, maximum)
 
     def paths(self, source, target, cutoff=None):
         """
@@ -988,6 +1179,11 @@ class Circuit:
             ns = [ns]
         for n in ns:
             self.graph.nodes[n]["output"] = output
+            if self._output_index is not None:
+                if output:
+                    self._output_index.add(n)
+                else:
+                    self._output_index.discard(n)
 
     def outputs(self):
         """
@@ -999,7 +1195,8 @@ class Circuit:
                 Output nodes in circuit.
 
         """
-        return {n for n in self.graph.nodes if self.is_output(n)}
+        _, output_index = self._index()
+        return set(output_index)
 
     def io(self):
         """
@@ -1032,8 +1229,13 @@ class Circuit:
             ns = [ns]
 
         if ns:
-            return (set(ns) | self.transitive_fanin(ns)) & self.startpoints()
-        return self.inputs() | self.filter_type("bb_output")
+            type_index, _ = self._index()
+            return {
+                n
+                for n in set(ns) | self.transitive_fanin(ns)
+                if n in type_index["input"] or n in type_index["bb_output"]
+            }
+        return self.filter_type(["input", "bb_output"])
 
     def endpoints(self, ns=None):
         """
@@ -1054,26 +1256,144 @@ class Circuit:
             ns = [ns]
 
         if ns:
-            return (set(ns) | self.transitive_fanout(ns)) & self.endpoints()
+            type_index, output_index = self._index()
+            return {
+                n
+                for n in set(ns) | self.transitive_fanout(ns)
+                if n in output_index or n in type_index["bb_input"]
+            }
         return self.outputs() | self.filter_type("bb_input")
 
-    def reconvergent_fanout_nodes(self):
+    def reconvergence_points(self, stem):
+        """
+        Get the nodes where the fanout of a stem reconverges.
+
+        A node is a reconvergence point of `stem` if it can be reached from
+        two different fanouts of `stem` through paths that only meet at the
+        node. These are the nodes in the transitive fanout of `stem` that
+        are immediately dominated by `stem` and have more than one fanin in
+        its fanout cone.
+
+        Parameters
+        ----------
+        stem : str
+                Node to find reconvergence points for.
+
+        Returns
+        -------
+        set of str
+                Reconvergence points.
+
+        Examples
+        --------
+        >>> import circuitgraph as cg
+        >>> c = cg.Circuit()
+        >>> c.add("a", "input")
+        'a'
+        >>> c.add("b", "not", fanin="a")
+        'b'
+        >>> c.add("d", "and", fanin=["a", "b"])
+        'd'
+        >>> c.reconvergence_points("a")
+        {'d'}
+
+        """
+        if len(self.fanout(stem)) < 2:
+            return set()
+
+        # iterative depth-first search for the post-order of the fanout cone
+        postorder = {}
+        stack = [(stem, iter(self.graph.successors(stem)))]
+        visited = {stem}
+        while stack:
+            n, successors = stack[-1]
+            for m in successors:
+                if m not in visited:
+                    visited.add(m)
+                    stack.append((m, iter(self.graph.successors(m))))
+                    break
+            else:
+                stack.pop()
+                postorder[n] = len(postorder)
+        order = sorted(postorder, key=postorder.get, reverse=True)
+
+        # iterative dominator computation (Cooper, Harvey, and Kennedy),
+        # which converges in a single pass for acyclic cones
+        idom = {stem: stem}
+
+        def intersect(u, v):
+            while u != v:
+                while postorder[u] < postorder[v]:
+                    u = idom[u]
+                while postorder[v] < postorder[u]:
+                    v = idom[v]
+            return u
+
+        changed = True
+        while changed:
+            changed = False
+            for n in order[1:]:
+                new_idom = None
+                for p in self.graph.predecessors(n):
+                    if p in idom:
+                        new_idom = p if new_idom is None else intersect(p, new_idom)
+                if idom.get(n) != new_idom:
+                    idom[n] = new_idom
+                    changed = True
+
+        return {
+            n
+            for n in order[1:]
+            if idom[n] == stem
+            and sum(p in postorder for p in self.graph.predecessors(n)) > 1
+        }
+
+    def _reconverges(self, stem):
+        """Check if the fanout of a stem reconverges, stopping at the first hit."""
+        # label each node in the cone with the fanout branch that reached it
+        branch = {}
+        for b in self.graph.successors(stem):
+            if b in branch:
+                return True
+            branch[b] = b
+            stack = [b]
+            while stack:
+                for m in self.graph.successors(stack.pop()):
+                    if m not in branch:
+                        branch[m] = b
+                        stack.append(m)
+                    elif branch[m] != b:
+                        return True
+        return False
+
+    def reconvergent_fanout_nodes(self, points=False):
         """
         Get nodes that have fanout that reconverges.
 
+        Parameters
+        ----------
+        points : bool
+                If True, each node is yielded together with its reconvergence
+                points, as found by `reconvergence_points`.
+
         Returns
         -------
-        generator of str
+        generator of str or generator of tuple of str, set of str
                 A generator of nodes that have reconvergent fanout
 
         """
-        for node in self.nodes():
-            fo = self.fanout(node)
-            if len(fo) > 1:
-                for a, b in combinations(fo, 2):
-                    if self.transitive_fanout(a) & self.transitive_fanout(b):
-                        yield node
-                        break
+        # nodes closer to the outputs have smaller cones, so check them first
+        order = self._topo_order()
+        nodes = reversed(order) if order is not None else list(self.graph)
+        for node in nodes:
+            if self.graph.out_degree(node) < 2:
+                continue
+            if points:
+                reconvergence = self.reconvergence_points(node)
+                if reconvergence:
+                    yield node, reconvergence
+            elif self._reconverges(node):
+                yield node
 
     def has_reconvergent_fanout(self):
         """
@@ -1085,6 +1405,9 @@ class Circuit:
             Whether or not reconvergent fanout is present
 
         """
+        # reconvergence requires a cycle in the undirected graph
+        if not self.graph or nx.is_forest(self.graph):
+            return False
         try:
             next(self.reconvergent_fanout_nodes())
             return True
@@ -1101,7 +1424,7 @@ class Circuit:
                 Existence of cycle
 
         """
-        return not nx.is_directed_acyclic_graph(self.graph)
+        return self._topo_order() is None
 
     def uid(self, n, blocked=None):
         """
@@ -1137,12 +1460,19 @@ class Circuit:
         """
         Generate k-cuts.
 
+        Cuts that are supersets of other cuts are not included. See
+        `cuts.priority_cuts` for enumerating a bounded number of cuts for
+        every node at once.
+
         Parameters
         ----------
         n : str
                 Node to compute cuts for.
         k : int
                 Maximum cut width.
+        computed : dict of str:list of set of str
+                Previously computed cuts, which is updated with the cuts of
+                `n` and of every node in its transitive fanin.
 
         Returns
         -------
@@ -1153,39 +1483,69 @@ class Circuit:
         if computed is None:
             computed = {}
 
-        if n in computed:
-            return computed[n]
-
-        # helper function
-        def merge_cut_sets(a_cuts, b_cuts):
-            merged_cuts = []
-            for a_cut, b_cut in product(a_cuts, b_cuts):
-                merged_cut = a_cut | b_cut
-                if len(merged_cut) <= k:
-                    merged_cuts.append(merged_cut)
-            return merged_cuts
-
-        if self.fanin(n):
-            fanin_cut_sets = [self.kcuts(f, k, computed) for f in self.fanin(n)]
-            cuts = reduce(merge_cut_sets, fanin_cut_sets) + [{n}]
-        else:
-            cuts = [{n}]
-
-        # add cuts
-        computed[n] = cuts
-        return cuts
+        if n not in computed:
+            cone = self.transitive_fanin(n) | {n}
+            node_cuts = priority_cuts(self, k, max_cuts=None, nodes=cone)
+            for m, cuts in node_cuts.items():
+                if m not in computed:
+                    computed[m] = [set(cut) for cut in cuts]
+        return computed[n]
 
     def topo_sort(self):
         """
         Return a generator of nodes in topologically sorted order.
 
+        The order is cached until the circuit is modified.
+
         Returns
         -------
         iter of str
                 Ordered node names.
 
+        Raises
+        ------
+        networkx.NetworkXUnfeasible
+                If the circuit is cyclic.
+
+        """
+        order = self._topo_order()
+        if order is None:
+            raise nx.NetworkXUnfeasible("Graph contains a cycle")
+        return iter(order)
+
+    def levels(self):
         """
-        return nx.topological_sort(self.graph)
+        Compute the logical level of each node.
+
+        Inputs and constants are at level 0, and every other node is one
+        level above its highest fanin. The levels are cached until the
+        circuit is modified.
+
+        Returns
+        -------
+        dict of str:int
+                Mapping of node names to levels.
+
+        Raises
+        ------
+        ValueError
+                If the circuit is cyclic.
+
+        """
+
+        def compute():
+            levels = {n: 0 for n in self.filter_type(("input", "0", "1", "x"))}
+            for n in self.topo_sort():
+                if n in levels:
+                    continue
+                levels[n] = (
+                    max((levels[f] for f in self.graph.predecessors(n)), default=-1) + 1
+                )
+            return levels
+
+        if self.is_cyclic():
+            raise ValueError("Cannot levelize cyclic circuit")
+        return dict(self._cached("levels", compute))
 
     def remove_unloaded(self, inputs=False):
         """
@@ -0,0 +1,880 @@
+"""
+Compact, read-only circuit representation.
+
+A `CompactCircuit` stores a circuit in flat arrays instead of a
+`networkx.DiGraph`. Node names are interned to integer ids, gate types are
+stored as one byte per node, outputs are stored in a bitmap, and
+connections are stored in compressed sparse row (CSR) fanin and fanout
+arrays. This uses a fraction of the memory of a `Circuit`, which makes it
+suitable for holding several versions of very large netlists at once.
+
+`CompactCircuit` exposes the query methods of `Circuit`, so it can be
+passed to functions that only inspect a circuit, such as `sat.cnf`,
+`sat.solve`, and `io.to_file`. It cannot be modified; use `to_circuit` to
+get a mutable copy.
+
+Examples
+--------
+>>> import circuitgraph as cg
+>>> c = cg.from_lib("c17")
+>>> cc = cg.CompactCircuit.from_circuit(c)
+>>> cc.fanin("N23") == c.fanin("N23")
+True
+>>> cc.id("N23") == cc.ids["N23"]
+True
+>>> cg.sat.solve(cc, {"N23": True})["N23"]
+True
+>>> cc.to_circuit().nodes() == c.nodes()
+True
+
+"""
+
+from array import array
+
+import networkx as nx
+
+from circuitgraph.circuit import Circuit, supported_types
+from circuitgraph.cuts import priority_cuts
+
+_type_codes = {t: i for i, t in enumerate(supported_types)}
+
+
+def _csr(adjacency):
+    """Flatten a list of id lists into offset and index arrays."""
+    offsets = array("I", [0])
+    indices = array("I")
+    for ids in adjacency:
+        indices.extend(ids)
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+class CompactCircuit:
+    """Class for compactly representing circuits that are not modified."""
+
+    def __init__(
+        self, name, names, types, outputs, fanin, fanout=None, blackboxes=None
+    ):
+        """
+        Create a new `CompactCircuit`.
+
+        Instances are usually created with `from_circuit`.
+
+        Parameters
+        ----------
+        name : str
+                Name of circuit.
+        names : list of str
+                Node names, indexed by node id.
+        types : array.array of int
+                Type code of each node, indexing into `supported_types`.
+        outputs : iterable of int
+                Ids of output nodes.
+        fanin : list of list of int
+                Fanin ids of each node.
+        fanout : list of list of int
+                Fanout ids of each node. If None, it is derived from `fanin`.
+        blackboxes : dict of str:BlackBox
+                Record of blackboxes, mapping instance name to BlackBox type.
+
+        """
+        self.name = name
+        self.names = names
+        self.ids = {n: i for i, n in enumerate(names)}
+        if len(self.ids) != len(names):
+            raise ValueError("Node names must be unique")
+        self.types = array("B", types)
+        self.blackboxes = blackboxes if blackboxes else {}
+
+        self.output_bitmap = bytearray((len(names) + 7) // 8)
+        for i in outputs:
+            self.output_bitmap[i >> 3] |= 1 << (i & 7)
+
+        if fanout is None:
+            fanout = [[] for _ in names]
+            for i, fi in enumerate(fanin):
+                for f in fi:
+                    fanout[f].append(i)
+        self.fanin_offsets, self.fanin_indices = _csr(fanin)
+        self.fanout_offsets, self.fanout_indices = _csr(fanout)
+
+    @classmethod
+    def from_circuit(cls, c):
+        """
+        Create a `CompactCircuit` from a `Circuit`.
+
+        Parameters
+        ----------
+        c : Circuit
+                Circuit to convert.
+
+        Returns
+        -------
+        CompactCircuit
+                Compact circuit with the same nodes, types, outputs,
+                connections, and blackboxes.
+
+        """
+        g = c.graph
+        names = list(g.nodes)
+        ids = {n: i for i, n in enumerate(names)}
+        types = [_type_codes[g.nodes[n]["type"]] for n in names]
+        outputs = [ids[n] for n in names if g.nodes[n].get("output")]
+        fanin = [[ids[f] for f in g.predecessors(n)] for n in names]
+        fanout = [[ids[f] for f in g.successors(n)] for n in names]
+        return cls(c.name, names, types, outputs, fanin, fanout, c.blackboxes.copy())
+
+    def to_circuit(self):
+        """
+        Convert to a mutable `Circuit`.
+
+        Returns
+        -------
+        Circuit
+                Equivalent circuit.
+
+        """
+        c = Circuit(name=self.name, blackboxes=self.blackboxes.copy())
+        c.graph.add_nodes_from(
+            (n, {"type": supported_types[t], "output": self._is_output_id(i)})
+            for i, (n, t) in enumerate(zip(self.names, self.types))
+        )
+        c.graph.add_edges_from(
+            (self.names[f], n)
+            for i, n in enumerate(self.names)
+            for f in self.fanin_ids(i)
+        )
+        return c
+
+    def copy(self):
+        """
+        Return a copy of the circuit.
+
+        The arrays are shared with the original since they are never
+        modified.
+
+        Returns
+        -------
+        CompactCircuit
+                Copy of the circuit.
+
+        """
+        c = CompactCircuit.__new__(CompactCircuit)
+        c.__dict__.update(self.__dict__)
+        c.__dict__.pop("_encoder", None)
+        c.blackboxes = self.blackboxes.copy()
+        return c
+
+    def __getstate__(self):
+        """Drop the cached encoder, which is rebuilt when needed."""
+        state = self.__dict__.copy()
+        state.pop("_encoder", None)
+        return state
+
+    def __contains__(self, n):
+        """Check if a node is in the circuit."""
+        return n in self.ids
+
+    def __len__(self):
+        """Count the number of nodes in the circuit."""
+        return len(self.names)
+
+    def __iter__(self):
+        """Iterate through the nodes in the circuit."""
+        return iter(self.names)
+
+    def id(self, n):
+        """
+        Return the integer id of a node.
+
+        Parameters
+        ----------
+        n : str
+                Node.
+
+        Returns
+        -------
+        int
+                Id of node.
+
+        Raises
+        ------
+        KeyError
+                If node is not in circuit.
+
+        """
+        try:
+            return self.ids[n]
+        except KeyError as e:
+            raise KeyError(f"Node {n} does not exist.") from e
+
+    def fanin_ids(self, i):
+        """
+        Return the fanin ids of a node id without building a set.
+
+        Parameters
+        ----------
+        i : int
+                Node id.
+
+        Returns
+        -------
+        array.array of int
+                Fanin ids.
+
+        """
+        return self.fanin_indices[self.fanin_offsets[i] : self.fanin_offsets[i + 1]]
+
+    def fanout_ids(self, i):
+        """
+        Return the fanout ids of a node id without building a set.
+
+        Parameters
+        ----------
+        i : int
+                Node id.
+
+        Returns
+        -------
+        array.array of int
+                Fanout ids.
+
+        """
+        return self.fanout_indices[self.fanout_offsets[i] : self.fanout_offsets[i + 1]]
+
+    def _is_output_id(self, i):
+        return bool(self.output_bitmap[i >> 3] >> (i & 7) & 1)
+
+    def _ids(self, ns):
+        if isinstance(ns, str):
+            ns = [ns]
+        return [self.id(n) for n in ns]
+
+    def nodes(self):
+        """
+        Return circuit nodes.
+
+        Returns
+        -------
+        set of str
+                Nodes
+
+        """
+        return set(self.names)
+
+    def edges(self):
+        """
+        Return circuit edges.
+
+        Returns
+        -------
+        set of tuple of str, str
+                Edges in circuit
+
+        """
+        return {
+            (self.names[f], n)
+            for i, n in enumerate(self.names)
+            for f in self.fanin_ids(i)
+        }
+
+    def type(self, ns):
+        """
+        Return node(s) type(s).
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node.
+
+        Returns
+        -------
+        str or list of str
+                Type of node or a list of node types.
+
+        """
+        if isinstance(ns, str):
+            return supported_types[self.types[self.id(ns)]]
+        return [self.type(n) for n in ns]
+
+    def filter_type(self, types):
+        """
+        Return circuit nodes filtering by type.
+
+        Parameters
+        ----------
+        types : str or iterable of str
+                Type(s) to filter in.
+
+        Returns
+        -------
+        set of str
+                Nodes
+
+        """
+        if isinstance(types, str):
+            types = [types]
+
+        for t in types:
+            if t not in supported_types:
+                raise ValueError(f"type {t} not supported.")
+
+        codes = {_type_codes[t] for t in types}
+        return {n for n, t in zip(self.names, self.types) if t in codes}
+
+    def fanin(self, ns):
+        """
+        Compute the fanin of a node.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute fanin for.
+
+        Returns
+        -------
+        set of str
+                Nodes in fanin.
+
+        """
+        return {self.names[f] for i in self._ids(ns) for f in self.fanin_ids(i)}
+
+    def fanout(self, ns):
+        """
+        Compute the fanout of a node.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute fanout for.
+
+        Returns
+        -------
+        set of str
+                Nodes in fanout.
+
+        """
+        return {self.names[f] for i in self._ids(ns) for f in self.fanout_ids(i)}
+
+    def _transitive(self, ns, offsets, indices):
+        visited = bytearray(len(self.names))
+        stack = []
+        for i in self._ids(ns):
+            stack.extend(indices[offsets[i] : offsets[i + 1]])
+        while stack:
+            i = stack.pop()
+            if not visited[i]:
+                visited[i] = 1
+                stack.extend(indices[offsets[i] : offsets[i + 1]])
+        return {self.names[i] for i, v in enumerate(visited) if v}
+
+    def transitive_fanin(self, ns):
+        """
+        Compute the transitive fanin of a node.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute transitive fanin for.
+
+        Returns
+        -------
+        set of str
+                Nodes in transitive fanin.
+
+        """
+        return self._transitive(ns, self.fanin_offsets, self.fanin_indices)
+
+    def transitive_fanout(self, ns):
+        """
+        Compute the transitive fanout of a node.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute transitive fanout for.
+
+        Returns
+        -------
+        set of str
+                Nodes in transitive fanout.
+
+        """
+        return self._transitive(ns, self.fanout_offsets, self.fanout_indices)
+
+    def inputs(self):
+        """
+        Return the circuit's inputs.
+
+        Returns
+        -------
+        set of str
+                Input nodes in circuit.
+
+        """
+        return self.filter_type("input")
+
+    def is_output(self, node):
+        """
+        Return True if a node is an output.
+
+        Parameters
+        ----------
+        node : str
+                Node.
+
+        Returns
+        -------
+        bool
+                Whether or not the node is an output
+
+        """
+        return self._is_output_id(self.id(node))
+
+    def outputs(self):
+        """
+        Return the circuit's outputs.
+
+        Returns
+        -------
+        set of str
+                Output nodes in circuit.
+
+        """
+        return {n for i, n in enumerate(self.names) if self._is_output_id(i)}
+
+    def io(self):
+        """
+        Return the circuit's io.
+
+        Returns
+        -------
+        set of str
+                Output and input nodes in circuit.
+
+        """
+        return self.inputs() | self.outputs()
+
+    def startpoints(self, ns=None):
+        """
+        Compute the startpoints of a node, nodes, or circuit.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute startpoints for.
+
+        Returns
+        -------
+        set of str
+                Startpoints of ns.
+
+        """
+        if isinstance(ns, str):
+            ns = [ns]
+
+        if ns:
+            return (set(ns) | self.transitive_fanin(ns)) & self.startpoints()
+        return self.filter_type(["input", "bb_output"])
+
+    def endpoints(self, ns=None):
+        """
+        Compute the endpoints of a node, nodes, or circuit.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute endpoints for.
+
+        Returns
+        -------
+        set of str
+                Endpoints of ns.
+
+        """
+        if isinstance(ns, str):
+            ns = [ns]
+
+        if ns:
+            return (set(ns) | self.transitive_fanout(ns)) & self.endpoints()
+        return self.outputs() | self.filter_type("bb_input")
+
+    def _topo_ids(self):
+        """Return node ids in topological order, omitting nodes on cycles."""
+        offsets = self.fanin_offsets
+        remaining = array("I", (offsets[i + 1] - offsets[i] for i in range(len(self))))
+        order = [i for i, r in enumerate(remaining) if not r]
+        for i in order:
+            for f in self.fanout_ids(i):
+                remaining[f] -= 1
+                if not remaining[f]:
+                    order.append(f)
+        return order
+
+    def topo_sort(self):
+        """
+        Return a generator of nodes in topologically sorted order.
+
+        Returns
+        -------
+        iter of str
+                Ordered node names.
+
+        Raises
+        ------
+        networkx.NetworkXUnfeasible
+                If the circuit is cyclic.
+
+        """
+        order = self._topo_ids()
+        if len(order) != len(self):
+            raise nx.NetworkXUnfeasible("Graph contains a cycle")
+        return (self.names[i] for i in order)
+
+    def is_cyclic(self):
+        """
+        Check for combinational loops in circuit.
+
+        Returns
+        -------
+        bool
+                Existence of cycle
+
+        """
+        return len(self._topo_ids()) != len(self)
+
+    def levels(self):
+        """
+        Compute the logical level of each node.
+
+        Returns
+        -------
+        dict of str:int
+                Mapping of node names to levels.
+
+        """
+        order = self._topo_ids()
+        if len(order) != len(self):
+            raise ValueError("Cannot levelize cyclic circuit")
+        level_zero = {_type_codes[t] for t in ["input", "0", "1", "x"]}
+        levels = [0] * len(self)
+        for i in order:
+            if self.types[i] not in level_zero:
+                levels[i] = max((levels[f] for f in self.fanin_ids(i)), default=-1) + 1
+        return dict(zip(self.names, levels))
+
+    def _depth(self, ns, fanin, maximum):
+        """Compute the depth of nodes in a single pass over their cone."""
+        if self.is_cyclic():
+            raise ValueError("Cannot compute depth of cyclic circuit")
+
+        adjacent = self.fanin_ids if fanin else self.fanout_ids
+        select = max if maximum else min
+
+        # iterative post-order traversal so deep circuits do not recurse
+        depths = {}
+        roots = self._ids(ns)
+        for root in roots:
+            stack = [root]
+            while stack:
+                i = stack[-1]
+                if i in depths:
+                    stack.pop()
+                    continue
+                pending = [a for a in adjacent(i) if a not in depths]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    stack.pop()
+                    adjacent_depths = [depths[a] for a in adjacent(i)]
+                    depths[i] = select(adjacent_depths) + 1 if adjacent_depths else 0
+
+        return select(depths[i] for i in roots)
+
+    def fanout_depth(self, ns, maximum=True):
+        """
+        Compute the combinational fanout depth of a node(s).
+
+        The depth is the length of the longest (or shortest) path from a node
+        to a node without fanout.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute depth for.
+        maximum: bool
+                If True, the maximum depth will be found. If False, the minimum depth
+                will be found.
+
+        Returns
+        -------
+        int
+                Depth.
+
+        """
+        return self._depth(ns, False, maximum)
+
+    def fanin_depth(self, ns, maximum=True):
+        """
+        Compute the combinational fanin depth of a node(s).
+
+        The depth is the length of the longest (or shortest) path to a node
+        from a node without fanin.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Node(s) to compute depth for.
+        maximum: bool
+                If True, the maximum depth will be found. If False, the minimum depth
+                will be found.
+
+        Returns
+        -------
+        int
+                Depth.
+
+        """
+        return self._depth(ns, True, maximum)
+
+    def paths(self, source, target, cutoff=None):
+        """
+        Get the paths from node u to node v.
+
+        Parameters
+        ----------
+        source: str
+                Source node.
+        target: str
+                Target node.
+        cutoff: int
+                Depth to stop search at
+
+        Returns
+        -------
+        generator of list of str
+                The paths from source to target.
+
+        """
+        return self._paths(self.id(source), self.id(target), cutoff)
+
+    def _paths(self, s, t, cutoff):
+        if s == t:
+            yield [self.names[s]]
+            return
+        if cutoff is None:
+            cutoff = len(self) - 1
+        if cutoff < 1:
+            return
+
+        # iterative depth-first search over simple paths
+        path = [s]
+        on_path = {s}
+        stack = [iter(self.fanout_ids(s))]
+        while stack:
+            i = next(stack[-1], None)
+            if i is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif i == t:
+                yield [self.names[j] for j in path] + [self.names[t]]
+            elif i not in on_path and len(path) < cutoff:
+                path.append(i)
+                on_path.add(i)
+                stack.append(iter(self.fanout_ids(i)))
+
+    def kcuts(self, n, k, computed=None):
+        """
+        Generate k-cuts.
+
+        Cuts that are supersets of other cuts are not included. See
+        `cuts.priority_cuts` for enumerating a bounded number of cuts for
+        every node at once.
+
+        Parameters
+        ----------
+        n : str
+                Node to compute cuts for.
+        k : int
+                Maximum cut width.
+        computed : dict of str:list of set of str
+                Previously computed cuts, which is updated with the cuts of
+                `n` and of every node in its transitive fanin.
+
+        Returns
+        -------
+        iter of str
+                k-cuts.
+
+        """
+        if computed is None:
+            computed = {}
+
+        if n not in computed:
+            cone = self.transitive_fanin(n) | {n}
+            node_cuts = priority_cuts(self, k, max_cuts=None, nodes=cone)
+            for m, cuts in node_cuts.items():
+                if m not in computed:
+                    computed[m] = [set(cut) for cut in cuts]
+        return computed[n]
+
+    def reconvergence_points(self, stem):
+        """
+        Get the nodes where the fanout of a stem reconverges.
+
+        A node is a reconvergence point of `stem` if it can be reached from
+        two different fanouts of `stem` through paths that only meet at the
+        node. See `Circuit.reconvergence_points`.
+
+        Parameters
+        ----------
+        stem : str
+                Node to find reconvergence points for.
+
+        Returns
+        -------
+        set of str
+                Reconvergence points.
+
+        """
+        stem = self.id(stem)
+        if len(self.fanout_ids(stem)) < 2:
+            return set()
+
+        # iterative depth-first search for the post-order of the fanout cone
+        postorder = {}
+        stack = [(stem, iter(self.fanout_ids(stem)))]
+        visited = {stem}
+        while stack:
+            i, successors = stack[-1]
+            for j in successors:
+                if j not in visited:
+                    visited.add(j)
+                    stack.append((j, iter(self.fanout_ids(j))))
+                    break
+            else:
+                stack.pop()
+                postorder[i] = len(postorder)
+        order = sorted(postorder, key=postorder.get, reverse=True)
+
+        # iterative dominator computation (Cooper, Harvey, and Kennedy)
+        idom = {stem: stem}
+
+        def intersect(u, v):
+            while u != v:
+                while postorder[u] < postorder[v]:
+                    u = idom[u]
+                while postorder[v] < postorder[u]:
+                    v = idom[v]
+            return u
+
+        changed = True
+        while changed:
+            changed = False
+            for i in order[1:]:
+                new_idom = None
+                for p in self.fanin_ids(i):
+                    if p in idom:
+                        new_idom = p if new_idom is None else intersect(p, new_idom)
+                if idom.get(i) != new_idom:
+                    idom[i] = new_idom
+                    changed = True
+
+        return {
+            self.names[i]
+            for i in order[1:]
+            if idom[i] == stem and sum(p in postorder for p in self.fanin_ids(i)) > 1
+        }
+
+    def _reconverges(self, stem):
+        """Check if the fanout of a stem id reconverges, stopping at the first hit."""
+        # label each node in the cone with the fanout branch that reached it
+        branch = {}
+        for b in self.fanout_ids(stem):
+            if b in branch:
+                return True
+            branch[b] = b
+            stack = [b]
+            while stack:
+                for j in self.fanout_ids(stack.pop()):
+                    if j not in branch:
+                        branch[j] = b
+                        stack.append(j)
+                    elif branch[j] != b:
+                        return True
+        return False
+
+    def reconvergent_fanout_nodes(self, points=False):
+        """
+        Get nodes that have fanout that reconverges.
+
+        Parameters
+        ----------
+        points : bool
+                If True, each node is yielded together with its reconvergence
+                points, as found by `reconvergence_points`.
+
+        Returns
+        -------
+        generator of str or generator of tuple of str, set of str
+                A generator of nodes that have reconvergent fanout
+
+        """
+        # nodes closer to the outputs have smaller cones, so check them first
+        order = self._topo_ids()
+        ids = reversed(order) if len(order) == len(self) else range(len(self))
+        for i in ids:
+            if len(self.fanout_ids(i)) < 2:
+                continue
+            if points:
+                reconvergence = self.reconvergence_points(self.names[i])
+                if reconvergence:
+                    yield self.names[i], reconvergence
+            elif self._reconverges(i):
+                yield self.names[i]
+
+    def has_reconvergent_fanout(self):
+        """
+        Check if a circuit has any reconvergent fanout present.
+
+        Returns
+        -------
+        bool
+                Whether or not reconvergent fanout is present
+
+        """
+        try:
+            next(self.reconvergent_fanout_nodes())
+            return True
+        except StopIteration:
+            return False
+
+    def uid(self, n, blocked=None):
+        """
+        Generate a unique net name based on `n`.
+
+        Parameters
+        ----------
+        n : str
+                Name to uniquify
+        blocked : set of str
+                Addtional names to block
+
+        Returns
+        -------
+        str
+                Unique name
+
+        """
+        if blocked is None:
+            blocked = []
+
+        if n not in self.ids and n not in blocked:
+            return n
+        i = 0
+        while f"{n}_{i}" in self.ids or f"{n}_{i}" in blocked:
+            if i < 10:
+                i += 1
+            else:
+                i *= 7
+        return f"{n}_{i}"
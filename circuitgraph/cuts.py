@@ -0,0 +1,267 @@
+"""
+Functions for enumerating cuts of circuit nodes.
+
+A cut of a node is a set of nodes, called leaves, such that every path from
+a startpoint to the node passes through a leaf. A k-cut has at most k
+leaves. Cuts are the basis of technology mapping and rewriting.
+
+Cuts are enumerated for all nodes in a single pass in topological order by
+merging the cuts of each node's fanin. The number of cuts stored per node
+is bounded (priority cuts), and cuts that are supersets of other cuts of
+the same node are pruned. Each cut carries a 64-bit signature of its
+leaves, which rejects most oversized merges and dominance checks without
+comparing the leaves themselves.
+
+Examples
+--------
+>>> import circuitgraph as cg
+>>> c = cg.Circuit()
+>>> c.add("i0", "input")
+'i0'
+>>> c.add("i1", "input")
+'i1'
+>>> c.add("i2", "input")
+'i2'
+>>> c.add("g0", "and", fanin=["i0", "i1"])
+'g0'
+>>> c.add("g1", "xor", fanin=["g0", "i2"])
+'g1'
+>>> node_cuts = cg.cuts.priority_cuts(c, k=3, truth_tables=True)
+>>> [cut.leaves for cut in node_cuts["g1"]]
+[('i2', 'g0'), ('i0', 'i1', 'i2'), ('g1',)]
+>>> bin(node_cuts["g1"][0].truth_table)
+'0b110'
+
+"""
+
+_var_masks_cache = {}
+
+
+class Cut:
+    """
+    Class for representing a cut.
+
+    Truth tables are stored as integers with one bit per assignment of the
+    leaves. Bit `i` holds the value of the node when leaf `j` has value
+    `(i >> j) & 1`.
+
+    """
+
+    __slots__ = ("leaves", "truth_table")
+
+    def __init__(self, leaves, truth_table=None):
+        """
+        Create a new `Cut`.
+
+        Parameters
+        ----------
+        leaves : tuple of str
+                Leaves of the cut.
+        truth_table : int
+                Function of the node in terms of the leaves.
+
+        """
+        self.leaves = leaves
+        self.truth_table = truth_table
+
+    def __len__(self):
+        """Count the number of leaves."""
+        return len(self.leaves)
+
+    def __iter__(self):
+        """Iterate through the leaves."""
+        return iter(self.leaves)
+
+    def __contains__(self, n):
+        """Check if a node is a leaf."""
+        return n in self.leaves
+
+    def __repr__(self):
+        """Represent the cut by its leaves."""
+        return f"Cut({self.leaves!r})"
+
+
+def _var_masks(m):
+    """Return the truth tables of each of `m` variables."""
+    try:
+        return _var_masks_cache[m]
+    except KeyError:
+        masks = []
+        for j in range(m):
+            mask = 0
+            for i in range(1 << m):
+                if i >> j & 1:
+                    mask |= 1 << i
+            masks.append(mask)
+        _var_masks_cache[m] = masks
+        return masks
+
+
+def _expand(truth_table, sub_leaves, leaves):
+    """Express a truth table over `sub_leaves` in terms of `leaves`."""
+    masks = _var_masks(len(leaves))
+    ones = (1 << (1 << len(leaves))) - 1
+    literals = [masks[leaves.index(leaf)] for leaf in sub_leaves]
+    expanded = 0
+    for i in range(1 << len(sub_leaves)):
+        if truth_table >> i & 1:
+            term = ones
+            for j, literal in enumerate(literals):
+                term &= literal if i >> j & 1 else ones ^ literal
+            expanded |= term
+    return expanded
+
+
+def _truth_table(t, fanin_cuts, leaves):
+    """Compute the truth table of a gate over cut leaves."""
+    ones = (1 << (1 << len(leaves))) - 1
+    fanin_tables = [_expand(tt, sub_leaves, leaves) for sub_leaves, tt in fanin_cuts]
+    if t in ["and", "nand"]:
+        tt = ones
+        for f in fanin_tables:
+            tt &= f
+    elif t in ["or", "nor"]:
+        tt = 0
+        for f in fanin_tables:
+            tt |= f
+    elif t in ["xor", "xnor"]:
+        tt = 0
+        for f in fanin_tables:
+            tt ^= f
+    else:
+        tt = fanin_tables[0]
+    if t in ["nand", "nor", "xnor", "not"]:
+        tt ^= ones
+    return tt
+
+
+def _dominated(cut, cuts):
+    """Check if a cut is a superset of any cut in `cuts`."""
+    leaves, signature = cut[0], cut[1]
+    for other in cuts:
+        if other[1] & ~signature == 0 and other[0] <= leaves:
+            return True
+    return False
+
+
+def _add_cut(cut, cuts):
+    """Add a cut to a list of cuts, keeping only undominated cuts."""
+    if _dominated(cut, cuts):
+        return cuts
+    leaves, signature = cut[0], cut[1]
+    cuts = [
+        other
+        for other in cuts
+        if not (signature & ~other[1] == 0 and leaves <= other[0])
+    ]
+    cuts.append(cut)
+    return cuts
+
+
+def priority_cuts(c, k=4, max_cuts=8, truth_tables=False, nodes=None):
+    """
+    Enumerate the k-cuts of circuit nodes.
+
+    The cuts of each node are sorted by priority: cuts with fewer leaves
+    come first, followed by cuts whose leaves are closer to the node. At
+    most `max_cuts` cuts are kept for each node, and the trivial cut,
+    containing only the node itself, is always added last.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to compute cuts for.
+    k : int
+            Maximum number of leaves in a cut.
+    max_cuts : int
+            Maximum number of non-trivial cuts stored per node. If None, all
+            undominated cuts are kept.
+    truth_tables : bool
+            If True, the truth table of the node in terms of the leaves is
+            computed for each cut.
+    nodes : iterable of str
+            Nodes to compute cuts for. If None, cuts are computed for every
+            node. Otherwise, cuts are computed for the nodes and their
+            transitive fanin.
+
+    Returns
+    -------
+    dict of str:list of Cut
+            Cuts of each node.
+
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    if c.is_cyclic():
+        raise ValueError("Cannot compute cuts of cyclic circuit")
+
+    order = list(c.topo_sort())
+    if nodes is not None:
+        if isinstance(nodes, str):
+            nodes = [nodes]
+        nodes = set(nodes)
+        cone = nodes | c.transitive_fanin(nodes)
+        order = [n for n in order if n in cone]
+    ids = {n: i for i, n in enumerate(order)}
+
+    levels = {}
+    # cuts are stored as (leaves, signature, sorted leaves, truth table)
+    node_cuts = {}
+    for i, n in enumerate(order):
+        fanin = [ids[f] for f in c.fanin(n)]
+        levels[i] = max((levels[f] for f in fanin), default=-1) + 1
+        trivial = (frozenset([i]), 1 << (i % 64), (i,), 0b10)
+
+        if not fanin or c.type(n) in ["input", "bb_output", "x", "0", "1"]:
+            node_cuts[i] = [trivial]
+            continue
+
+        # merge fanin cuts one fanin at a time, keeping the chosen subcuts
+        partial = [(frozenset(), 0, ())]
+        for f in fanin:
+            merged = []
+            for leaves, signature, choices in partial:
+                for cut in node_cuts[f]:
+                    union_signature = signature | cut[1]
+                    if bin(union_signature).count("1") > k:
+                        continue
+                    union = leaves | cut[0]
+                    if len(union) > k:
+                        continue
+                    merged = _add_cut(
+                        (
+                            union,
+                            union_signature,
+                            choices + (cut,) if truth_tables else choices,
+                        ),
+                        merged,
+                    )
+            partial = merged
+
+        partial.sort(key=lambda p: (len(p[0]), -sum(levels[j] for j in p[0])))
+        if max_cuts is not None:
+            partial = partial[:max_cuts]
+
+        new_cuts = []
+        for leaves, signature, choices in partial:
+            sorted_leaves = tuple(sorted(leaves))
+            tt = None
+            if truth_tables:
+                tt = _truth_table(
+                    c.type(n), [(cut[2], cut[3]) for cut in choices], sorted_leaves
+                )
+            new_cuts.append((leaves, signature, sorted_leaves, tt))
+        new_cuts.append(trivial)
+        node_cuts[i] = new_cuts
+
+    return {
+        order[i]: [
+            Cut(
+                tuple(order[j] for j in sorted_leaves),
+                tt if truth_tables else None,
+            )
+            for _, _, sorted_leaves, tt in node_cut
+        ]
+        for i, node_cut in node_cuts.items()
+        if nodes is None or order[i] in nodes
+    }
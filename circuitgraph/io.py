@@ -1,9 +1,18 @@
 """Functions for reading/writing CircuitGraphs."""
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from lark.exceptions import UnexpectedInput
+
 from circuitgraph import BlackBox, Circuit
-from circuitgraph.parsing import fast_parse_verilog_netlist, parse_verilog_netlist
+from circuitgraph.compact import CompactCircuit
+from circuitgraph.parsing import (
+    VerilogParsingError,
+    fast_parse_verilog_netlist,
+    parse_verilog_netlist,
+    stream_parse_verilog_netlist,
+)
 
 generic_flop = BlackBox("ff", ["clk", "d"], ["q"])
 
@@ -30,6 +39,8 @@ def from_file(
     warnings=False,
     error_on_warning=False,
     fast=False,
+    compact=False,
+    stream=False,
 ):
     """
     Create a new `Circuit` from a verilog file.
@@ -57,10 +68,19 @@ def from_file(
             the docstring for `fast_parse_verilog_netlist` in order to
             confirm that `netlist` adheres to these assumptions before
             using this flag.
+    compact: bool
+            If True, the parsed circuit is returned as a `CompactCircuit`,
+            which uses much less memory but cannot be modified.
+    stream: bool
+            If True, verilog is parsed with `stream_parse_verilog_netlist`
+            from parsing/stream_verilog.py, which reads the file one line
+            at a time instead of loading the whole netlist into memory.
+            It is much faster than the default parser, checks the netlist
+            as it goes, and also supports buses.
 
     Returns
     -------
-    Circuit
+    Circuit or CompactCircuit
             the parsed circuit.
 
     """
@@ -69,10 +89,18 @@ def from_file(
     if name is None:
         infer_module_name = True
         name = path.stem
+    if stream and (fmt == "verilog" or path.suffix == ".v"):
+        with open(path) as f:
+            c = stream_parse_verilog_netlist(
+                f, blackboxes, name, infer_module_name, warnings, error_on_warning
+            )
+        if compact:
+            return CompactCircuit.from_circuit(c)
+        return c
     with open(path) as f:
         netlist = f.read()
     if fmt == "verilog" or path.suffix == ".v":
-        return verilog_to_circuit(
+        c = verilog_to_circuit(
             netlist,
             name,
             infer_module_name,
@@ -81,9 +109,211 @@ def from_file(
             error_on_warning,
             fast,
         )
-    if fmt == "bench" or path.suffix == ".bench":
-        return bench_to_circuit(netlist, name)
-    raise ValueError(f"extension {path.suffix} not supported")
+    elif fmt == "bench" or path.suffix == ".bench":
+        c = bench_to_circuit(netlist, name)
+    else:
+        raise ValueError(f"extension {path.suffix} not supported")
+    if compact:
+        return CompactCircuit.from_circuit(c)
+    return c
+
+
+# escaped identifiers are matched so that their contents are kept as is
+_comment_regex = re.compile(r"\\\S+|//[^\n]*|/\*.*?\*/", re.DOTALL)
+_escaped_regex = re.compile(r"\\\S+")
+_module_regex = re.compile(r"\bmodule\s+([^\s(;#]+).*?\bendmodule\b", re.DOTALL)
+
+
+def _blank_comment(m):
+    """Replace a comment with spaces, keeping newlines."""
+    if m.group().startswith("\\"):
+        return m.group()
+    return re.sub(r"[^\n]", " ", m.group())
+
+
+def _split_modules(netlist):
+    """
+    Split verilog code into modules, ignoring comments.
+
+    Parameters
+    ----------
+    netlist: str
+            Verilog code.
+
+    Returns
+    -------
+    list of tuple of str, int, str
+            The name, first line number, and code of each module.
+
+    """
+    # blank out comments, keeping newlines so line numbers are unchanged
+    netlist = _comment_regex.sub(_blank_comment, netlist)
+    # search a copy with escaped identifiers, which may contain keywords, hidden
+    masked = _escaped_regex.sub(lambda m: "_" * len(m.group()), netlist)
+    modules = []
+    pos = 0
+    line = 1
+    for m in _module_regex.finditer(masked):
+        line += netlist.count("\n", pos, m.start())
+        pos = m.start()
+        modules.append(
+            (netlist[m.start(1) : m.end(1)], line, netlist[m.start() : m.end()])
+        )
+    return modules
+
+
+def _syntax_error(e):
+    """Convert a Lark error, which cannot be pickled, for `from_files`."""
+    error = VerilogParsingError(str(e).strip())
+    error.line = e.line
+    error.column = e.column
+    return error
+
+
+def _parse_file(path, options):
+    """Parse a file in a worker process of `from_files`."""
+    try:
+        return from_file(path, **options)
+    except UnexpectedInput as e:
+        raise _syntax_error(e) from None
+
+
+def _parse_module(netlist, name, line, options):
+    """Parse one module of a file in a worker process of `from_files`."""
+    try:
+        c = verilog_to_circuit(
+            netlist,
+            name,
+            blackboxes=options["blackboxes"],
+            warnings=options["warnings"],
+            error_on_warning=options["error_on_warning"],
+            fast=options["fast"],
+            stream=options["stream"],
+        )
+    except UnexpectedInput as e:
+        error = _syntax_error(e)
+    except VerilogParsingError as e:
+        error = e
+    else:
+        if options["compact"]:
+            return CompactCircuit.from_circuit(c)
+        return c
+    # report the line in the file instead of in the module
+    if isinstance(error.line, int):
+        error.line += line - 1
+    raise error from None
+
+
+def from_files(
+    paths,
+    workers=None,
+    all_modules=False,
+    fmt=None,
+    blackboxes=None,
+    warnings=False,
+    error_on_warning=False,
+    fast=False,
+    compact=False,
+    stream=False,
+):
+    """
+    Create new `Circuit`s from several files in parallel.
+
+    Each file is parsed with `from_file` in a pool of worker processes.
+    With `all_modules`, every module of each verilog file is parsed as a
+    separate task, so large multi-module files are also split across
+    workers. Circuits are pickled to be sent back from the workers, so
+    with `compact` the much smaller `CompactCircuit` is transferred
+    instead of a graph.
+
+    Parameters
+    ----------
+    paths: iterable of str or pathlib.Path
+            the paths to the files to read from.
+    workers: int
+            Number of worker processes. If None, one per CPU is used. If
+            1, files are parsed in this process.
+    all_modules: bool
+            If True, every module in each verilog file is parsed.
+            Otherwise, the module named after each file is parsed, or the
+            first module if there is none, as in `from_file`.
+    fmt: str
+            the format of the files to be read, overrides the extension.
+    blackboxes: seq of BlackBox
+            sub circuits in the circuits to be parsed.
+    warnings: bool
+            If True, warnings about unused nets will be printed.
+    error_on_warning: bool
+            If True, unused nets will cause raise `VerilogParsingWarning`
+            exceptions.
+    fast: bool
+            If True, uses `fast_parse_verilog_netlist`. See `from_file`.
+    compact: bool
+            If True, the parsed circuits are returned as `CompactCircuit`s.
+    stream: bool
+            If True, uses `stream_parse_verilog_netlist`. See `from_file`.
+
+    Returns
+    -------
+    list of Circuit or CompactCircuit
+            the parsed circuits, in the order of `paths`. With
+            `all_modules`, each entry is instead a dict mapping module
+            names to parsed circuits, in the order of the file.
+
+    """
+    paths = [Path(path) for path in paths]
+    options = {
+        "fmt": fmt,
+        "blackboxes": blackboxes,
+        "warnings": warnings,
+        "error_on_warning": error_on_warning,
+        "fast": fast,
+        "compact": compact,
+        "stream": stream,
+    }
+
+    # each task is a path index, module name, function, and arguments
+    tasks = []
+    results = []
+    for i, path in enumerate(paths):
+        if all_modules and (fmt == "verilog" or path.suffix == ".v"):
+            with open(path) as f:
+                modules = _split_modules(f.read())
+            if not modules:
+                raise ValueError(f"Could not read netlist: no modules found in {path}")
+            results.append({})
+            for name, line, netlist in modules:
+                if name in results[i]:
+                    raise ValueError(f"module {name} defined more than once in {path}")
+                results[i][name] = None
+                tasks.append((i, name, _parse_module, (netlist, name, line, options)))
+        else:
+            results.append({} if all_modules else None)
+            tasks.append((i, None, _parse_file, (path, options)))
+
+    def store(i, name, c):
+        if all_modules:
+            results[i][c.name if name is None else name] = c
+        else:
+            results[i] = c
+
+    if workers == 1:
+        for i, name, function, args in tasks:
+            store(i, name, function(*args))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(function, *args): (i, name)
+            for i, name, function, args in tasks
+        }
+        try:
+            for future in as_completed(futures):
+                store(*futures[future], future.result())
+        finally:
+            for future in futures:
+                future.cancel()
+    return results
 
 
 def from_lib(name):
@@ -178,6 +408,7 @@ def verilog_to_circuit(
     warnings=False,
     error_on_warning=False,
     fast=False,
+    stream=False,
 ):
     """
     Create a new Circuit from a module inside Verilog code.
@@ -206,6 +437,10 @@ def verilog_to_circuit(
             the docstring for `fast_parse_verilog_netlist` in order to
             confirm that `netlist` adheres to these assumptions before
             using this flag.
+    stream: bool
+            If True, uses the `stream_parse_verilog_netlist` function from
+            parsing/stream_verilog.py, which is much faster than the
+            default parser but still checks the netlist.
 
     Returns
     -------
@@ -216,6 +451,16 @@ def verilog_to_circuit(
     if blackboxes is None:
         blackboxes = []
 
+    if stream:
+        return stream_parse_verilog_netlist(
+            netlist.splitlines(True),
+            blackboxes,
+            name,
+            infer_module_name,
+            warnings,
+            error_on_warning,
+        )
+
     if fast:
         return fast_parse_verilog_netlist(netlist, blackboxes)
 
@@ -244,7 +489,7 @@ def to_file(c, path, fmt="verilog", behavioral=False):
 
     Parameters
     ----------
-    c: Circut
+    c: Circuit or CompactCircuit
             the circuit
     path: str
             the path to the file to read from.
@@ -278,33 +523,33 @@ def circuit_to_verilog(c, behavioral=False):
         Verilog code.
 
     """
-    c = Circuit(graph=c.graph.copy(), name=c.name, blackboxes=c.blackboxes.copy())
-    # sanitize escaped nets
-    for node in c.nodes():
-        if node.startswith("\\"):
-            c.relabel({node: node + " "})
-
-    inputs = list(c.inputs())
-    outputs = list(c.outputs())
+
+    def net(n):
+        # escaped nets must be terminated by whitespace
+        return f"{n} " if n.startswith("\\") else n
+
+    inputs = [net(n) for n in c.inputs()]
+    outputs = [net(n) for n in c.outputs()]
     insts = []
     wires = []
 
     # blackboxes
+    bb_driven = set()
     for name, bb in c.blackboxes.items():
         io = []
         for n in bb.inputs():
             try:
                 driver = c.fanin(f"{name}.{n}").pop()
-                io += [f".{n}({driver})"]
+                io += [f".{n}({net(driver)})"]
             except KeyError:
                 io += [f".{n}()"]
 
         for n in bb.outputs():
             try:
                 driven = c.fanout(f"{name}.{n}").pop()
-                # Disconnect so no buffer is created
-                c.disconnect(f"{name}.{n}", driven)
-                io += [f".{n}({driven})"]
+                # skip the driven buffer so no buffer is created
+                bb_driven.add(driven)
+                io += [f".{n}({net(driven)})"]
             except KeyError:
                 io += [f".{n}()"]
 
@@ -314,15 +559,15 @@ def circuit_to_verilog(c, behavioral=False):
     # gates
     for n in c.nodes():
         if c.type(n) in ["xor", "xnor", "buf", "not", "nor", "or", "and", "nand"]:
-            wires.append(n)
-            fanin = list(c.fanin(n))
-            if not fanin:
+            wires.append(net(n))
+            fanin = [net(f) for f in c.fanin(n)]
+            if not fanin or n in bb_driven:
                 continue
             if behavioral:
                 if c.type(n) == "buf":
-                    insts.append(f"assign {n} = {fanin[0]}")
+                    insts.append(f"assign {net(n)} = {fanin[0]}")
                 elif c.type(n) == "not":
-                    insts.append(f"assign {n} = ~{fanin[0]}")
+                    insts.append(f"assign {net(n)} = ~{fanin[0]}")
                 else:
                     if c.type(n) in ["xor", "xnor"]:
                         symbol = "^"
@@ -332,16 +577,16 @@ def circuit_to_verilog(c, behavioral=False):
                         symbol = "|"
                     fanin = f" {symbol} ".join(fanin)
                     if c.type(n) in ["xnor", "nor", "nand"]:
-                        insts.append(f"assign {n} = ~({fanin})")
+                        insts.append(f"assign {net(n)} = ~({fanin})")
                     else:
-                        insts.append(f"assign {n} = {fanin}")
+                        insts.append(f"assign {net(n)} = {fanin}")
             else:
                 fanin = ", ".join(fanin)
                 gate_name = c.uid(f"g_{len(insts)}")
-                insts.append(f"{c.type(n)} {gate_name}({n}, {fanin})")
+                insts.append(f"{c.type(n)} {gate_name}({net(n)}, {fanin})")
         elif c.type(n) in ["0", "1", "x"]:
-            insts.append(f"assign {n} = 1'b{c.type(n)}")
-            wires.append(n)
+            insts.append(f"assign {net(n)} = 1'b{c.type(n)}")
+            wires.append(net(n))
         elif c.type(n) in ["input", "bb_input", "bb_output"]:
             pass
         else:
@@ -1,7 +1,9 @@
 """Utilities for parsing netlists."""
 from circuitgraph.parsing.fast_verilog import fast_parse_verilog_netlist
+from circuitgraph.parsing.stream_verilog import stream_parse_verilog_netlist
 from circuitgraph.parsing.verilog import (
     parse_verilog_netlist,
+    set_parser_cache,
     VerilogParsingWarning,
     VerilogParsingError,
 )
@@ -0,0 +1,666 @@
+"""
+Utils for parsing verilog one statement at a time.
+
+The netlist is read line by line from a file object and split into tokens
+with a regex. Tokens are grouped into statements at each `;`, and each
+statement is added to the graph as soon as it is complete. Neither the
+full netlist text nor a parse tree is held in memory, so memory use is
+bounded by the size of the circuit and the longest statement.
+
+Nodes and edges are collected as plain dicts and lists and inserted into
+the graph in bulk when the module ends, instead of going through
+`Circuit.add` for each gate.
+
+Examples
+--------
+>>> import io
+>>> import circuitgraph as cg
+>>> netlist = io.StringIO(
+...     '''
+... module top(a, b, y);
+...   input a, b;  // inputs
+...   output y;
+...   wire w;
+...   nand g0(w, a, b);
+...   assign y = w | ~a;
+... endmodule
+... '''
+... )
+>>> c = cg.parsing.stream_parse_verilog_netlist(netlist, [])
+>>> sorted(c.fanin("y"))
+['not_a', 'w']
+>>> c.type("w")
+'nand'
+
+"""
+import re
+
+import networkx as nx
+
+from circuitgraph import Circuit, primitive_gates
+from circuitgraph.parsing.verilog import VerilogParsingError, _check_for_warnings, _uid
+
+_token_regex = re.compile(r"\\\S+|[A-Za-z_]\w*|\d+'\w+|\d+|//|/\*|~\^|\^~|\S")
+
+# binary operators by increasing precedence, mapped to gate types
+_binary_operators = [
+    {"|": "or"},
+    {"^": "xor", "~^": "xnor", "^~": "xnor"},
+    {"&": "and"},
+]
+
+_constants = {
+    "1'b0": "tie_0",
+    "1'h0": "tie_0",
+    "1'd0": "tie_0",
+    "1'b1": "tie_1",
+    "1'h1": "tie_1",
+    "1'd1": "tie_1",
+    "1'bx": "tie_x",
+    "1'hx": "tie_x",
+}
+
+
+class _Token(str):
+    """A token with its position, used for error messages."""
+
+    def __new__(cls, value, line, column):
+        token = super().__new__(cls, value)
+        token.line = line
+        token.column = column + 1
+        token.start_pos = column + 1
+        return token
+
+    def __reduce__(self):
+        return (_Token, (str(self), self.line, self.column - 1))
+
+
+def _error(message, token):
+    """Create a `VerilogParsingError` for a token from `_tokens`."""
+    t, line_number, column, line = token
+    text = "\n" + line.rstrip("\n") + "\n"
+    return VerilogParsingError(message, _Token(t, line_number, column), text)
+
+
+def _tokens(lines):
+    """
+    Split lines of verilog into tokens, skipping comments.
+
+    Parameters
+    ----------
+    lines: iterable of str
+            Lines of verilog.
+
+    Yields
+    ------
+    tuple of str, int, int, str
+            The token, its line number, its column, and its line.
+
+    """
+    in_comment = False
+    line = ""
+    line_number = 0
+    for line_number, line in enumerate(lines, 1):
+        if not in_comment and "/" not in line:
+            for m in _token_regex.finditer(line):
+                yield m.group(), line_number, m.start(), line
+            continue
+        pos = 0
+        if in_comment:
+            end = line.find("*/")
+            if end == -1:
+                continue
+            in_comment = False
+            pos = end + 2
+        while True:
+            m = _token_regex.search(line, pos)
+            if m is None:
+                break
+            t = m.group()
+            pos = m.end()
+            if t == "//":
+                break
+            if t == "/*":
+                end = line.find("*/", pos)
+                if end == -1:
+                    in_comment = True
+                    break
+                pos = end + 2
+                continue
+            yield t, line_number, m.start(), line
+    if in_comment:
+        raise _error("Unterminated comment", ("", line_number, len(line), line))
+
+
+def _statements(tokens):
+    """
+    Group tokens into statements.
+
+    Statements are terminated by `;`, which is not included, except for
+    `endmodule`, which is a statement on its own.
+
+    Parameters
+    ----------
+    tokens: iterable of tuple
+            Tokens from `_tokens`.
+
+    Yields
+    ------
+    list of tuple
+            Tokens of each statement.
+
+    """
+    statement = []
+    for token in tokens:
+        if token[0] == ";":
+            if not statement:
+                raise _error("Empty statement", token)
+            yield statement
+            statement = []
+        elif token[0] == "endmodule" and not statement:
+            yield [token]
+        else:
+            statement.append(token)
+    if statement:
+        raise _error("Unexpected end of file, expected ';'", statement[-1])
+
+
+def _bit(n, i):
+    r"""Name a bit of a bus as the escaped identifier `\n[i]`."""
+    if n.startswith("\\"):
+        n = n[1:]
+    return f"\\{n}[{i}]"
+
+
+def _is_identifier(t):
+    return t[0] == "\\" or t[0].isalpha() or t[0] == "_"
+
+
+class _StatementReader:
+    """A cursor over the tokens of a statement."""
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.i = 0
+
+    def peek(self):
+        if self.i < len(self.statement):
+            return self.statement[self.i][0]
+        return None
+
+    def current(self, expected="token"):
+        if self.i >= len(self.statement):
+            token = self.statement[-1]
+            t, line_number, column, line = token
+            raise _error(
+                f"Expected {expected} before ';'",
+                ("", line_number, column + len(t), line),
+            )
+        return self.statement[self.i]
+
+    def next(self, expected="token"):
+        token = self.current(expected)
+        self.i += 1
+        return token
+
+    def expect(self, value):
+        token = self.next(f"'{value}'")
+        if token[0] != value:
+            raise _error(f"Expected '{value}', found '{token[0]}'", token)
+        return token
+
+    def identifier(self):
+        token = self.next("identifier")
+        if not _is_identifier(token[0]):
+            raise _error(f"Expected identifier, found '{token[0]}'", token)
+        return token
+
+    def identifiers(self):
+        tokens = [self.identifier()]
+        while self.peek() == ",":
+            self.i += 1
+            tokens.append(self.identifier())
+        return tokens
+
+    def number(self):
+        token = self.next("number")
+        if not token[0].isdigit():
+            raise _error(f"Expected number, found '{token[0]}'", token)
+        return int(token[0])
+
+    def end(self):
+        if self.i < len(self.statement):
+            token = self.statement[self.i]
+            raise _error(f"Expected ';', found '{token[0]}'", token)
+
+
+class _ModuleBuilder:
+    """
+    Builds the graph of a module statement by statement.
+
+    Node types and edges are collected in a dict and a list as statements
+    are read, and are inserted into the graph in bulk once the module
+    ends. Each statement is checked as it is added, so errors point at
+    the statement that caused them.
+
+    """
+
+    def __init__(self, name, blackboxes):
+        self.name = name
+        self.blackboxes = {bb.name: bb for bb in blackboxes}
+        self.types = {"tie_0": "0", "tie_1": "1", "tie_x": "x"}
+        self.edges = []
+        self.driven = set()
+        self.buses = {}
+        self.instances = {}
+        self.inputs = {}
+        self.outputs = {}
+        self.output_bits = {}
+        self.wires = set()
+
+    def drive(self, n, node_type, fanin, token):
+        """Add a node driven by a gate, checking that it has one driver."""
+        if n in self.driven:
+            raise _error(f"{n} is driven more than once", token)
+        if self.types.get(n) in ("input", "0", "1", "x"):
+            raise _error(f"{n} cannot be driven", token)
+        self.driven.add(n)
+        types = self.types
+        types[n] = node_type
+        for f in fanin:
+            if f not in types:
+                types[f] = "buf"
+        self.edges.extend((f, n) for f in fanin)
+
+    def statement(self, statement):
+        reader = _StatementReader(statement)
+        keyword = statement[0][0]
+        if keyword in ("input", "output", "wire"):
+            self.declaration(reader)
+        elif keyword == "assign":
+            reader.next()
+            while True:
+                token = reader.current("identifier")
+                lvalue = self.net(reader)
+                reader.expect("=")
+                expression = self.expression(reader)
+                self.emit(expression, lvalue, token)
+                if reader.peek() != ",":
+                    break
+                reader.next()
+        elif keyword == "module":
+            raise _error("Nested module declaration", statement[0])
+        else:
+            self.instantiation(reader)
+        reader.end()
+
+    def declaration(self, reader):
+        keyword = reader.next()[0]
+        bits = None
+        if reader.peek() == "[":
+            reader.next()
+            msb = reader.number()
+            reader.expect(":")
+            lsb = reader.number()
+            reader.expect("]")
+            bits = range(min(msb, lsb), max(msb, lsb) + 1)
+        for token in reader.identifiers():
+            n = token[0]
+            if bits is None:
+                ns = [n]
+            else:
+                self.buses[n] = bits
+                ns = [_bit(n, i) for i in bits]
+            if keyword == "wire":
+                self.wires.update(ns)
+                continue
+            if n in self.inputs or n in self.outputs:
+                raise _error(f"{n} is declared more than once", token)
+            if keyword == "input":
+                self.inputs[n] = token
+                for bit in ns:
+                    if bit in self.driven:
+                        raise _error(f"Input {bit} is driven in module", token)
+                    self.types[bit] = "input"
+            else:
+                self.outputs[n] = token
+                self.output_bits.update((bit, token) for bit in ns)
+
+    def net(self, reader):
+        """Parse a net name, with an optional bit select."""
+        token = reader.identifier()
+        n = token[0]
+        if reader.peek() != "[":
+            if n in self.buses:
+                raise _error(f"Bus {n} must be indexed", token)
+            return n
+        bits = self.buses.get(n)
+        if bits is None:
+            raise _error(f"{n} is not declared as a bus", token)
+        reader.next()
+        index = reader.number()
+        if reader.peek() == ":":
+            raise _error("Part selects are not supported", reader.statement[reader.i])
+        reader.expect("]")
+        if index not in bits:
+            raise _error(f"Index {index} is out of range for {n}", token)
+        return _bit(n, index)
+
+    def expression(self, reader):
+        """
+        Parse an expression.
+
+        Returns a net name, or a tuple of an operator and its operands for
+        gates, which are added to the graph by `emit`. Precedence follows
+        the grammar used by `parse_verilog_netlist`.
+
+        """
+        # most connections are a single net, so skip the precedence levels
+        statement, i = reader.statement, reader.i
+        if i + 1 < len(statement) and statement[i + 1][0] in (",", ")"):
+            t = statement[i][0]
+            if _is_identifier(t) and t not in self.buses:
+                reader.i += 1
+                return t
+
+        condition = self.binary(reader, 0)
+        if reader.peek() != "?":
+            return condition
+        reader.next()
+        a = self.expression(reader)
+        reader.expect(":")
+        b = self.expression(reader)
+        return ("mux", condition, a, b)
+
+    def binary(self, reader, level):
+        if level == len(_binary_operators):
+            return self.unary(reader)
+        operators = _binary_operators[level]
+        a = self.binary(reader, level + 1)
+        while reader.peek() in operators:
+            op = operators[reader.next()[0]]
+            a = (op, a, self.binary(reader, level + 1))
+        return a
+
+    def unary(self, reader):
+        t = reader.peek()
+        if t in ("~", "!"):
+            reader.next()
+            return ("not", self.unary(reader))
+        if t == "(":
+            reader.next()
+            a = self.expression(reader)
+            reader.expect(")")
+            return a
+        if t is not None and _is_identifier(t):
+            return self.net(reader)
+        token = reader.next("expression")
+        try:
+            return _constants[token[0]]
+        except KeyError as e:
+            if token[0][0].isdigit():
+                raise _error(f"Unsupported constant {token[0]}", token) from e
+            raise _error(f"Unexpected '{token[0]}' in expression", token) from e
+
+    def emit(self, expression, n, token):
+        """
+        Add the gates of an expression to the graph.
+
+        Gates are named like those from `parse_verilog_netlist`. If `n` is
+        given, the top gate is named `n`, or `n` is added as a buffer of
+        the expression if it is a net.
+
+        """
+        if isinstance(expression, str):
+            if n is not None:
+                self.drive(n, "buf", [expression], token)
+            return expression
+        op = expression[0]
+        items = [self.emit(e, None, token) for e in expression[1:]]
+        io = "_".join(items)
+        if op == "mux":
+            s, a, b = items
+            inv = _uid(self.types, f"mux_n_{io}")
+            self.drive(inv, "not", [s], token)
+            a0 = _uid(self.types, f"mux_a0_{io}")
+            self.drive(a0, "and", [inv, b], token)
+            a1 = _uid(self.types, f"mux_a1_{io}")
+            self.drive(a1, "and", [s, a], token)
+            op, items, name = "or", [a0, a1], f"mux_o_{io}"
+        else:
+            name = f"{op}_{io}"
+        if n is None:
+            n = _uid(self.types, name)
+        self.drive(n, op, items, token)
+        return n
+
+    def connection(self, reader):
+        token = reader.statement[reader.i] if reader.peek() else None
+        return self.expression(reader), token
+
+    def connections(self, reader):
+        """Parse a parenthesized list of connections."""
+        reader.expect("(")
+        if reader.peek() == ".":
+            connections = {}
+            while True:
+                reader.expect(".")
+                pin = reader.identifier()
+                reader.expect("(")
+                if reader.peek() == ")":
+                    net = (None, pin)
+                else:
+                    net = self.connection(reader)
+                reader.expect(")")
+                if pin[0] in connections:
+                    raise _error(f"Pin {pin[0]} connected more than once", pin)
+                connections[pin[0]] = (net, pin)
+                if reader.peek() != ",":
+                    break
+                reader.next()
+        else:
+            connections = [self.connection(reader)]
+            while reader.peek() == ",":
+                reader.next()
+                connections.append(self.connection(reader))
+        reader.expect(")")
+        return connections
+
+    def instantiation(self, reader):
+        module = reader.identifier()
+        while True:
+            if reader.peek() == "(" and module[0] in primitive_gates:
+                name = module
+            else:
+                name = reader.identifier()
+            connections = self.connections(reader)
+            if module[0] in primitive_gates:
+                self.primitive(module[0], name, connections)
+            else:
+                self.blackbox(module, name, connections)
+            if reader.peek() != ",":
+                break
+            reader.next()
+
+    def output_net(self, connection):
+        net, token = connection
+        if not isinstance(net, str) or net in ("tie_0", "tie_1", "tie_x"):
+            raise _error("Outputs must be connected to a net", token)
+        return net
+
+    def primitive(self, gate, name, connections):
+        if isinstance(connections, dict):
+            raise _error("Primitive gates cannot use named port connections", name)
+        if len(connections) < 2:
+            raise _error(f"Primitive {gate} needs an output and an input", name)
+        if gate in ("buf", "not") and len(connections) > 2:
+            raise _error(f"{gate} cannot have more than one fanin", name)
+        output = self.output_net(connections[0])
+        fanin = [self.emit(e, None, token) for e, token in connections[1:]]
+        self.drive(output, gate, fanin, name)
+
+    def blackbox(self, module, name, connections):
+        try:
+            bb = self.blackboxes[module[0]]
+        except KeyError as e:
+            raise _error(
+                f"Blackbox {module[0]} not in list of defined blackboxes.", module
+            ) from e
+        if not isinstance(connections, dict):
+            raise _error(
+                "Blackbox instantiations must use named port connections", name
+            )
+        if name[0] in self.instances:
+            raise _error(f"Blackbox instance {name[0]} already exists", name)
+        self.instances[name[0]] = bb
+
+        types = self.types
+        inputs = bb.inputs()
+        outputs = bb.outputs()
+        for pin, (_, token) in connections.items():
+            if pin not in inputs and pin not in outputs:
+                raise _error(f"Pin {pin} not defined for blackbox {bb.name}", token)
+        for pin in inputs:
+            types[f"{name[0]}.{pin}"] = "bb_input"
+        for pin in outputs:
+            types[f"{name[0]}.{pin}"] = "bb_output"
+        for pin, (connection, _) in connections.items():
+            if connection[0] is None:
+                continue
+            if pin in inputs:
+                net = self.emit(connection[0], None, connection[1])
+                if net not in types:
+                    types[net] = "buf"
+                self.edges.append((net, f"{name[0]}.{pin}"))
+            else:
+                net = self.output_net(connection)
+                self.drive(net, "buf", [f"{name[0]}.{pin}"], connection[1])
+
+    def circuit(self, ports):
+        """Check the module interface and create the circuit."""
+        io = {p[0]: p for p in ports}
+        for n, token in self.inputs.items():
+            if n not in io:
+                raise _error(f"{n} declared as input but not in port list", token)
+        for n, token in self.outputs.items():
+            if n not in io:
+                raise _error(f"{n} declared as output but not in port list", token)
+        for n, token in io.items():
+            if n not in self.inputs and n not in self.outputs:
+                raise _error(
+                    f"{n} in port list but was not declared as input or output",
+                    token,
+                )
+
+        types = self.types
+        for n, token in self.output_bits.items():
+            if n not in types:
+                raise _error(f"Output {n} is not connected", token)
+
+        g = nx.DiGraph()
+        g.add_nodes_from((n, {"type": t, "output": False}) for n, t in types.items())
+        g.add_edges_from(self.edges)
+        for n in self.output_bits:
+            g.nodes[n]["output"] = True
+        for tie in ["tie_0", "tie_1", "tie_x"]:
+            if not g.out_degree(tie):
+                g.remove_node(tie)
+
+        return Circuit(name=self.name, graph=g, blackboxes=self.instances)
+
+
+def stream_parse_verilog_netlist(
+    lines,
+    blackboxes,
+    name=None,
+    infer_module_name=False,
+    warnings=False,
+    error_on_warning=False,
+):
+    r"""
+    Parse a verilog netlist into a Circuit, one statement at a time.
+
+    This produces the same circuit as `parse_verilog_netlist`, with
+    intermediate gates of expressions named the same way, but is several
+    times faster. In addition, primitive gates may be instantiated without
+    an instance name, and inputs, outputs, and wires may be declared as
+    buses with a range such as `[3:0]`. Each bit of a bus is a node named
+    like an escaped identifier, so `a[2]` is the node `\a[2]`. Part
+    selects and concatenations are not supported.
+
+    Unlike `parse_verilog_netlist`, nets that are driven more than once,
+    driven inputs, and out of range bit selects are reported as errors.
+
+    Parameters
+    ----------
+    lines: iterable of str
+            Lines of the netlist, such as an open file object.
+    blackboxes: list of circuitgraph.BlackBox
+            The blackboxes present in the netlist.
+    name: str
+            The name of the module to parse. If None, the first module is
+            parsed.
+    infer_module_name: bool
+            If True and no module named `name` is found, parse the first
+            module in the netlist.
+    warnings: bool
+            If True, warnings about unused nets will be printed.
+    error_on_warning: bool
+            If True, unused nets will cause raise `VerilogParsingWarning`
+            exceptions.
+
+    Returns
+    -------
+    circuitgraph.Circuit
+            The parsed circuit.
+
+    """
+    if blackboxes is None:
+        blackboxes = []
+
+    first = None
+    builder = None
+    ports = None
+    for statement in _statements(_tokens(lines)):
+        keyword = statement[0][0]
+        if keyword == "module":
+            if builder is not None:
+                raise _error("Nested module declaration", statement[0])
+            reader = _StatementReader(statement)
+            reader.next()
+            module = reader.identifier()[0]
+            ports = []
+            if reader.peek() == "(":
+                reader.next()
+                if reader.peek() != ")":
+                    ports = reader.identifiers()
+                reader.expect(")")
+            reader.end()
+            if name is None or module == name or (infer_module_name and not first):
+                builder = _ModuleBuilder(module, blackboxes)
+            else:
+                builder = False
+        elif keyword == "endmodule":
+            if builder is None:
+                raise _error("endmodule without module", statement[0])
+            if builder:
+                first = (builder.circuit(ports), builder.wires)
+                if name is None or first[0].name == name:
+                    break
+            builder = None
+        elif builder is None:
+            raise _error(f"Unexpected '{keyword}' outside of module", statement[0])
+        elif builder:
+            builder.statement(statement)
+    else:
+        if builder is not None:
+            raise _error("Missing endmodule", statement[-1])
+        if first is None:
+            if name is None or infer_module_name:
+                raise ValueError("Could not read netlist: no modules found")
+            raise ValueError(f"Could not read netlist: {name} module not found")
+
+    c, wires = first
+    if warnings:
+        _check_for_warnings(c, wires, error_on_warning)
+    return c
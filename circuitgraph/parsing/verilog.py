@@ -1,7 +1,10 @@
 """Utils for parsing verilog with Lark."""
 from pathlib import Path
 
+import networkx as nx
 from lark import Lark, Transformer
+from lark.grammar import Rule
+from lark.lexer import TerminalDef
 
 from circuitgraph import Circuit, primitive_gates
 
@@ -33,31 +36,117 @@ def _get_context_window(text, index):
 class VerilogParsingError(Exception):
     """Raised if there is an issue parsing the verilog."""
 
-    def __init__(self, message, token, text):
-        super().__init__()
+    def __init__(self, message, token=None, text=None):
+        super().__init__(message)
         self.message = message
         self.token = token
         self.line = getattr(token, "line", "?")
         self.column = getattr(token, "column", "?")
-        index = getattr(token, "pos_in_stream", None)
-        if index:
+        index = getattr(token, "pos_in_stream", getattr(token, "start_pos", None))
+        if index is not None and text is not None:
             self.context = _get_context_window(text, index)
         else:
             self.context = "?"
 
     def __str__(self):
         """Print the line and column of the error."""
-        self.message += f" (line {self.line}, column {self.column}):\n"
-        self.message += self.context
-        return self.message
+        return (
+            f"{self.message} (line {self.line}, column {self.column}):\n{self.context}"
+        )
 
 
 class VerilogParsingWarning(Exception):
     """Potentially raised if there is a warning parsing verilog."""
 
 
+def _check_for_warnings(c, wires, error_on_warning=False):
+    """
+    Warn about unused nets in a parsed circuit.
+
+    Parameters
+    ----------
+    c: circuitgraph.Circuit
+            The parsed circuit.
+    wires: set of str
+            The nets declared as wires.
+    error_on_warning: bool
+            If True, raise `VerilogParsingWarning` instead of printing.
+
+    """
+
+    def warn(message):
+        if error_on_warning:
+            raise VerilogParsingWarning(message)
+        print(f"Warning: {message}")
+
+    for wire in wires:
+        if wire not in c:
+            warn(f"{wire} declared as wire but isn't connected.")
+
+    for n in c.nodes():
+        if c.type(n) != "bb_input" and not c.is_output(n) and not c.fanout(n):
+            warn(f"{n} doesn't drive any nets.")
+        elif c.type(n) not in ["input", "0", "1", "bb_output"] and not c.fanin(n):
+            warn(f"{n} doesn't have any drivers.")
+
+
+def _uid(nodes, n):
+    """Generate a name based on `n` that is not in `nodes`, like `Circuit.uid`."""
+    if n not in nodes:
+        return n
+    i = 0
+    while f"{n}_{i}" in nodes:
+        i = i + 1 if i < 10 else i * 7
+    return f"{n}_{i}"
+
+
+def _check_connections(types, fanin):
+    """
+    Check the connections of a parsed netlist in one pass.
+
+    This applies the checks of `Circuit.add` and `Circuit.connect` to
+    nodes and edges that were collected without them.
+
+    Parameters
+    ----------
+    types: dict of str:str
+            The type of each node.
+    fanin: dict of str:list of str
+            The fanin of each node.
+
+    """
+    fanout_counts = {}
+    for n, t in types.items():
+        if n[0] in "0123456789":
+            raise ValueError(f"cannot add node starting with int: {n}")
+        fi = set(fanin.get(n, ()))
+        if not fi:
+            continue
+        if t in ["input", "0", "1", "x", "bb_output"]:
+            raise ValueError(f"cannot connect to {t} '{n}'")
+        if t in ["bb_input", "buf", "not"] and len(fi) > 1:
+            raise ValueError(f"fanin of {t} '{n}' cannot be greater than 1.")
+        for f in fi:
+            tf = types[f]
+            if tf == "bb_input":
+                raise ValueError(f"cannot connect from {tf} '{f}'.")
+            if tf == "bb_output":
+                if t != "buf":
+                    raise ValueError(f"cannot connect from {tf} '{f}' to non-buf '{n}'")
+                fanout_counts[f] = fanout_counts.get(f, 0) + 1
+                if fanout_counts[f] > 1:
+                    raise ValueError(f"fanout of {tf} '{f}' cannot be greater than 1.")
+
+
 class _VerilogCircuitGraphTransformer(Transformer):
-    """A lark.Transformer for parsing a verilog netlist."""
+    """
+    A lark.Transformer for parsing a verilog netlist.
+
+    Node types and fanin are collected in dicts while transforming, and
+    the circuit graph is built from them in bulk once the module is
+    complete.
+
+    """
 
     def __init__(self, text, blackboxes, warnings=False, error_on_warning=False):
         """
@@ -83,9 +172,12 @@ class _VerilogCircuitGraphTransformer(Transformer):
         self.blackboxes = blackboxes
         self.warnings = warnings
         self.error_on_warning = error_on_warning
-        self.tie_0 = self.c.add("tie_0", "0")
-        self.tie_1 = self.c.add("tie_1", "1")
-        self.tie_x = self.c.add("tie_x", "x")
+        self.types = {}
+        self.fanin = {}
+        self.instances = {}
+        self.tie_0 = self.add_node("tie_0", "0")
+        self.tie_1 = self.add_node("tie_1", "1")
+        self.tie_x = self.add_node("tie_x", "x")
         self.gate_expressions = set()
         self.io = set()
         self.inputs = set()
@@ -93,65 +185,54 @@ class _VerilogCircuitGraphTransformer(Transformer):
         self.wires = set()
 
     # Helper functions
-    def add_node(self, n, node_type, fanin=None, fanout=None, uid=False):
-        """So that nodes are of type `str`, not `lark.Token`."""
-        if not fanin:
-            fanin = []
-        elif type(fanin) not in [list, set]:
-            fanin = [fanin]
-        if not fanout:
-            fanout = []
-        elif type(fanout) not in [list, set]:
-            fanout = [fanout]
-
-        fanin = [str(i) for i in fanin]
-        fanout = [str(i) for i in fanout]
-        node_type = str(node_type)
-
-        return self.c.add(
-            str(n),
-            node_type,
-            fanin=fanin,
-            fanout=fanout,
-            uid=uid,
-            add_connected_nodes=True,
-            allow_redefinition=True,
-        )
+    def add_node(self, n, node_type, fanin=None, uid=False):
+        """
+        Record a node and its fanin, adding undefined fanin as buffers.
+
+        As with `Circuit.add` with `allow_redefinition`, redefining a node
+        replaces its type and adds to its fanin.
+
+        """
+        n = str(n)
+        if uid:
+            n = _uid(self.types, n)
+        types = self.types
+        types[n] = str(node_type)
+        if fanin:
+            if isinstance(fanin, str):
+                fanin = [fanin]
+            fanin = [str(f) for f in fanin]
+            for f in fanin:
+                if f not in types:
+                    types[f] = "buf"
+            self.fanin.setdefault(n, []).extend(fanin)
+        return n
 
     def add_blackbox(self, blackbox, name, connections=None):
-        if not connections:
-            connections = {}
-        formatted_connections = {}
-        for key in connections:
-            formatted_connections[str(key)] = str(connections[key])
-            if str(connections[key]) not in self.c:
-                self.c.add(str(connections[key]), "buf")
-        self.c.add_blackbox(blackbox, str(name), formatted_connections)
-
-    def warn(self, message):
-        if self.error_on_warning:
-            raise VerilogParsingWarning(message)
-        print(f"Warning: {message}")
+        name = str(name)
+        if name in self.instances:
+            raise ValueError(f"blackbox {name} already exists.")
+        self.instances[name] = blackbox
+
+        for n in blackbox.inputs():
+            self.add_node(f"{name}.{n}", "bb_input")
+        for n in blackbox.outputs():
+            self.add_node(f"{name}.{n}", "bb_output")
+
+        if connections:
+            for bb_n, n in connections.items():
+                bb_n = str(bb_n)
+                if bb_n in blackbox.inputs():
+                    self.add_node(f"{name}.{bb_n}", "bb_input", fanin=n)
+                elif bb_n in blackbox.outputs():
+                    self.fanin.setdefault(str(n), []).append(f"{name}.{bb_n}")
+                    if str(n) not in self.types:
+                        self.types[str(n)] = "buf"
+                else:
+                    raise ValueError(f"node {bb_n} not defined for blackbox {name}")
 
     def check_for_warnings(self):
-        for wire in self.wires:
-            if wire not in self.c.nodes():
-                self.warn(f"{wire} declared as wire but isn't connected.")
-
-        for n in self.c.nodes():
-            if (
-                self.c.type(n) != "bb_input"
-                and not self.c.is_output(n)
-                and not self.c.fanout(n)
-            ):
-                self.warn(f"{n} doesn't drive any nets.")
-            elif self.c.type(n) not in [
-                "input",
-                "0",
-                "1",
-                "bb_output",
-            ] and not self.c.fanin(n):
-                self.warn(f"{n} doesn't have any drivers.")
+        _check_for_warnings(self.c, self.wires, self.error_on_warning)
 
     # 1. Source text
     def start(self, description):
@@ -179,17 +260,22 @@ class _VerilogCircuitGraphTransformer(Transformer):
                 self.text,
             )
 
-        # Relabel outputs using drivers
+        # Build the graph and check connections in one pass
+        _check_connections(self.types, self.fanin)
+        g = nx.DiGraph()
+        g.add_nodes_from(
+            (n, {"type": t, "output": False}) for n, t in self.types.items()
+        )
+        g.add_edges_from((f, n) for n, fanin in self.fanin.items() for f in fanin)
         for o in self.outputs:
-            self.c.set_output(str(o))
+            g.nodes[str(o)]["output"] = True
 
         # Remove tie_0, tie_1 if not used
-        if not self.c.fanout(self.tie_0):
-            self.c.remove(self.tie_0)
-        if not self.c.fanout(self.tie_1):
-            self.c.remove(self.tie_1)
-        if not self.c.fanout(self.tie_x):
-            self.c.remove(self.tie_x)
+        for tie in [self.tie_0, self.tie_1, self.tie_x]:
+            if not g.out_degree(tie):
+                g.remove_node(tie)
+
+        self.c = Circuit(name=self.c.name, graph=g, blackboxes=self.instances)
 
         # Check for warnings
         if self.warnings:
@@ -285,7 +371,11 @@ class _VerilogCircuitGraphTransformer(Transformer):
         [lvalue, expression] = lvalue_and_expression
         if lvalue not in [self.tie_0, self.tie_1, self.tie_x]:
             if expression in self.gate_expressions:
-                self.c.relabel({expression: str(lvalue)})
+                # rename the gate of the expression to the lvalue
+                lvalue = str(lvalue)
+                self.types[lvalue] = self.types.pop(expression)
+                fanin = self.fanin.pop(expression)
+                self.fanin.setdefault(lvalue, []).extend(fanin)
             else:
                 self.add_node(lvalue, "buf", fanin=expression)
 
@@ -344,6 +434,45 @@ class _VerilogCircuitGraphTransformer(Transformer):
         return node
 
 
+# serialized LALR tables, built once per process
+_parser_data = None
+_parser_cache = False
+
+
+def set_parser_cache(cache=True):
+    """
+    Cache the Lark parser tables on disk.
+
+    The tables are built once per process. With a disk cache, they are
+    also reused across processes, which speeds up cold starts. Changing
+    the cache rebuilds the tables on the next parse.
+
+    Parameters
+    ----------
+    cache: bool or str
+            If True, the tables are cached in a temporary directory. If a
+            str, the tables are cached in that file. If False, the tables
+            are not cached on disk.
+
+    """
+    global _parser_cache, _parser_data
+    _parser_cache = cache
+    _parser_data = None
+
+
+def _parser(transformer):
+    """Create a parser that applies a transformer, reusing cached tables."""
+    # Lark.load cannot attach a transformer, so the serialization internals
+    # are used directly. setup.py pins lark to versions that provide them.
+    global _parser_data
+    if _parser_data is None:
+        with open(Path(__file__).parent.absolute() / "verilog.lark") as f:
+            parser = Lark(f, parser="lalr", cache=_parser_cache)
+        data, memo = parser.memo_serialize([TerminalDef, Rule])
+        _parser_data = (data, memo)
+    return Lark._load_from_dict(*_parser_data, transformer=transformer)
+
+
 def parse_verilog_netlist(netlist, blackboxes, warnings=False, error_on_warning=False):
     """
     Parse a verilog netlist into a Circuit.
@@ -369,7 +498,5 @@ def parse_verilog_netlist(netlist, blackboxes, warnings=False, error_on_warning=
     transformer = _VerilogCircuitGraphTransformer(
         netlist, blackboxes, warnings, error_on_warning
     )
-    with open(Path(__file__).parent.absolute() / "verilog.lark") as f:
-        parser = Lark(f, parser="lalr", transformer=transformer)
-    [c] = parser.parse(netlist)
+    [c] = _parser(transformer).parse(netlist)
     return c
@@ -19,12 +19,90 @@ Examples
 0.25
 
 """
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import circuitgraph as cg
 
 
-def influence(c, ns, supergates=False, approx=True, log_dir=None, **kwargs):
+def _influence_miter(c, n):
+    """
+    Create a miter for the influences of the startpoints of `n`.
+
+    The second copy of the fanin cone of `n` has each startpoint xored with
+    a new flip input, so the influence of one startpoint is counted by
+    assuming its flip input True and the rest False.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    n : str
+            Node to compute influences for.
+
+    Returns
+    -------
+    Circuit
+            Miter circuit with output 'sat'.
+    dict of str:str
+            Flip input of each startpoint.
+
+    """
+    if c.blackboxes:
+        raise ValueError("Circuit contains a blackbox")
+    subc = cg.tx.subcircuit(c, c.transitive_fanin(n) | {n})
+    for m in subc:
+        subc.set_output(m, m == n)
+    m = cg.tx.miter(subc)
+    flips = {}
+    for s in subc.startpoints():
+        flips[s] = m.add(m.uid(f"flip_{s}"), "input")
+        m.set_type(f"c1_{s}", "xor")
+        m.connect(flips[s], f"c1_{s}")
+    return m, flips
+
+
+def _count(c, assumptions, approx, log_file, kwargs):
+    if approx:
+        if log_file:
+            kwargs = {**kwargs, "log_file": log_file}
+        return cg.sat.approx_model_count(c, assumptions, **kwargs)
+    return cg.sat.model_count(c, assumptions)
+
+
+# circuit and current miter of an influence worker process
+_influence_state = {}
+
+
+def _influence_init(c, approx, kwargs):
+    _influence_state["args"] = (c, approx, kwargs)
+    _influence_state["miter"] = (None, None)
+
+
+def _influence_count(n, assumptions, log_file):
+    c, approx, kwargs = _influence_state["args"]
+    miter_n, m = _influence_state["miter"]
+    if miter_n != n:
+        # jobs are submitted one node at a time, so each miter is built once
+        m, _ = _influence_miter(c, n)
+        _influence_state["miter"] = (n, m)
+    return _count(m, assumptions, approx, log_file, kwargs)
+
+
+def influence(
+    c,
+    ns,
+    supergates=False,
+    approx=True,
+    log_dir=None,
+    bdd=False,
+    max_bdd_nodes=None,
+    workers=1,
+    **kwargs,
+):
     """
     Compute the influences at node(s).
 
@@ -40,6 +118,18 @@ def influence(c, ns, supergates=False, approx=True, log_dir=None, **kwargs):
             Compute approximate model count using approxmc.
     log_dir: str or pathlib.Path
             Directory to store approxmc logs in.
+    bdd : bool
+            Compute exact influences using BDDs. The BDDs are shared across
+            nodes. If the BDD size exceeds `max_bdd_nodes`, the computation
+            falls back to model counting. Cannot be used with `supergates`.
+    max_bdd_nodes : int
+            Maximum number of BDD nodes when using `bdd`.
+    workers : int
+            Number of processes used to count the startpoints of a node
+            concurrently. If None, the number of CPUs is used. The processes
+            are shared across nodes. Each process receives the circuit once
+            and builds the miter of each node once, and every job passes the
+            same keyword arguments, including the seed, as a serial run.
     kwargs: Keyword arguments
             Keyword arguments to pass into `approx_model_count`.
 
@@ -53,85 +143,122 @@ def influence(c, ns, supergates=False, approx=True, log_dir=None, **kwargs):
     if isinstance(ns, str):
         ns = [ns]
 
+    if bdd:
+        if supergates:
+            raise ValueError("Cannot use both 'bdd' and 'supergates'")
+        circuit_bdd = cg.bdd.CircuitBdd(c, max_bdd_nodes)
+
     if supergates:
         # Keep track of influences already computed for a given supergate
         # Mapping of supergate outputs to dict mapping inputs to influences
         sg_influences = {}
 
     all_influences = {}
-    for n in ns:
-        sp = c.startpoints(n)
-
-        if log_dir:
-            log_dir = Path(log_dir)
-            log_dir.mkdir(exist_ok=True)
-
-        def mc(circuit, startpoint, endpoints=None):
-            i = cg.tx.sensitization_transform(circuit, startpoint, endpoints)
-            if approx:
-                log_file = None
-                if log_dir:
-                    log_file = log_dir / f"{s}.approxmc.log"
-                    count = cg.sat.approx_model_count(
-                        i,
-                        {"sat": True},
-                        log_file=log_file,
-                        **kwargs,
-                    )
-                else:
-                    count = cg.sat.approx_model_count(
-                        i,
-                        {"sat": True},
-                        **kwargs,
-                    )
+    executor = None
+    try:
+        for n in ns:
+            sp = c.startpoints(n)
+
+            if bdd:
+                try:
+                    all_influences[n] = {s: circuit_bdd.influence(n, s) for s in sp}
+                    continue
+                except cg.bdd.BddBudgetExceeded:
+                    bdd = False
+
+            if log_dir:
+                log_dir = Path(log_dir)
+                log_dir.mkdir(exist_ok=True)
+
+            def mc(circuit, startpoint, endpoints=None):
+                i = cg.tx.sensitization_transform(circuit, startpoint, endpoints)
+                log_file = log_dir / f"{s}.approxmc.log" if approx and log_dir else None
+                return _count(i, {"sat": True}, approx, log_file, kwargs)
+
+            influences = {}
+
+            if supergates:
+                # Mapping of circuit inputs to the supergates they belong to
+                input_map = {}
+                c_n = cg.tx.subcircuit(c, c.transitive_fanin(n) | {n})
+                c_n.set_output(c_n.outputs(), False)
+                c_n.set_output(n)
+                supergates = cg.tx.supergates(c_n)
+                for sg in supergates:
+                    # Mapping of supergate inputs to influence on supergate output
+                    (sg_out,) = sg.outputs()
+                    if sg_out not in sg_influences:
+                        curr_influences = {}
+                        for s in sg.startpoints():
+                            input_map[s] = sg_out
+                            curr_influences[s] = mc(sg, s) / (
+                                2 ** len(sg.startpoints())
+                            )
+                        sg_influences[sg_out] = curr_influences
+                    else:
+                        for s in sg.startpoints():
+                            input_map[s] = sg_out
+
+                # Multiply influences along each path
+                for s in sp:
+                    infl = 1
+                    curr_node = s
+                    while curr_node != n:
+                        sg_out = input_map[curr_node]
+                        infl *= sg_influences[sg_out][curr_node]
+                        curr_node = sg_out
+                    influences[s] = infl
             else:
-                count = cg.sat.model_count(i, {"sat": True})
-            return count
-
-        influences = {}
-
-        if supergates:
-            # Mapping of circuit inputs to the supergates they belong to
-            input_map = {}
-            c_n = cg.tx.subcircuit(c, c.transitive_fanin(n) | {n})
-            c_n.set_output(c_n.outputs(), False)
-            c_n.set_output(n)
-            supergates = cg.tx.supergates(c_n)
-            for sg in supergates:
-                # Mapping of supergate inputs to influence on supergate output
-                (sg_out,) = sg.outputs()
-                if sg_out not in sg_influences:
-                    curr_influences = {}
-                    for s in sg.startpoints():
-                        input_map[s] = sg_out
-                        curr_influences[s] = mc(sg, s) / (2 ** len(sg.startpoints()))
-                    sg_influences[sg_out] = curr_influences
+                # create influence circuit once and flip one startpoint per job
+                m, flips = _influence_miter(c, n)
+                jobs = {
+                    s: {"sat": True, **{f: t == s for t, f in flips.items()}}
+                    for s in sp
+                }
+                log_files = {
+                    s: log_dir / f"{s}.approxmc.log" if approx and log_dir else None
+                    for s in sp
+                }
+                if workers == 1:
+                    counts = {
+                        s: _count(m, jobs[s], approx, log_files[s], kwargs) for s in sp
+                    }
                 else:
-                    for s in sg.startpoints():
-                        input_map[s] = sg_out
-
-            # Multiply influences along each path
-            for s in sp:
-                infl = 1
-                curr_node = s
-                while curr_node != n:
-                    sg_out = input_map[curr_node]
-                    infl *= sg_influences[sg_out][curr_node]
-                    curr_node = sg_out
-                influences[s] = infl
-        else:
-            for s in sp:
-                # create influence circuit
-                influences[s] = mc(c, s, n) / (2 ** len(sp))
-
-        all_influences[n] = influences
+                    if executor is None:
+                        executor = ProcessPoolExecutor(
+                            max_workers=workers,
+                            initializer=_influence_init,
+                            initargs=(c, approx, kwargs),
+                        )
+                    futures = {
+                        s: executor.submit(_influence_count, n, jobs[s], log_files[s])
+                        for s in sp
+                    }
+                    counts = {s: future.result() for s, future in futures.items()}
+                for s in sp:
+                    influences[s] = counts[s] / (2 ** len(sp))
+
+            all_influences[n] = influences
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     if len(all_influences) == 1:
         (all_influences,) = all_influences.values()
     return all_influences
 
 
-def avg_sensitivity(c, ns, supergates=False, approx=True, log_dir=None, **kwargs):
+def avg_sensitivity(
+    c,
+    ns,
+    supergates=False,
+    approx=True,
+    log_dir=None,
+    bdd=False,
+    max_bdd_nodes=None,
+    workers=1,
+    **kwargs,
+):
     """
     Calculate the average sensitivity node(s) `ns`.
 
@@ -150,6 +277,12 @@ def avg_sensitivity(c, ns, supergates=False, approx=True, log_dir=None, **kwargs
             Compute approximate model count using approxmc.
     log_dir: str or pathlib.Path
             Directory to store approxmc logs in.
+    bdd : bool
+            Compute exact influences using BDDs. See `influence`.
+    max_bdd_nodes : int
+            Maximum number of BDD nodes when using `bdd`.
+    workers : int
+            Number of processes used per node. See `influence`.
     kwargs: Keyword arguments
             Keyword arguments to pass into `approx_model_count`.
 
@@ -161,7 +294,15 @@ def avg_sensitivity(c, ns, supergates=False, approx=True, log_dir=None, **kwargs
 
     """
     all_influences = influence(
-        c, ns, supergates=supergates, approx=approx, log_dir=log_dir, **kwargs
+        c,
+        ns,
+        supergates=supergates,
+        approx=approx,
+        log_dir=log_dir,
+        bdd=bdd,
+        max_bdd_nodes=max_bdd_nodes,
+        workers=workers,
+        **kwargs,
     )
 
     if isinstance(ns, str):
@@ -173,35 +314,97 @@ def avg_sensitivity(c, ns, supergates=False, approx=True, log_dir=None, **kwargs
     return total_influences
 
 
-def sensitivity(c, n):
+def sensitivity(c, n, timeout=None, solver_cls=None, solver_args=None):
     """
     Calculate the sensitivity of node `n` with respect to its startpoints.
 
+    The sensitivity is found by a binary search on a single incremental
+    solver. Each satisfying assignment raises the lower bound to its number
+    of sensitive startpoints, and each unsatisfiable query lowers the upper
+    bound.
+
     Parameters
     ----------
     c: Circuit
             Circuit to compute sensitivity for
     n : str
             Node to compute sensitivity for.
+    timeout : float
+            Maximum number of seconds to search for. Queries are interrupted
+            when the time runs out, which requires a solver that supports
+            interruption. If `solver_cls` is None, `Glucose4` is used.
+    solver_cls : pysat.Solver
+            The class of solver to use. If None, `Cadical` is used.
+    solver_args : dict of str:Any
+            Arguments to pass into the solver constructor.
 
     Returns
     -------
-    int
-            Sensitivity of node n.
+    int or tuple of int
+            Sensitivity of node n. If the timeout was exceeded, the lower
+            and upper bounds found so far.
 
     """
     sp = c.startpoints(n)
     if n in sp:
         return 1
 
-    sen = len(sp)
-    s = cg.tx.sensitivity_transform(c, n)
-    vs = cg.utils.int_to_bin(sen, cg.utils.clog2(len(sp)), True)
-    while not cg.sat.solve(s, {f"sen_out_{i}": v for i, v in enumerate(vs)}):
-        sen -= 1
-        vs = cg.utils.int_to_bin(sen, cg.utils.clog2(len(sp)), True)
+    start = time.monotonic()
+    if timeout is not None and solver_cls is None:
+        try:
+            from pysat.solvers import Glucose4
+        except ImportError as e:
+            raise ImportError(
+                "Install 'python-sat' to use satisfiability functionality"
+            ) from e
+        solver_cls = Glucose4
+        solver_args = {"incr": True, **(solver_args or {})}
+
+    def remaining():
+        if timeout is None:
+            return None
+        return max(timeout - (time.monotonic() - start), 0)
+
+    s = cg.tx.sensitivity_transform(c, n, share_logic=True, popcount=False)
+    difs = [f"dif_out_{i}" for i in sp]
+    lb, ub = 0, len(difs)
+    with cg.sat.Session(s, solver_cls, solver_args) as session:
+        result = None
+        if remaining() != 0:
+            result = session.solve(ns=difs, time_limit=remaining())
+        if result is None:
+            return lb, ub
+        lb = sum(result.values())
+        if lb == ub:
+            return lb
+
+        # constrain the number of insensitive startpoints
+        from pysat.card import ITotalizer
+
+        variables = session.variables
+        tot = ITotalizer(
+            lits=[-variables.id(d) for d in difs],
+            ubound=len(difs),
+            top_id=variables.top,
+        )
+        variables.occupy(variables.top + 1, tot.top_id)
+        session.solver.append_formula(tot.cnf.clauses)
+
+        while lb < ub:
+            k = (lb + ub + 1) // 2
+            if remaining() == 0:
+                return lb, ub
+            result = session.solve(
+                ns=difs, literals=[-tot.rhs[len(difs) - k]], time_limit=remaining()
+            )
+            if result is None:
+                return lb, ub
+            if result:
+                lb = sum(result.values())
+            else:
+                ub = k - 1
 
-    return sen
+    return lb
 
 
 def sensitize(c, n, assumptions=None):
@@ -230,13 +433,14 @@ def sensitize(c, n, assumptions=None):
         assumptions = {}
 
     # find a sensitizing input
-    result = cg.sat.solve(s, {"sat": True, **assumptions})
+    with cg.sat.Session(s) as session:
+        result = session.solve({"sat": True, **assumptions}, ns=s.startpoints())
     if not result:
         return None
-    return {g: result[g] for g in s.startpoints()}
+    return result
 
 
-def signal_probability(c, n, approx=True, **kwargs):
+def signal_probability(c, n, approx=True, bdd=False, max_bdd_nodes=None, **kwargs):
     """
     Determine the (approximate) probability of node `n` being true.
 
@@ -250,6 +454,12 @@ def signal_probability(c, n, approx=True, **kwargs):
             Use approximate model counting through approxmc.
             This is the default behavior, and turned it off
             can make computation time prohibitively expensive.
+    bdd : bool
+            Compute the exact probability using a BDD. If the BDD size
+            exceeds `max_bdd_nodes`, the computation falls back to model
+            counting.
+    max_bdd_nodes : int
+            Maximum number of BDD nodes when using `bdd`.
     kwargs: Keyword arguments
             Keyword arguments to pass into `approx_model_count`.
 
@@ -259,6 +469,12 @@ def signal_probability(c, n, approx=True, **kwargs):
             Probability.
 
     """
+    if bdd:
+        try:
+            return cg.bdd.signal_probability(c, n, max_bdd_nodes)
+        except cg.bdd.BddBudgetExceeded:
+            pass
+
     # get subcircuit ending at node
     subc = cg.tx.subcircuit(c, {n} | c.transitive_fanin(n))
 
@@ -271,6 +487,97 @@ def signal_probability(c, n, approx=True, **kwargs):
     return count / (2 ** len(subc.startpoints()))
 
 
+def _z_score(confidence):
+    """Find the two-sided standard normal critical value for a confidence."""
+    if not 0 < confidence < 1:
+        raise ValueError(f"confidence must be between 0 and 1, not {confidence}")
+    lo, hi = 0.0, 40.0
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if math.erf(mid / math.sqrt(2)) < confidence:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+# number of patterns simulated at once by signal_probabilities
+_chunk_width = 4096
+
+
+def signal_probabilities(c, samples=10000, confidence=0.95, bias=None, seed=None):
+    """
+    Estimate the probability of every node being true using simulation.
+
+    All nodes are estimated at once from random patterns evaluated with
+    bit-parallel simulation. Patterns are simulated in chunks of 4096, so
+    memory does not grow with the number of samples.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    samples : int
+            Number of random patterns to simulate.
+    confidence : float
+            Confidence level of the returned error bounds.
+    bias : dict of str:float
+            Probability of each startpoint being true. Startpoints that are not
+            present are true with probability 0.5.
+    seed : int
+            Seed for the random pattern generator.
+
+    Returns
+    -------
+    dict of str:(float, float)
+            Mapping of nodes to their estimated probability and the error
+            bound around it, which is the largest distance from the estimate
+            to the bounds of the Wilson score interval. The bound is nonzero
+            even if a node is always or never true in the samples.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.Circuit()
+    >>> c.add("i0", "input")
+    'i0'
+    >>> c.add("i1", "input")
+    'i1'
+    >>> c.add("g0", "and", fanin=["i0", "i1"])
+    'g0'
+    >>> probs = cg.props.signal_probabilities(c, samples=100000, seed=0)
+    >>> p, err = probs["g0"]
+    >>> abs(p - 0.25) < err
+    True
+
+    """
+    if samples < 1:
+        raise ValueError(f"samples must be >= 1, not {samples}")
+    z = _z_score(confidence)
+
+    rng = random.Random(seed)
+    evaluate = cg.sim.compile_circuit(c)
+    counts = dict.fromkeys(evaluate.nodes, 0)
+    for start in range(0, samples, _chunk_width):
+        width = min(_chunk_width, samples - start)
+        patterns = cg.sim.random_patterns(c, width, seed=rng.getrandbits(64), bias=bias)
+        for n, v in evaluate(patterns, width).items():
+            counts[n] += bin(v).count("1")
+
+    probabilities = {}
+    for n, count in counts.items():
+        p = count / samples
+        # Wilson score interval
+        scale = 1 + z**2 / samples
+        center = (p + z**2 / (2 * samples)) / scale
+        half_width = (
+            z * math.sqrt(p * (1 - p) / samples + z**2 / (4 * samples**2)) / scale
+        )
+        err = max(p - (center - half_width), center + half_width - p)
+        probabilities[n] = (p, err)
+    return probabilities
+
+
 def levelize(c):
     """
     Levelize a circuit.
@@ -286,13 +593,60 @@ def levelize(c):
     -------
     dict of str:int
             Mapping of gate names to levels.
+
+    """
+    return c.levels()
+
+
+def depths(c, direction="fanin", maximum=True):
+    """
+    Compute the combinational depth of every node.
+
+    This is equivalent to calling `Circuit.fanin_depth` or
+    `Circuit.fanout_depth` on each node, but takes a single pass over the
+    circuit in topological order.
+
+    Parameters
+    ----------
+    c: Circuit
+            Input circuit.
+    direction: str
+            Either "fanin", to find the length of paths from nodes without
+            fanin, or "fanout", to find the length of paths to nodes without
+            fanout.
+    maximum: bool
+            If True, the maximum depth will be found. If False, the minimum
+            depth will be found.
+
+    Returns
+    -------
+    dict of str:int
+            Mapping of nodes to depths.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.from_lib("c17")
+    >>> d = cg.props.depths(c)
+    >>> all(d[n] == c.fanin_depth(n) for n in c)
+    True
+
     """
     if c.is_cyclic():
-        raise ValueError("Cannot levelize cyclic circuit")
-
-    levels = {n: 0 for n in c.inputs() | c.filter_type(("0", "1", "x"))}
-    for n in c.topo_sort():
-        if n in levels:
-            continue
-        levels[n] = max(levels[fi] for fi in c.fanin(n)) + 1
-    return levels
+        raise ValueError("Cannot compute depth of cyclic circuit")
+
+    if direction == "fanin":
+        adjacent = c.fanin
+        order = list(c.topo_sort())
+    elif direction == "fanout":
+        adjacent = c.fanout
+        order = list(c.topo_sort())[::-1]
+    else:
+        raise ValueError(f"Unknown direction '{direction}'")
+    select = max if maximum else min
+
+    node_depths = {}
+    for n in order:
+        adjacent_depths = [node_depths[a] for a in adjacent(n)]
+        node_depths[n] = select(adjacent_depths) + 1 if adjacent_depths else 0
+    return node_depths
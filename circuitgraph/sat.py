@@ -26,10 +26,15 @@ Setup a miter circuit
 False
 
 """
+import random
 import re
 import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain
+from pathlib import Path
 
 
 def add_assumptions(formula, variables, assumptions):
@@ -47,7 +52,25 @@ def remap(clauses, offset):
     return new_clauses
 
 
-def construct_solver(c, assumptions=None, solver_cls=None, solver_args=None):
+def _default_solver_cls():
+    try:
+        from pysat.solvers import Cadical153
+
+        return Cadical153
+    except ImportError:
+        try:
+            from pysat.solvers import Cadical
+
+            return Cadical
+        except ImportError as e:
+            raise ImportError(
+                "Install 'python-sat' to use satisfiability functionality"
+            ) from e
+
+
+def construct_solver(
+    c, assumptions=None, solver_cls=None, solver_args=None, native_xor=False
+):
     """
     Construct a SAT solver instance with the given circuit and assumptions.
 
@@ -63,6 +86,10 @@ def construct_solver(c, assumptions=None, solver_cls=None, solver_args=None):
             Arguments to pass into the solver constructor. For `Glucose`
             solvers, this should include `'incr': True` to set incremental
             mode.
+    native_xor : bool
+            If True, parity gates are added as xor constraints instead of
+            clauses. This requires a solver that supports them, such as
+            `CryptoMinisat`.
 
     Returns
     -------
@@ -73,41 +100,341 @@ def construct_solver(c, assumptions=None, solver_cls=None, solver_args=None):
 
     """
     if not solver_cls:
-        try:
-            from pysat.solvers import Cadical153
+        solver_cls = _default_solver_cls()
 
-            solver_cls = Cadical153
-        except ImportError:
-            try:
-                from pysat.solvers import Cadical
-
-                solver_cls = Cadical
-            except ImportError as e:
-                raise ImportError(
-                    "Install 'python-sat' to use satisfiability functionality"
-                ) from e
-
-    formula, variables = cnf(c)
     if assumptions:
         for n in assumptions.keys():
             if n not in c:
                 raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+
+    CNF, _ = _import_pysat_formula()
+    e = encoder(c)
+    variables = e.variables
+    nodes = e.encode()
+    xors = []
+    if native_xor:
+        for n in c.filter_type(["xor", "xnor"]):
+            xor = e.xor(n)
+            if xor is not None:
+                xors.append(xor)
+                nodes.discard(n)
+    formula = CNF()
+    formula.extend(e.clauses(nodes))
+    if assumptions:
         add_assumptions(formula, variables, assumptions)
 
     if not solver_args:
         solver_args = {}
     solver = solver_cls(bootstrap_with=formula, **solver_args)
+    for lits, parity in xors:
+        solver.add_xor_clause(lits, parity)
     return solver, variables
 
 
-def cnf(c):
+def _import_pysat_formula():
+    try:
+        from pysat.formula import CNF, IDPool
+    except ImportError as e:
+        raise ImportError(
+            "Install 'python-sat' to use satisfiability functionality"
+        ) from e
+    return CNF, IDPool
+
+
+def _xor_constraint(t, n, fanin, variables):
+    """
+    Encode a parity gate as an xor constraint.
+
+    Parameters
+    ----------
+    t : str
+            Gate type, either 'xor' or 'xnor'.
+    n : str
+            Gate name.
+    fanin : iterable of str
+            Gate fanin.
+    variables : pysat.IDPool
+            Formula variable mapping.
+
+    Returns
+    -------
+    list of int
+            Literals of the gate and its fanin.
+    bool
+            Parity of the literals.
+
+    """
+    return [variables.id(n)] + [variables.id(f) for f in fanin], t == "xnor"
+
+
+def _gate_clauses(t, n, fanin, variables):
+    """
+    Encode a gate using the Tseitin transformation.
+
+    Parameters
+    ----------
+    t : str
+            Gate type.
+    n : str
+            Gate name.
+    fanin : list of str
+            Gate fanin.
+    variables : pysat.IDPool
+            Formula variable mapping.
+
+    Returns
+    -------
+    list of list of int
+            Clauses.
+
+    """
+    clauses = []
+    if t in ["and", "or", "xor"] and len(fanin) == 1:
+        t = "buf"
+    elif t in ["nand", "nor", "xnor"] and len(fanin) == 1:
+        t = "not"
+
+    v = variables.id(n)
+    fs = [variables.id(f) for f in fanin]
+    if t == "and":
+        for f in fs:
+            clauses.append([-v, f])
+        clauses.append([v] + [-f for f in fs])
+    elif t == "nand":
+        for f in fs:
+            clauses.append([v, f])
+        clauses.append([-v] + [-f for f in fs])
+    elif t == "or":
+        for f in fs:
+            clauses.append([v, -f])
+        clauses.append([-v] + fs)
+    elif t == "nor":
+        for f in fs:
+            clauses.append([-v, -f])
+        clauses.append([v] + fs)
+    elif t == "not":
+        if fs:
+            clauses.append([v, fs[0]])
+            clauses.append([-v, -fs[0]])
+    elif t in ["buf", "bb_input"]:
+        if fs:
+            clauses.append([v, -fs[0]])
+            clauses.append([-v, fs[0]])
+    elif t in ["xor", "xnor"]:
+        # constrain literal c to a xor b
+        def xor_clauses(a, b, c):
+            clauses.append([-c, -b, -a])
+            clauses.append([-c, b, a])
+            clauses.append([c, -b, a])
+            clauses.append([c, b, -a])
+
+        # reduce pairs level by level into a balanced tree of 2-input xors
+        nets = fs
+        i = 0
+        while len(nets) > 2:
+            next_nets = []
+            for j in range(0, len(nets) - 1, 2):
+                aux = variables.id((n, i))
+                i += 1
+                xor_clauses(nets[j], nets[j + 1], aux)
+                next_nets.append(aux)
+            if len(nets) % 2:
+                next_nets.append(nets[-1])
+            nets = next_nets
+        if len(nets) == 2:
+            xor_clauses(nets[0], nets[1], v if t == "xor" else -v)
+    elif t == "0":
+        clauses.append([-v])
+    elif t == "1":
+        clauses.append([v])
+    elif t in ["bb_output", "input"]:
+        clauses.append([v, -v])
+    else:
+        raise ValueError(f"Unknown gate type '{t}'")
+    return clauses
+
+
+class Encoder:
+    """
+    Incremental CNF encoder bound to a circuit.
+
+    Clauses are cached per node along with the node's type and fanin.
+    Encoding a set of nodes only encodes their transitive fanin, and nodes
+    are only re-encoded if their type or fanin changed since they were last
+    encoded. Variable ids are stable across encodings.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.from_lib("c17")
+    >>> encoder = cg.sat.Encoder(c)
+    >>> formula = encoder.cnf("N22")
+    >>> len(formula.clauses) < len(encoder.cnf().clauses)
+    True
+
+    """
+
+    def __init__(self, c):
+        """
+        Create a new `Encoder`.
+
+        Parameters
+        ----------
+        c : Circuit
+                Circuit to encode.
+
+        """
+        _, IDPool = _import_pysat_formula()
+        self.c = c
+        self.variables = IDPool()
+        # node -> (type, fanin, clauses)
+        self._nodes = {}
+        # nodes checked since the circuit was last modified
+        self._checked = set()
+        self._version = None
+
+    def _cone(self, ns):
+        if ns is None:
+            return self.c.nodes()
+        if isinstance(ns, str):
+            ns = [ns]
+        for n in ns:
+            if n not in self.c:
+                raise ValueError(f"Node '{n}' is not in circuit")
+        return set(ns) | self.c.transitive_fanin(ns)
+
+    def encode(self, ns=None):
+        """
+        Bring the cached clauses of nodes up to date.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Nodes whose transitive fanin is encoded. If None, the whole
+                circuit is encoded.
+
+        Returns
+        -------
+        set of str
+                Encoded nodes.
+
+        """
+        # circuits track modifications, so unchanged nodes need no checks
+        version = getattr(self.c, "_version", None)
+        if version is None or version != self._version:
+            self._checked = set()
+            self._version = version
+
+        cone = self._cone(ns)
+        for n in cone - self._checked:
+            t = self.c.type(n)
+            fanin = self.c.fanin(n)
+            cached = self._nodes.get(n)
+            if cached is None or cached[0] != t or cached[1] != fanin:
+                clauses = _gate_clauses(t, n, list(fanin), self.variables)
+                self._nodes[n] = (t, fanin, clauses)
+            if version is not None:
+                self._checked.add(n)
+        return cone
+
+    def xor(self, n):
+        """
+        Return an encoded parity gate as an xor constraint.
+
+        Parameters
+        ----------
+        n : str
+                Encoded node.
+
+        Returns
+        -------
+        None or (list of int, bool)
+                Literals of the gate and its fanin and their parity, or None
+                if the node is not a parity gate.
+
+        """
+        t, fanin, _ = self._nodes[n]
+        if t not in ["xor", "xnor"] or not fanin:
+            return None
+        return _xor_constraint(t, n, fanin, self.variables)
+
+    def clauses(self, ns):
+        """
+        Return the cached clauses of nodes.
+
+        Parameters
+        ----------
+        ns : iterable of str
+                Encoded nodes.
+
+        Returns
+        -------
+        generator of list of int
+                Clauses.
+
+        """
+        for n in ns:
+            yield from self._nodes[n][2]
+
+    def cnf(self, ns=None):
+        """
+        Encode nodes into a CNF formula.
+
+        Parameters
+        ----------
+        ns : str or iterable of str
+                Nodes whose transitive fanin is encoded. If None, the whole
+                circuit is encoded.
+
+        Returns
+        -------
+        pysat.CNF
+                CNF formula.
+
+        """
+        CNF, _ = _import_pysat_formula()
+        formula = CNF()
+        formula.extend(self.clauses(self.encode(ns)))
+        return formula
+
+
+def encoder(c):
+    """
+    Return the cached `Encoder` of a circuit.
+
+    The encoder is stored on the circuit, so it is freed along with it.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to encode.
+
+    Returns
+    -------
+    Encoder
+            Encoder bound to the circuit.
+
+    """
+    try:
+        return c._encoder
+    except AttributeError:
+        c._encoder = Encoder(c)
+        return c._encoder
+
+
+def cnf(c, ns=None):
     """
     Convert circuit to CNF using the Tseitin transformation.
 
+    Clauses are cached by the circuit's `Encoder`, so converting the same
+    circuit again only re-encodes nodes that changed.
+
     Parameters
     ----------
     c : Circuit
             Circuit to transform.
+    ns : str or iterable of str
+            If given, only the transitive fanin of these nodes is encoded.
 
     Returns
     -------
@@ -117,93 +444,168 @@ def cnf(c):
             CNF formula.
 
     """
-    try:
-        from pysat.formula import CNF, IDPool
-    except ImportError as e:
-        raise ImportError(
-            "Install 'python-sat' to use satisfiability functionality"
-        ) from e
-    variables = IDPool()
-    formula = CNF()
+    e = encoder(c)
+    return e.cnf(ns), e.variables
 
-    for n in c.nodes():
-        variables.id(n)
-        n_type = c.type(n)
-        if n_type in ["and", "or", "xor"] and len(c.fanin(n)) == 1:
-            n_type = "buf"
-        elif n_type in ["nand", "nor", "xnor"] and len(c.fanin(n)) == 1:
-            n_type = "not"
-
-        if n_type == "and":
-            for f in c.fanin(n):
-                formula.append([-variables.id(n), variables.id(f)])
-            formula.append([variables.id(n)] + [-variables.id(f) for f in c.fanin(n)])
-        elif n_type == "nand":
-            for f in c.fanin(n):
-                formula.append([variables.id(n), variables.id(f)])
-            formula.append([-variables.id(n)] + [-variables.id(f) for f in c.fanin(n)])
-        elif n_type == "or":
-            for f in c.fanin(n):
-                formula.append([variables.id(n), -variables.id(f)])
-            formula.append([-variables.id(n)] + [variables.id(f) for f in c.fanin(n)])
-        elif n_type == "nor":
-            for f in c.fanin(n):
-                formula.append([-variables.id(n), -variables.id(f)])
-            formula.append([variables.id(n)] + [variables.id(f) for f in c.fanin(n)])
-        elif n_type == "not":
-            if c.fanin(n):
-                f = c.fanin(n).pop()
-                formula.append([variables.id(n), variables.id(f)])
-                formula.append([-variables.id(n), -variables.id(f)])
-        elif n_type in ["buf", "bb_input"]:
-            if c.fanin(n):
-                f = c.fanin(n).pop()
-                formula.append([variables.id(n), -variables.id(f)])
-                formula.append([-variables.id(n), variables.id(f)])
-        elif n_type in ["xor", "xnor"]:
-            # break into hierarchical xors
-            nets = list(c.fanin(n))
-
-            # xor gen
-            def xor_clauses(a, b, c):
-                formula.append([-variables.id(c), -variables.id(b), -variables.id(a)])
-                formula.append([-variables.id(c), variables.id(b), variables.id(a)])
-                formula.append([variables.id(c), -variables.id(b), variables.id(a)])
-                formula.append([variables.id(c), variables.id(b), -variables.id(a)])
-
-            while len(nets) > 2:
-                # create new net
-                new_net = "xor_" + nets[-2] + "_" + nets[-1]
-                variables.id(new_net)
-
-                # add sub xors
-                xor_clauses(nets[-2], nets[-1], new_net)
-
-                # remove last 2 nets
-                nets = nets[:-2]
-
-                # insert before out
-                nets.insert(0, new_net)
-
-            # add final xor
-            if n_type == "xor":
-                xor_clauses(nets[-2], nets[-1], n)
-            else:
-                # invert xor
-                variables.id(f"xor_inv_{n}")
-                xor_clauses(nets[-2], nets[-1], f"xor_inv_{n}")
-                formula.append([variables.id(n), variables.id(f"xor_inv_{n}")])
-                formula.append([-variables.id(n), -variables.id(f"xor_inv_{n}")])
-        elif n_type == "0":
-            formula.append([-variables.id(n)])
-        elif n_type == "1":
-            formula.append([variables.id(n)])
-        elif n_type in ["bb_output", "input"]:
-            formula.append([variables.id(n), -variables.id(n)])
+
+def _solve_limited(solver, literals, conflicts, time_limit):
+    """Solve under assumption literals, returning None if out of budget."""
+    if conflicts is None and time_limit is None:
+        return solver.solve(assumptions=literals)
+    if conflicts is not None:
+        solver.conf_budget(conflicts)
+    timer = None
+    if time_limit is not None:
+        timer = threading.Timer(max(time_limit, 0), solver.interrupt)
+        timer.start()
+    sat = solver.solve_limited(assumptions=literals, expect_interrupt=timer is not None)
+    if timer is not None:
+        timer.cancel()
+        solver.clear_interrupt()
+    return sat
+
+
+class Session:
+    """
+    Persistent SAT solver bound to a circuit.
+
+    A session keeps one solver alive across queries. Assumptions are passed
+    to the solver as assumption literals instead of being added as clauses,
+    so clauses learned while answering one query are reused by the next.
+    Nodes are encoded lazily: each query only adds the cones it needs that
+    are not already in the solver. If the circuit is modified so that
+    already added clauses are stale, the solver is rebuilt.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.from_lib("c17")
+    >>> with cg.sat.Session(c) as session:
+    ...     session.solve({"N22": True, "N23": False}, ns=["N22"])["N22"]
+    ...     session.solve({"N22": True, "N1": False, "N3": False, "N2": False})
+    True
+    False
+
+    """
+
+    def __init__(self, c, solver_cls=None, solver_args=None, native_xor=False):
+        """
+        Create a new `Session`.
+
+        Parameters
+        ----------
+        c : Circuit
+                Circuit to solve.
+        solver_cls : pysat.Solver
+                The class of solver to use. If None, `Cadical` is used.
+        solver_args : dict of str:Any
+                Arguments to pass into the solver constructor. For `Glucose`
+                solvers, this should include `'incr': True` to set
+                incremental mode.
+        native_xor : bool
+                If True, parity gates are added as xor constraints instead
+                of clauses. This requires a solver that supports them, such
+                as `CryptoMinisat`.
+
+        """
+        if not solver_cls:
+            solver_cls = _default_solver_cls()
+        self.c = c
+        self.solver_cls = solver_cls
+        self.solver_args = solver_args if solver_args else {}
+        self.native_xor = native_xor
+        self.encoder = encoder(c)
+        self.variables = self.encoder.variables
+        self.solver = None
+        # node -> clauses added to the solver
+        self._added = {}
+
+    def __enter__(self):
+        """Enter the session."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the session."""
+        self.close()
+
+    def close(self):
+        """Delete the underlying solver."""
+        if self.solver is not None:
+            self.solver.delete()
+            self.solver = None
+        self._added = {}
+
+    def _load(self, ns):
+        cone = self.encoder.encode(ns)
+        nodes = self.encoder._nodes
+        if any(n in self._added and self._added[n] is not nodes[n][2] for n in cone):
+            self.close()
+        if self.solver is None:
+            self.solver = self.solver_cls(**self.solver_args)
+        for n in cone:
+            if n not in self._added:
+                clauses = nodes[n][2]
+                xor = self.encoder.xor(n) if self.native_xor else None
+                if xor is None:
+                    self.solver.append_formula(clauses)
+                else:
+                    self.solver.add_xor_clause(*xor)
+                self._added[n] = clauses
+
+    def solve(
+        self, assumptions=None, ns=None, literals=None, conflicts=None, time_limit=None
+    ):
+        """
+        Try to find satisfying assignment with optional assumptions.
+
+        Parameters
+        ----------
+        assumptions : dict of str:bool
+                Nodes to assume True or False.
+        ns : iterable of str
+                Nodes to return the values of. Only these nodes and the
+                assumptions, along with their transitive fanin, are encoded.
+                If None, all nodes are encoded and returned.
+        literals : list of int
+                Additional solver literals to assume, such as outputs of
+                constraints added directly to `solver`.
+        conflicts : int
+                Maximum number of conflicts.
+        time_limit : float
+                Maximum number of seconds. This requires a solver that
+                supports interruption, such as `Glucose4`.
+
+        Returns
+        -------
+        False or None or dict of str:bool
+                Result. None if the budget was exceeded.
+
+        """
+        if not assumptions:
+            assumptions = {}
+        for n in assumptions:
+            if n not in self.c:
+                raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+        if ns is None:
+            ns = self.c.nodes()
+            self._load(None)
         else:
-            raise ValueError(f"Unknown gate type '{n_type}'")
+            if isinstance(ns, str):
+                ns = [ns]
+            ns = set(ns)
+            self._load(ns | assumptions.keys())
 
-    return formula, variables
+        literals = [
+            self.variables.id(n) if v else -self.variables.id(n)
+            for n, v in assumptions.items()
+        ] + list(literals or [])
+        sat = _solve_limited(self.solver, literals, conflicts, time_limit)
+        if sat is None:
+            return None
+        if sat:
+            model = self.solver.get_model()
+            return {n: model[self.variables.id(n) - 1] > 0 for n in ns}
+        return False
 
 
 def solve(c, assumptions=None):
@@ -237,6 +639,470 @@ def solve(c, assumptions=None):
     return False
 
 
+# solver state of batch worker processes
+_batch_state = {}
+
+
+def _batch_init(solver_cls, solver_args, clauses, outputs, state=_batch_state):
+    state["solver"] = solver_cls(bootstrap_with=clauses, **solver_args)
+    state["outputs"] = outputs
+
+
+def _batch_solve(literals, conflicts, time_limit, state=_batch_state):
+    solver = state["solver"]
+    sat = _solve_limited(solver, literals, conflicts, time_limit)
+    if sat is None:
+        return None
+    if not sat:
+        return False
+    model = solver.get_model()
+    return {n: model[v - 1] > 0 for n, v in state["outputs"]}
+
+
+def solve_batch(
+    c,
+    assumption_list,
+    ns=None,
+    workers=None,
+    conflicts=None,
+    time_limit=None,
+    solver_cls=None,
+    solver_args=None,
+):
+    """
+    Solve a circuit under many sets of assumptions.
+
+    The circuit is encoded once and the formula is sent to each worker
+    process once. Each worker keeps its solver across queries, and results
+    are yielded as they complete, so they may arrive out of order.
+
+    Parameters
+    ----------
+    c : Circuit
+            Input circuit.
+    assumption_list : iterable of dict of str:bool
+            Sets of nodes to assume True or False.
+    ns : iterable of str
+            Nodes to return the values of. Only these nodes and the
+            assumptions, along with their transitive fanin, are encoded. If
+            None, all nodes are encoded and returned.
+    workers : int
+            Number of worker processes. If None, the number of CPUs is used.
+            If 1, queries are solved in the current process.
+    conflicts : int
+            Maximum number of conflicts per query.
+    time_limit : float
+            Maximum number of seconds per query. This requires a solver that
+            supports interruption, such as `Glucose4`.
+    solver_cls : pysat.Solver
+            The class of solver to use. If None, `Cadical` is used.
+    solver_args : dict of str:Any
+            Arguments to pass into the solver constructor.
+
+    Returns
+    -------
+    generator of (int, False or None or dict of str:bool)
+            Index of each set of assumptions and its result. The result is
+            None if the budget was exceeded.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.from_lib("c17")
+    >>> queries = [{"N22": True, "N1": v, "N3": v, "N2": v} for v in [0, 1]]
+    >>> sorted(
+    ...     (i, result is not False)
+    ...     for i, result in cg.sat.solve_batch(c, queries, ns=[], workers=1)
+    ... )
+    [(0, False), (1, True)]
+
+    """
+    if not solver_cls:
+        solver_cls = _default_solver_cls()
+    if not solver_args:
+        solver_args = {}
+    assumption_list = list(assumption_list)
+
+    keys = set()
+    for assumptions in assumption_list:
+        for n in assumptions:
+            if n not in c:
+                raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+        keys.update(assumptions)
+
+    e = encoder(c)
+    if ns is None:
+        ns = c.nodes()
+        cone = e.encode()
+    else:
+        if isinstance(ns, str):
+            ns = [ns]
+        ns = set(ns)
+        cone = e.encode(ns | keys)
+    clauses = list(e.clauses(cone))
+    outputs = [(n, e.variables.id(n)) for n in ns]
+    queries = [
+        [e.variables.id(n) if v else -e.variables.id(n) for n, v in a.items()]
+        for a in assumption_list
+    ]
+
+    if workers == 1:
+        state = {}
+        _batch_init(solver_cls, solver_args, clauses, outputs, state)
+        try:
+            for i, literals in enumerate(queries):
+                yield i, _batch_solve(literals, conflicts, time_limit, state)
+        finally:
+            state["solver"].delete()
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_batch_init,
+        initargs=(solver_cls, solver_args, clauses, outputs),
+    ) as executor:
+        futures = {
+            executor.submit(_batch_solve, literals, conflicts, time_limit): i
+            for i, literals in enumerate(queries)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+class _LiteralPool:
+    """Variable mapping for encoding gates directly over literals."""
+
+    def __init__(self):
+        self.top = 0
+
+    def new(self):
+        self.top += 1
+        return self.top
+
+    def id(self, obj):
+        return obj if isinstance(obj, int) else self.new()
+
+
+def _strash_key(t, lits):
+    """
+    Normalize a gate over literals for structural hashing.
+
+    Returns
+    -------
+    tuple or None
+            Key of the and/xor gate implementing the node, or None if the
+            node is a literal itself.
+    bool
+            Whether the node is the complement of the key or literal.
+
+    """
+    if t in ["buf", "not"] or (len(lits) == 1 and t != "x"):
+        return None, t in ["not", "nand", "nor", "xnor"]
+    if t in ["and", "nand"]:
+        return ("and",) + tuple(sorted(lits)), t == "nand"
+    if t in ["or", "nor"]:
+        return ("and",) + tuple(sorted(-lit for lit in lits)), t == "or"
+    if t in ["xor", "xnor"]:
+        negated = sum(lit < 0 for lit in lits) % 2 == 1
+        return ("xor",) + tuple(sorted(abs(lit) for lit in lits)), negated != (
+            t == "xnor"
+        )
+    raise ValueError(f"Unknown gate type '{t}'")
+
+
+def _lowest_bit(value):
+    return (value & -value).bit_length() - 1
+
+
+def check_equivalence(
+    c0,
+    c1,
+    startpoints=None,
+    endpoints=None,
+    patterns=256,
+    conflicts=1000,
+    seed=None,
+):
+    """
+    Check if two circuits are equivalent using SAT sweeping.
+
+    The circuits are mitered and processed in topological order. Each node
+    is first merged with a structurally identical node, if one exists.
+    Otherwise, random bit-parallel simulation gives candidate nodes with
+    the same (or complemented) function, and a candidate is merged once an
+    incremental solver proves the two equivalent. Merged nodes share a
+    solver variable, so the logic after them becomes structurally identical
+    as well. Counterexamples to candidate pairs are simulated in batches to
+    refine the candidates. Finally, the miter output is checked.
+
+    Parameters
+    ----------
+    c0 : Circuit
+            First circuit.
+    c1 : Circuit
+            Second circuit.
+    startpoints : set of str
+            Nodes to be tied together, must exist in both circuits.
+    endpoints : set of str
+            Nodes to be compared, must exist in both circuits.
+    patterns : int
+            Number of random patterns to simulate.
+    conflicts : int
+            Maximum number of conflicts when proving a candidate pair. If
+            None, proofs are not limited. The final check is never limited.
+    seed : int
+            Seed for the random patterns.
+
+    Returns
+    -------
+    bool
+            True if the circuits are equivalent.
+    None or dict of str:bool
+            Startpoint values of the miter that distinguish the circuits, or
+            None if they are equivalent.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c0 = cg.from_lib("c17")
+    >>> c1 = c0.copy()
+    >>> cg.sat.check_equivalence(c0, c1)
+    (True, None)
+    >>> c1.set_type("N22", "and")
+    >>> equivalent, cex = cg.sat.check_equivalence(c0, c1)
+    >>> equivalent
+    False
+    >>> cg.sat.solve(c0, cex)["N22"] != cg.sat.solve(c1, cex)["N22"]
+    True
+
+    """
+    # import here to avoid circular import
+    import circuitgraph as cg
+
+    m = cg.tx.miter(c0, c1, startpoints, endpoints)
+    if m.is_cyclic():
+        raise ValueError("Cannot check equivalence of cyclic circuits")
+    order = list(m.topo_sort())
+    inputs = sorted(cg.sim.sim_inputs(m))
+    compiled = cg.sim.compile_circuit(m)
+
+    width = patterns
+    mask = (1 << width) - 1
+    rng = random.Random(seed)
+    sim_patterns = {n: rng.getrandbits(width) for n in inputs}
+    sigs = compiled(sim_patterns, width)
+
+    def counterexample(patterns, bit):
+        return {n: bool(patterns[n] >> bit & 1) for n in inputs}
+
+    if sigs["sat"]:
+        return False, counterexample(sim_patterns, _lowest_bit(sigs["sat"]))
+
+    solver = _default_solver_cls()()
+    pool = _LiteralPool()
+    true = pool.new()
+    solver.add_clause([true])
+
+    def normalize(n, lit):
+        sig = sigs[n] if n is not None else mask
+        if sig & 1:
+            return sig ^ mask, -lit
+        return sig, lit
+
+    lits = {}
+    strash = {}
+    classes = {}
+    pending = []
+
+    def build_classes():
+        classes.clear()
+        for n, lit in [(None, true)] + [(n, lits[n]) for n in order if n in lits]:
+            norm, nlit = normalize(n, lit)
+            members = classes.setdefault(norm, [])
+            if nlit not in members:
+                members.append(nlit)
+
+    build_classes()
+
+    def value(model, lit):
+        if abs(lit) > len(model):
+            return False
+        return (model[abs(lit) - 1] > 0) == (lit > 0)
+
+    for n in order:
+        t = m.type(n)
+        if t in ["input", "x"]:
+            lits[n] = pool.new()
+            norm, nlit = normalize(n, lits[n])
+            classes.setdefault(norm, []).append(nlit)
+            continue
+        if t in ["0", "1"]:
+            lits[n] = true if t == "1" else -true
+            continue
+
+        fanin = [lits[f] for f in m.fanin(n)]
+        key, negated = _strash_key(t, fanin)
+        if key is None:
+            lits[n] = -fanin[0] if negated else fanin[0]
+            continue
+        if key in strash:
+            lits[n] = -strash[key] if negated else strash[key]
+            continue
+
+        v = pool.new()
+        solver.append_formula(_gate_clauses(key[0], v, list(key[1:]), pool))
+        strash[key] = v
+        lits[n] = -v if negated else v
+
+        # try to merge with a candidate equivalent node
+        norm, nlit = normalize(n, lits[n])
+        members = classes.setdefault(norm, [])
+        for candidate in members:
+            results = []
+            for assumptions in [[nlit, -candidate], [-nlit, candidate]]:
+                results.append(_solve_limited(solver, assumptions, conflicts, None))
+                if results[-1]:
+                    model = solver.get_model()
+                    pending.append(
+                        {s: value(model, lits[s]) for s in inputs if s in lits}
+                    )
+                    break
+            if results == [False, False]:
+                solver.append_formula([[-nlit, candidate], [nlit, -candidate]])
+                merged = candidate if nlit == lits[n] else -candidate
+                strash[key] = -merged if negated else merged
+                lits[n] = merged
+                break
+        else:
+            members.append(nlit)
+
+        # refine candidates with the counterexamples
+        if len(pending) >= 64:
+            new_patterns = {
+                s: sum(p.get(s, False) << i for i, p in enumerate(pending))
+                for s in inputs
+            }
+            new_sigs = compiled(new_patterns, len(pending))
+            if new_sigs["sat"]:
+                return False, counterexample(new_patterns, _lowest_bit(new_sigs["sat"]))
+            for s in sigs:
+                sigs[s] = sigs[s] << len(pending) | new_sigs[s]
+            width += len(pending)
+            mask = (1 << width) - 1
+            pending = []
+            build_classes()
+
+    if lits["sat"] == -true:
+        return True, None
+    if solver.solve(assumptions=[lits["sat"]]):
+        model = solver.get_model()
+        return False, {s: value(model, lits[s]) for s in inputs}
+    return True, None
+
+
+def _write_formula(f, clauses, nv, num_clauses, xors=(), sampling_set=None):
+    """Write clauses and xor constraints to a file in buffered chunks."""
+    if sampling_set is not None:
+        f.write(f"c ind {' '.join(str(v) for v in sampling_set)} 0\n")
+    f.write(f"p cnf {nv} {num_clauses + len(xors)}\n")
+    lines = []
+    for clause in clauses:
+        lines.append(" ".join(map(str, clause)))
+        if len(lines) >= 4096:
+            lines.append("")
+            f.write(" 0\n".join(lines))
+            lines = []
+    for xor in xors:
+        lines.append("x" + " ".join(map(str, xor)))
+    if lines:
+        lines.append("")
+        f.write(" 0\n".join(lines))
+
+
+def write_dimacs(c, f, assumptions=None, sampling_set=None, use_xor_clauses=False):
+    r"""
+    Write the CNF of a circuit in DIMACS format.
+
+    Clauses are streamed from the circuit's `Encoder` to the file in
+    buffered chunks instead of being formatted as a single string.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to write.
+    f : str or file object
+            Path or open text file to write to, such as a pipe to a solver.
+    assumptions : dict of str:bool
+            Nodes to assume True or False, written as unit clauses.
+    sampling_set : iterable of str
+            Nodes to write as the sampling set, using a `c ind` line.
+    use_xor_clauses : bool
+            If True, parity gates are written as xor constraints using the
+            extended DIMACS format supported by CryptoMiniSat and approxmc.
+
+    Returns
+    -------
+    pysat.IDPool
+            Formula variable mapping.
+
+    Examples
+    --------
+    >>> import io
+    >>> import circuitgraph as cg
+    >>> c = cg.Circuit()
+    >>> c.add("i0", "input")
+    'i0'
+    >>> c.add("i1", "input")
+    'i1'
+    >>> c.add("g0", "xor", fanin=["i0", "i1"])
+    'g0'
+    >>> f = io.StringIO()
+    >>> variables = cg.sat.write_dimacs(
+    ...     c, f, {"g0": True}, c.inputs(), use_xor_clauses=True
+    ... )
+    >>> print(f.getvalue().count("\n"))
+    6
+
+    """
+    if not assumptions:
+        assumptions = {}
+    for n in assumptions:
+        if n not in c:
+            raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+
+    e = encoder(c)
+    variables = e.variables
+    nodes = e.encode()
+    xors = []
+    if use_xor_clauses:
+        for n in c.filter_type(["xor", "xnor"]):
+            xor = e.xor(n)
+            if xor is not None:
+                # xor lines are constraints with odd parity
+                lits, parity = xor
+                xors.append(lits if parity else [-lits[0]] + lits[1:])
+                nodes.discard(n)
+
+    num_clauses = sum(len(e._nodes[n][2]) for n in nodes) + len(assumptions)
+    clauses = chain(
+        e.clauses(nodes),
+        ([variables.id(n) if v else -variables.id(n)] for n, v in assumptions.items()),
+    )
+    if sampling_set is not None:
+        sampling_set = [variables.id(n) for n in sampling_set]
+
+    if isinstance(f, (str, Path)):
+        with open(f, "w") as fp:
+            _write_formula(fp, clauses, variables.top, num_clauses, xors, sampling_set)
+    else:
+        _write_formula(f, clauses, variables.top, num_clauses, xors, sampling_set)
+    return variables
+
+
 def approx_model_count(
     c,
     assumptions=None,
@@ -279,86 +1145,16 @@ def approx_model_count(
             Estimate.
 
     """
-    try:
-        from pysat.formula import IDPool
-    except ImportError as err:
-        raise ImportError(
-            "Install 'python-sat' to use satisfiability functionality"
-        ) from err
-
     if shutil.which("approxmc") is None:
         raise OSError("Install 'approxmc' to use 'approx_model_count'")
     if startpoints is None:
         startpoints = c.startpoints()
 
-    formula, variables = cnf(c)
-    if assumptions:
-        for n in assumptions.keys():
-            if n not in c:
-                raise ValueError(f"Assumption key '{n}' not node in circuit")
-        add_assumptions(formula, variables, assumptions)
-
-    # specify sampling set
-    enc_inps = " ".join([str(variables.id(n)) for n in startpoints])
-
     # write dimacs to tmp
     with tempfile.NamedTemporaryFile(
         prefix=f"circuitgraph_approxmc_{c.name}_clauses", mode="w"
     ) as tmp:
-        clause_str = "\n".join(
-            " ".join(str(v) for v in c) + " 0" for c in formula.clauses
-        )
-        dimacs = (
-            f"c ind {enc_inps} 0\np cnf {formula.nv} "
-            f"{len(formula.clauses)}\n{clause_str}\n"
-        )
-        if use_xor_clauses and c.filter_type(["xor", "xnor"]):
-            # New pool that doesn't have added xor variables
-            new_variables = IDPool()
-            old_var_to_new_var = {}
-            for n in c.nodes():
-                old_var_to_new_var[variables.id(n)] = new_variables.id(n)
-            new_dimacs = ""
-            num_clauses = 0
-            # Remove parity clauses
-            for line in dimacs.split("\n")[2:]:
-                if line.strip():
-                    clause = [int(i) for i in line.split()[:-1]]
-                    node = variables.obj(abs(clause[0]))
-                    # Only add clauses that start with non-parity nodes
-                    if node in c and c.type(node) not in ["xor", "xnor"]:
-                        num_clauses += 1
-                        new_clause = []
-                        for var in clause:
-                            if var >= 0:
-                                new_clause.append(old_var_to_new_var[abs(var)])
-                            else:
-                                new_clause.append(-old_var_to_new_var[abs(var)])
-                        new_clause = " ".join(str(v) for v in new_clause) + " 0"
-                        new_dimacs += new_clause + "\n"
-            # Add back in parity clauses using new format
-            for node in c.filter_type(["xor", "xnor"]):
-                num_clauses += 1
-                fanin_clause = " ".join(str(new_variables.id(n)) for n in c.fanin(node))
-                if c.type(node) == "xor":
-                    new_dimacs += f"x{new_variables.id(node)} {fanin_clause} 0\n"
-                else:
-                    new_dimacs += f"x{new_variables.id(node)} -{fanin_clause} 0\n"
-            # Add back any assumptions about parity nodes
-            for node, value in assumptions.items():
-                if c.type(node) in ["xor", "xnor"]:
-                    if value:
-                        new_dimacs += f"{new_variables.id(node)} 0\n"
-                    else:
-                        new_dimacs += f"-{new_variables.id(node)} 0\n"
-            # Add back in header
-            enc_inps = " ".join([str(new_variables.id(n)) for n in startpoints])
-            new_dimacs = (
-                f"c ind {enc_inps} 0\np cnf {len(c)} " f"{num_clauses}\n"
-            ) + new_dimacs
-            dimacs = new_dimacs
-
-        tmp.write(dimacs)
+        write_dimacs(c, tmp, assumptions, startpoints, use_xor_clauses)
         tmp.flush()
 
         # run approxmc
@@ -393,7 +1189,7 @@ def approx_model_count(
     return int(m.group(1))
 
 
-def model_count(c, assumptions=None):
+def model_count(c, assumptions=None, bdd=False, max_bdd_nodes=None, **kwargs):
     """
     Determine the number of solutions to circuit.
 
@@ -403,6 +1199,15 @@ def model_count(c, assumptions=None):
             Input circuit.
     assumptions : dict of str:int
             Nodes to assume True or False.
+    bdd : bool
+            Count using a BDD instead of enumerating solutions. If the BDD
+            size exceeds `max_bdd_nodes`, the count is estimated using
+            `approx_model_count` instead.
+    max_bdd_nodes : int
+            Maximum number of BDD nodes when using `bdd`.
+    kwargs: Keyword arguments
+            Keyword arguments to pass into `approx_model_count` if the BDD
+            budget is exceeded.
 
     Returns
     -------
@@ -410,12 +1215,35 @@ def model_count(c, assumptions=None):
             Count.
 
     """
-    startpoints = c.startpoints()
-    solver, variables = construct_solver(c, assumptions)
+    if bdd:
+        # import here to avoid circular import
+        from circuitgraph import bdd as cg_bdd
+
+        try:
+            return cg_bdd.model_count(c, assumptions, max_bdd_nodes)
+        except cg_bdd.BddBudgetExceeded:
+            return approx_model_count(c, assumptions, **kwargs)
+
+    if not assumptions:
+        assumptions = {}
+    for n in assumptions:
+        if n not in c:
+            raise ValueError(f"Node '{n}' in assumptions is not in circuit")
+
+    # only the cone of the assumptions is constrained, every other
+    # startpoint doubles the count
+    startpoints = c.startpoints(assumptions) if assumptions else set()
+    free = len(c.startpoints()) - len(startpoints)
+    formula, variables = cnf(c, assumptions.keys())
+    add_assumptions(formula, variables, assumptions)
+    solver = _default_solver_cls()(bootstrap_with=formula)
+
     count = 0
     while solver.solve():
         model = solver.get_model()
         solver.add_clause([-model[variables.id(n) - 1] for n in startpoints])
         count += 1
+        if not startpoints:
+            break
 
-    return count
+    return count << free
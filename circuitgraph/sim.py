@@ -0,0 +1,403 @@
+"""
+Functions for bit-parallel logic simulation of circuits.
+
+Simulation values are packed, so that each bit of a value corresponds to a
+different input pattern. Values can either be python integers of a given
+width, or NumPy `uint64` arrays, in which case every array element holds 64
+patterns. A single pass through the circuit evaluates every packed pattern.
+
+Nodes of type `x` are treated as unknown values. They must be assigned
+values the same way as startpoints.
+
+Examples
+--------
+Simulate a circuit on four patterns at once.
+
+>>> import circuitgraph as cg
+>>> c = cg.Circuit()
+>>> c.add("i0", "input")
+'i0'
+>>> c.add("i1", "input")
+'i1'
+>>> c.add("g0", "and", fanin=["i0", "i1"])
+'g0'
+>>> c.add("g1", "nor", fanin=["i0", "i1"], output=True)
+'g1'
+>>> values = cg.sim.simulate(c, {"i0": 0b0101, "i1": 0b0011}, width=4)
+>>> bin(values["g0"])
+'0b1'
+>>> bin(values["g1"])
+'0b1000'
+
+Patterns can also be given as a list of assignments.
+
+>>> vectors = [{"i0": True, "i1": True}, {"i0": False, "i1": True}]
+>>> results = cg.sim.evaluate(c, vectors)
+>>> [r["g0"] for r in results]
+[True, False]
+
+"""
+
+import hashlib
+import random
+from collections import OrderedDict
+
+_operators = {
+    "and": " & ",
+    "nand": " & ",
+    "or": " | ",
+    "nor": " | ",
+    "xor": " ^ ",
+    "xnor": " ^ ",
+}
+
+# compiled evaluators, keyed by structural hash
+_compiled = OrderedDict()
+_compiled_cache_size = 16
+
+
+def sim_inputs(c):
+    """
+    Return the nodes that must be assigned values for simulation.
+
+    These are the startpoints of the circuit along with any `x` nodes.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to simulate.
+
+    Returns
+    -------
+    set of str
+            Nodes requiring values.
+
+    """
+    return c.startpoints() | c.filter_type("x")
+
+
+def _ones(value, width):
+    """Return an all ones value of the same kind as `value`."""
+    if isinstance(value, int):
+        if width is None:
+            raise ValueError("'width' must be specified for integer values")
+        return (1 << width) - 1
+    # ndarray, ^ creates zeros with the same shape and type
+    return ~(value ^ value)
+
+
+class CompiledCircuit:
+    """
+    Straight-line evaluator generated from a circuit.
+
+    The evaluator contains one line per node, in topological order, written
+    as bitwise operations on local variables. Calling it performs no graph
+    traversal. Instances should be created using `compile_circuit`.
+
+    """
+
+    def __init__(self, c):
+        """
+        Generate the evaluator for a circuit.
+
+        Parameters
+        ----------
+        c : Circuit
+                Circuit to compile.
+
+        """
+        if c.is_cyclic():
+            raise ValueError("Cannot simulate cyclic circuit")
+
+        self.nodes = list(c.topo_sort())
+        self.inputs = sim_inputs(c)
+
+        ids = {n: f"v{i}" for i, n in enumerate(self.nodes)}
+        lines = ["def evaluate(inputs, ones):", "    zeros = ones ^ ones"]
+        for n in self.nodes:
+            t = c.type(n)
+            if t in ["input", "bb_output", "x"]:
+                expr = f"inputs[{n!r}] & ones"
+            elif t == "0":
+                expr = "zeros"
+            elif t == "1":
+                expr = "ones"
+            else:
+                fanin = [ids[f] for f in c.fanin(n)]
+                if not fanin:
+                    raise ValueError(f"'{t}' node '{n}' has no fanin")
+                if t in ["buf", "bb_input"]:
+                    expr = fanin[0]
+                elif t == "not":
+                    expr = f"ones ^ {fanin[0]}"
+                elif t in ["and", "or", "xor"]:
+                    expr = _operators[t].join(fanin)
+                elif t in ["nand", "nor", "xnor"]:
+                    expr = f"ones ^ ({_operators[t].join(fanin)})"
+                else:
+                    raise ValueError(f"Unknown gate type '{t}'")
+            lines.append(f"    {ids[n]} = {expr}")
+        lines.append(f"    return ({', '.join(ids[n] for n in self.nodes)},)")
+
+        namespace = {}
+        code = compile("\n".join(lines), f"<circuitgraph.sim {c.name}>", "exec")
+        exec(code, namespace)
+        self._evaluate = namespace["evaluate"]
+
+    def __call__(self, inputs, width=None):
+        """
+        Simulate packed patterns.
+
+        Parameters
+        ----------
+        inputs : dict of str:int or dict of str:numpy.ndarray
+                Packed values for each startpoint and `x` node.
+        width : int
+                Number of patterns packed into integer values.
+
+        Returns
+        -------
+        dict of str:int or dict of str:numpy.ndarray
+                Packed values of every node in the circuit.
+
+        """
+        missing = self.inputs - inputs.keys()
+        if missing:
+            raise ValueError(f"Missing values for nodes: {', '.join(sorted(missing))}")
+
+        ones = _ones(next(iter(inputs.values()), 0), width)
+        return dict(zip(self.nodes, self._evaluate(inputs, ones)))
+
+
+def structural_hash(c):
+    """
+    Compute a hash of the structure of a circuit.
+
+    Two circuits with the same nodes, types, and connections have the same
+    hash. Output markings and the circuit name are ignored.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to hash.
+
+    Returns
+    -------
+    str
+            Hex digest.
+
+    """
+    h = hashlib.sha1()
+    for n in sorted(c.nodes()):
+        fanin = " ".join(sorted(c.fanin(n)))
+        h.update(f"{n} {c.type(n)} {fanin}\n".encode())
+    return h.hexdigest()
+
+
+def compile_circuit(c):
+    """
+    Compile a circuit into a straight-line evaluator.
+
+    Evaluators are cached by the structural hash of the circuit, so the
+    compilation cost is only paid once per netlist revision. The hash
+    itself is cached on the circuit until it is modified.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to compile.
+
+    Returns
+    -------
+    CompiledCircuit
+            The evaluator.
+
+    Examples
+    --------
+    >>> import circuitgraph as cg
+    >>> c = cg.from_lib("c17")
+    >>> evaluate = cg.sim.compile_circuit(c)
+    >>> values = evaluate(cg.sim.random_patterns(c, 1024), width=1024)
+    >>> evaluate is cg.sim.compile_circuit(c.copy())
+    True
+
+    """
+    # CompactCircuit has no structural cache
+    cached = getattr(c, "_cached", None)
+    if cached is None:
+        key = structural_hash(c)
+    else:
+        key = cached("structural_hash", lambda: structural_hash(c))
+    try:
+        compiled = _compiled[key]
+        _compiled.move_to_end(key)
+    except KeyError:
+        compiled = CompiledCircuit(c)
+        _compiled[key] = compiled
+        if len(_compiled) > _compiled_cache_size:
+            _compiled.popitem(last=False)
+    return compiled
+
+
+def simulate(c, inputs, width=None):
+    """
+    Simulate packed patterns on a combinational circuit.
+
+    The circuit is compiled using `compile_circuit`. When simulating the
+    same circuit repeatedly, it is faster to keep the compiled evaluator.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to simulate.
+    inputs : dict of str:int or dict of str:numpy.ndarray
+            Packed values for each startpoint and `x` node. Values must all
+            be python integers or all be `uint64` arrays of the same shape.
+    width : int
+            Number of patterns packed into integer values. Not used for
+            array values.
+
+    Returns
+    -------
+    dict of str:int or dict of str:numpy.ndarray
+            Packed values of every node in the circuit.
+
+    Raises
+    ------
+    ValueError
+            If the circuit is cyclic, a value is missing, or a gate has no
+            fanin.
+
+    """
+    return compile_circuit(c)(inputs, width)
+
+
+def _biased_bits(rng, width, p, precision=16):
+    """
+    Generate `width` random bits that are each high with probability `p`.
+
+    The probability is quantized to `precision` bits. Each bit of the
+    quantized probability, from least to most significant, either ORs or ANDs
+    in a new uniformly random word.
+
+    """
+    q = round(p * (1 << precision))
+    if q <= 0:
+        return 0
+    if q >= 1 << precision:
+        return (1 << width) - 1
+    value = 0
+    for i in range((q & -q).bit_length() - 1, precision):
+        if q >> i & 1:
+            value |= rng.getrandbits(width)
+        else:
+            value &= rng.getrandbits(width)
+    return value
+
+
+def random_patterns(c, width, seed=None, bias=None):
+    """
+    Generate random packed patterns for simulation.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to generate patterns for.
+    width : int
+            Number of patterns.
+    seed : int
+            Seed for the random number generator.
+    bias : dict of str:float
+            Probability of each startpoint or `x` node being high. Nodes that
+            are not present are high with probability 0.5.
+
+    Returns
+    -------
+    dict of str:int
+            Packed values for each startpoint and `x` node.
+
+    """
+    if bias is None:
+        bias = {}
+    for n, p in bias.items():
+        if not 0 <= p <= 1:
+            raise ValueError(f"Bias of node '{n}' is not a probability: {p}")
+
+    rng = random.Random(seed)
+    patterns = {}
+    for n in sorted(sim_inputs(c)):
+        if n in bias:
+            patterns[n] = _biased_bits(rng, width, bias[n])
+        else:
+            patterns[n] = rng.getrandbits(width)
+    return patterns
+
+
+def pack(vectors):
+    """
+    Pack a list of assignments into integer values.
+
+    Parameters
+    ----------
+    vectors : list of dict of str:bool
+            Assignments. Pattern `i` is stored in bit `i` of the packed values.
+
+    Returns
+    -------
+    dict of str:int
+            Packed values.
+
+    """
+    packed = {}
+    for i, vector in enumerate(vectors):
+        for n, v in vector.items():
+            packed[n] = packed.get(n, 0) | (bool(v) << i)
+    return packed
+
+
+def unpack(values, width, nodes=None):
+    """
+    Unpack integer values into a list of assignments.
+
+    Parameters
+    ----------
+    values : dict of str:int
+            Packed values.
+    width : int
+            Number of packed patterns.
+    nodes : iterable of str
+            Nodes to unpack. If None, all nodes are unpacked.
+
+    Returns
+    -------
+    list of dict of str:bool
+            Assignments, one for each pattern.
+
+    """
+    if nodes is None:
+        nodes = values.keys()
+    bits = {n: bin(values[n])[2:].zfill(width)[::-1] for n in nodes}
+    return [{n: b[i] == "1" for n, b in bits.items()} for i in range(width)]
+
+
+def evaluate(c, vectors, nodes=None):
+    """
+    Evaluate a circuit on a list of input assignments.
+
+    Parameters
+    ----------
+    c : Circuit
+            Circuit to simulate.
+    vectors : list of dict of str:bool
+            Assignments to startpoints and `x` nodes.
+    nodes : iterable of str
+            Nodes to report values for. If None, all nodes are reported.
+
+    Returns
+    -------
+    list of dict of str:bool
+            Values of nodes for each assignment.
+
+    """
+    values = simulate(c, pack(vectors), width=len(vectors))
+    return unpack(values, len(vectors), nodes)
@@ -801,7 +801,7 @@ def sensitization_transform(c, n, endpoints=None):
     return m
 
 
-def sensitivity_transform(c, n):
+def sensitivity_transform(c, n, share_logic=False, popcount=True):
     """
     Create a circuit to compute sensitivity.
 
@@ -818,6 +818,16 @@ def sensitivity_transform(c, n):
             Sequential circuit to ccompute sensitivity for.
     n : str
             Node to compute sensitivity at.
+    share_logic : bool
+            If True, the inverted copy for input 'i' only duplicates the
+            transitive fanout of 'i' within the fanin cone of `n`, and the
+            rest of the copy is shared with the uninverted circuit. The
+            circuit is then linear in the size of the cone for cones where
+            each input reaches few nodes.
+    popcount : bool
+            If False, the population count circuit is not added and only
+            the miter outputs, 'dif_out_i', are outputs. This is useful when
+            counting is done with a cardinality constraint in CNF instead.
 
     Returns
     -------
@@ -836,42 +846,78 @@ def sensitivity_transform(c, n):
 
     # get input cone
     fi_nodes = c.transitive_fanin(n) | {n}
-    sub_c = cg.Circuit(graph=c.graph.subgraph(fi_nodes).copy())
 
     # create sensitivity circuit
-    sen = cg.Circuit()
-    sen.add_subcircuit(sub_c, "orig")
-    for s in startpoints:
-        sen.add(s, "input", fanout=f"orig_{s}")
+    if share_logic:
+        g = nx.DiGraph()
+        for s in startpoints:
+            g.add_node(s, type="input", output=False)
+        for m in fi_nodes:
+            if m in startpoints:
+                g.add_node(f"orig_{m}", type="buf", output=False)
+                g.add_edge(m, f"orig_{m}")
+            else:
+                g.add_node(f"orig_{m}", type=c.type(m), output=False)
+                g.add_edges_from((f"orig_{f}", f"orig_{m}") for f in c.fanin(m))
+
+        for s0 in startpoints:
+            # find fanout of the inverted input within the cone
+            tfo = {s0}
+            stack = [s0]
+            while stack:
+                for m in c.fanout(stack.pop()):
+                    if m in fi_nodes and m not in tfo:
+                        tfo.add(m)
+                        stack.append(m)
+
+            # duplicate the fanout, sharing the rest of the cone
+            g.add_node(f"inv_{s0}_{s0}", type="not", output=False)
+            g.add_edge(s0, f"inv_{s0}_{s0}")
+            for m in tfo - {s0}:
+                g.add_node(f"inv_{s0}_{m}", type=c.type(m), output=False)
+                g.add_edges_from(
+                    (f"inv_{s0}_{f}" if f in tfo else f"orig_{f}", f"inv_{s0}_{m}")
+                    for f in c.fanin(m)
+                )
+        sen = cg.Circuit(graph=g)
+    else:
+        sen = cg.Circuit()
+        sub_c = cg.Circuit(graph=c.graph.subgraph(fi_nodes).copy())
+        sen.add_subcircuit(sub_c, "orig")
+        for s in startpoints:
+            sen.add(s, "input", fanout=f"orig_{s}")
+
+        # add inverted input copies
+        for s0 in startpoints:
+            sen.add_subcircuit(sub_c, f"inv_{s0}")
+
+            # connect inputs
+            for s1 in startpoints:
+                if s0 != s1:
+                    sen.connect(s1, f"inv_{s0}_{s1}")
+                else:
+                    # connect inverted input
+                    sen.set_type(f"inv_{s0}_{s1}", "not")
+                    sen.connect(s0, f"inv_{s0}_{s1}")
 
     # add popcount
-    sen.add_subcircuit(cg.logic.popcount(len(startpoints)), "pc")
+    if popcount:
+        sen.add_subcircuit(cg.logic.popcount(len(startpoints)), "pc")
 
-    # add inverted input copies
+    # compare to orig
     for i, s0 in enumerate(startpoints):
-        sen.add_subcircuit(sub_c, f"inv_{s0}")
-
-        # connect inputs
-        for s1 in startpoints:
-            if s0 != s1:
-                sen.connect(s1, f"inv_{s0}_{s1}")
-            else:
-                # connect inverted input
-                sen.set_type(f"inv_{s0}_{s1}", "not")
-                sen.connect(s0, f"inv_{s0}_{s1}")
-
-        # compare to orig
         sen.add(
             f"dif_out_{s0}",
             "xor",
             fanin=[f"orig_{n}", f"inv_{s0}_{n}"],
-            fanout=f"pc_in_{i}",
+            fanout=f"pc_in_{i}" if popcount else None,
             output=True,
         )
 
     # instantiate population count
-    for o in range(cg.utils.clog2(len(startpoints) + 1)):
-        sen.add(f"sen_out_{o}", "buf", fanin=f"pc_out_{o}", output=True)
+    if popcount:
+        for o in range(cg.utils.clog2(len(startpoints) + 1)):
+            sen.add(f"sen_out_{o}", "buf", fanin=f"pc_out_{o}", output=True)
 
     return sen
 
@@ -1239,8 +1285,7 @@ def insert_registers(
     c_reg = c.copy()
     nodes_at_depths = []
     max_depth = 0
-    for n in c_reg:
-        depth = c_reg.fanin_depth(n)
+    for n, depth in cg.props.depths(c_reg).items():
         while depth >= len(nodes_at_depths):
             nodes_at_depths.append([])
         nodes_at_depths[depth].append(n)
@@ -25,7 +25,7 @@ setuptools.setup(
     ],
     python_requires=">=3.6",
     install_requires=[
-        "lark",
+        "lark>=1.0,<2",
         "networkx",
     ],
 )
@@ -0,0 +1,95 @@
+import unittest
+from itertools import product
+
+import circuitgraph as cg
+
+try:
+    import dd
+except ImportError:
+    dd = None
+
+
+@unittest.skipIf(dd is None, "dd is not installed")
+class TestBdd(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.c17 = cg.from_lib("c17_gates")
+        cls.s27 = cg.tx.strip_blackboxes(cg.from_lib("s27"))
+
+    def exhaustive(self, c):
+        sp = list(c.startpoints())
+        vectors = [dict(zip(sp, vs)) for vs in product([False, True], repeat=len(sp))]
+        return vectors, cg.sim.evaluate(c, vectors)
+
+    def test_probability(self):
+        for c in [self.c17, self.s27]:
+            b = cg.bdd.CircuitBdd(c)
+            _, results = self.exhaustive(c)
+            for n in c:
+                p = sum(r[n] for r in results) / len(results)
+                self.assertEqual(b.probability(n), p)
+
+        # biased inputs
+        b = cg.bdd.CircuitBdd(self.c17)
+        bias = {s: 1.0 for s in self.c17.startpoints()}
+        result = cg.sat.solve(self.c17, bias)
+        for n in self.c17.outputs():
+            self.assertEqual(b.probability(n, bias), float(result[n]))
+
+    def test_model_count(self):
+        startpoints = self.s27.startpoints()
+        for i in range(1, 4):
+            startpoints.pop()
+            count = cg.bdd.model_count(self.s27, {s: True for s in startpoints})
+            self.assertEqual(count, 2**i)
+
+        vectors, results = self.exhaustive(self.s27)
+        for n in self.s27.outputs():
+            count = sum(r[n] for r in results)
+            self.assertEqual(cg.bdd.model_count(self.s27, {n: True}), count)
+            self.assertEqual(cg.sat.model_count(self.s27, {n: True}, bdd=True), count)
+
+    def test_influence(self):
+        for n in self.s27.outputs():
+            influences = cg.bdd.influence(self.s27, n)
+            self.assertDictEqual(
+                influences, cg.props.influence(self.s27, n, approx=False)
+            )
+            self.assertDictEqual(influences, cg.props.influence(self.s27, n, bdd=True))
+
+    def test_wide_cone(self):
+        # deeper than the recursion limit
+        c = cg.Circuit()
+        width = 1500
+        n = c.add(f"a{width - 1}", "input")
+        for i in reversed(range(width - 1)):
+            c.add(f"a{i}", "input")
+            n = c.add(f"g{i}", "xor", fanin=[f"a{i}", n])
+        c.set_output(n)
+        b = cg.bdd.CircuitBdd(c)
+        self.assertEqual(b.probability(n), 0.5)
+        self.assertEqual(b.model_count({n: True}), 2 ** (width - 1))
+
+    def test_budget(self):
+        c = cg.from_lib("c1355")
+        b = cg.bdd.CircuitBdd(c, max_nodes=100)
+        self.assertRaises(cg.bdd.BddBudgetExceeded, b.function, c.outputs().pop())
+
+        # fall back to exact model counting
+        n = sorted(self.s27.outputs())[0]
+        self.assertEqual(
+            cg.props.signal_probability(
+                self.s27, n, approx=False, bdd=True, max_bdd_nodes=2
+            ),
+            cg.props.signal_probability(self.s27, n, approx=False),
+        )
+
+    def test_errors(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "and")
+        b = cg.bdd.CircuitBdd(c)
+        self.assertRaises(ValueError, b.function, "b")
+        self.assertRaises(ValueError, b.influence, "b", "b")
+        self.assertRaises(ValueError, b.model_count, {"q": True})
+        self.assertRaises(ValueError, cg.bdd.CircuitBdd, c, order=["b"])
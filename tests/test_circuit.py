@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 import networkx as nx
@@ -203,6 +204,32 @@ class TestCircuit(unittest.TestCase):
         )
         self.assertSetEqual(c.transitive_fanin("d"), {"ff0.Q"})
 
+    def test_reachability_index(self):
+        c = cg.from_lib("c432")
+        ci = c.copy()
+        ci.set_reachability_index()
+        for n in sorted(c)[::5]:
+            self.assertSetEqual(ci.transitive_fanin(n), c.transitive_fanin(n))
+            self.assertSetEqual(ci.transitive_fanout(n), c.transitive_fanout(n))
+        self.assertSetEqual(
+            ci.transitive_fanin(c.outputs()), c.transitive_fanin(c.outputs())
+        )
+        self.assertSetEqual(ci.startpoints(c.outputs()), c.startpoints(c.outputs()))
+
+        # the index is rebuilt after modification
+        i = sorted(c.inputs())[0]
+        o = sorted(c.outputs())[0]
+        for circuit in [c, ci]:
+            circuit.add("g", "and", fanin=[i, o], output=True)
+            circuit.remove(circuit.fanout(i) - {"g"})
+        self.assertSetEqual(ci.transitive_fanout(i), {"g"})
+        self.assertSetEqual(ci.transitive_fanin("g"), c.transitive_fanin("g"))
+        self.assertRaises(Exception, ci.transitive_fanin, "not_a_node")
+
+        # cyclic circuits fall back to graph search
+        ci.connect("g", sorted(ci.fanin(o))[0])
+        self.assertIn("g", ci.transitive_fanin(o))
+
     def test_paths(self):
         c = cg.from_lib("c17")
         self.assertListEqual(list(c.paths("N1", "N22")), [["N1", "N10", "N22"]])
@@ -238,9 +265,21 @@ class TestCircuit(unittest.TestCase):
         self.assertEqual(c.fanin_depth(["f", "l"]), 5)
         self.assertEqual(c.fanin_depth("g"), 2)
 
+        self.assertEqual(c.fanout_depth("a", maximum=False), 2)
+        self.assertEqual(c.fanin_depth("l", maximum=False), 2)
+        self.assertEqual(c.fanin_depth(["k", "h"], maximum=False), 1)
+
         c.connect("f", "c")
         self.assertRaises(ValueError, c.fanout_depth, "a")
 
+        # deep circuits do not hit the recursion limit
+        c = cg.Circuit()
+        n = c.add("i", "input")
+        for i in range(5000):
+            n = c.add(f"b{i}", "buf", fanin=n)
+        self.assertEqual(c.fanin_depth(n), 5000)
+        self.assertEqual(c.fanout_depth("i"), 5000)
+
     def test_add_subcircuit(self):
         c = cg.Circuit()
 
@@ -428,6 +467,52 @@ class TestCircuit(unittest.TestCase):
         self.assertSetEqual(c.outputs(), {"c"})
         self.assertSetEqual(c.io(), {"a", "b", "c"})
 
+    def test_type_index(self):
+        def check(c):
+            for t in cg.supported_types:
+                self.assertSetEqual(
+                    c.filter_type(t), {n for n in c if c.graph.nodes[n]["type"] == t}
+                )
+            self.assertSetEqual(
+                c.outputs(), {n for n in c if c.graph.nodes[n]["output"]}
+            )
+
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "input")
+        c.add("c", "and", fanin=["a", "b"], output=True)
+        check(c)
+        c.set_type("c", "or")
+        c.set_output("a")
+        c.set_output("c", False)
+        check(c)
+        c.add("c", "xor", output=True, allow_redefinition=True)
+        c.relabel({"a": "n"})
+        check(c)
+        c.remove("n")
+        check(c)
+
+        ff = cg.BlackBox("ff", ["CK", "D"], ["Q"])
+        c.add_blackbox(ff, "ff0", {"D": "c"})
+        check(c)
+        m = cg.Circuit("ff")
+        m.add("CK", "input")
+        m.add("D", "input")
+        m.add("Q", "buf", fanin="D", output=True)
+        c.fill_blackbox("ff0", m)
+        check(c)
+        c.add_subcircuit(m, "sub", {"D": "c"})
+        check(c)
+        self.assertSetEqual(c.startpoints(), {"b"})
+        self.assertSetEqual(c.startpoints("sub_Q"), {"b"})
+
+        # direct graph modification
+        c.graph.add_node("d", type="input", output=True)
+        check(c)
+        c.graph.nodes["d"]["type"] = "buf"
+        c.graph = c.graph
+        check(c)
+
     def test_startpoints_endpoints(self):
         c = cg.Circuit()
         c.add("clk", "input")
@@ -473,6 +558,16 @@ class TestCircuit(unittest.TestCase):
         c.add("g5", "and", fanin=["g3", "g4"], output=True)
 
         self.assertSetEqual(set(c.reconvergent_fanout_nodes()), {"c", "g0"})
+        self.assertDictEqual(
+            dict(c.reconvergent_fanout_nodes(points=True)),
+            {"c": {"g5"}, "g0": {"g3"}},
+        )
+        self.assertSetEqual(c.reconvergence_points("a"), set())
+
+        # one branch reconverging with another
+        c.add("g6", "or", fanin=["a", "g0"])
+        self.assertSetEqual(c.reconvergence_points("a"), {"g6"})
+        self.assertIn("a", set(c.reconvergent_fanout_nodes()))
 
     def test_has_reconvergent_fanout(self):
         c = cg.Circuit()
@@ -514,6 +609,61 @@ class TestCircuit(unittest.TestCase):
         l = list(c.topo_sort())
         self.assertListEqual(l, ["i0", "n", "a", "o", "o0"])
 
+    def test_pickle(self):
+        c = cg.from_lib("c17")
+        order = list(c.topo_sort())
+        c.outputs()
+        cg.sat.solve(c)
+        state = c.__getstate__()
+        for key in ["_structure", "_type_index", "_encoder"]:
+            self.assertNotIn(key, state)
+
+        # caches are rebuilt after unpickling
+        c2 = pickle.loads(pickle.dumps(c))
+        self.assertNotEqual(c2._version, c._version)
+        self.assertListEqual(list(c2.topo_sort()), order)
+        self.assertSetEqual(c2.outputs(), c.outputs())
+        self.assertDictEqual(cg.sat.solve(c2), cg.sat.solve(c))
+        c2.add("g", "and", fanin=c2.outputs(), output=True)
+        self.assertIn("g", c2.outputs())
+        self.assertNotIn("g", c)
+
+    def test_structure_cache(self):
+        c = cg.Circuit()
+        c.add("i0", "input")
+        c.add("a", "not", fanin="i0")
+        c.add("b", "and", fanin=["a", "i0"])
+        self.assertFalse(c.is_cyclic())
+        self.assertListEqual(list(c.topo_sort()), ["i0", "a", "b"])
+        self.assertDictEqual(c.levels(), {"i0": 0, "a": 1, "b": 2})
+
+        c2 = c.copy()
+        c.add("o", "or", fanin=["a", "b"])
+        self.assertDictEqual(c.levels(), {"i0": 0, "a": 1, "b": 2, "o": 3})
+        self.assertDictEqual(c2.levels(), {"i0": 0, "a": 1, "b": 2})
+        c.disconnect("a", "b")
+        self.assertEqual(c.levels()["b"], 1)
+        c.connect("o", "b")
+        self.assertTrue(c.is_cyclic())
+        self.assertRaises(ValueError, c.levels)
+        c.remove("o")
+        self.assertFalse(c.is_cyclic())
+        c.set_type("a", "input")
+        c.disconnect("i0", "a")
+        self.assertEqual(c.levels()["a"], 0)
+        c.relabel({"a": "n"})
+        self.assertDictEqual(c.levels(), {"i0": 0, "b": 1, "n": 0})
+
+        # direct graph modification
+        c.graph.add_edge("b", "x")
+        self.assertSetEqual(set(c.topo_sort()), {"i0", "n", "b", "x"})
+
+        # setting a graph never reuses the version stamp of another graph
+        versions = {c._version, c2._version}
+        c.graph = c.graph.copy()
+        self.assertNotIn(c._version, versions)
+        self.assertNotIn(cg.Circuit()._version, versions | {c._version})
+
     def test_remove_unloaded(self):
         c = cg.Circuit()
         c.add("a", "input")
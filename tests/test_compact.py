@@ -0,0 +1,160 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import networkx as nx
+
+import circuitgraph as cg
+
+
+class TestCompact(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.s27 = cg.from_lib("s27")
+        cls.c432 = cg.from_lib("c432")
+
+    def test_query(self):
+        for c in [self.s27, self.c432]:
+            cc = cg.CompactCircuit.from_circuit(c)
+            self.assertEqual(len(cc), len(c))
+            self.assertSetEqual(cc.nodes(), c.nodes())
+            self.assertSetEqual(cc.edges(), c.edges())
+            self.assertSetEqual(cc.inputs(), c.inputs())
+            self.assertSetEqual(cc.outputs(), c.outputs())
+            self.assertSetEqual(cc.startpoints(), c.startpoints())
+            self.assertSetEqual(cc.endpoints(), c.endpoints())
+            self.assertSetEqual(cc.filter_type("nand"), c.filter_type("nand"))
+            self.assertEqual(cc.is_cyclic(), c.is_cyclic())
+            for n in c:
+                self.assertEqual(cc.type(n), c.type(n))
+                self.assertEqual(cc.is_output(n), c.is_output(n))
+                self.assertSetEqual(cc.fanin(n), c.fanin(n))
+                self.assertSetEqual(cc.fanout(n), c.fanout(n))
+            o = sorted(c.outputs())[0]
+            self.assertSetEqual(cc.transitive_fanin(o), c.transitive_fanin(o))
+            self.assertSetEqual(cc.startpoints(o), c.startpoints(o))
+            i = sorted(c.inputs())[0]
+            self.assertSetEqual(cc.transitive_fanout(i), c.transitive_fanout(i))
+
+            order = list(cc.topo_sort())
+            self.assertSetEqual(set(order), c.nodes())
+            position = {n: i for i, n in enumerate(order)}
+            for u, v in c.edges():
+                self.assertLess(position[u], position[v])
+            if not c.blackboxes:
+                self.assertDictEqual(cc.levels(), c.levels())
+
+    def test_structure(self):
+        for c in [cg.tx.strip_blackboxes(self.s27), self.c432]:
+            cc = cg.CompactCircuit.from_circuit(c)
+            inputs = sorted(c.inputs())[:4]
+            outputs = sorted(c.outputs())[:4]
+            for maximum in [True, False]:
+                for n in outputs:
+                    self.assertEqual(
+                        cc.fanin_depth(n, maximum), c.fanin_depth(n, maximum)
+                    )
+                self.assertEqual(
+                    cc.fanout_depth(inputs, maximum), c.fanout_depth(inputs, maximum)
+                )
+            for i in inputs[:2]:
+                for o in outputs[:2]:
+                    self.assertListEqual(
+                        sorted(cc.paths(i, o, cutoff=6)),
+                        sorted(c.paths(i, o, cutoff=6)),
+                    )
+            self.assertListEqual(list(cc.paths(inputs[0], inputs[0])), [[inputs[0]]])
+            for o in outputs:
+                self.assertSetEqual(
+                    {frozenset(cut) for cut in cc.kcuts(o, 4)},
+                    {frozenset(cut) for cut in c.kcuts(o, 4)},
+                )
+            self.assertSetEqual(
+                set(cc.reconvergent_fanout_nodes()), set(c.reconvergent_fanout_nodes())
+            )
+            self.assertDictEqual(
+                dict(cc.reconvergent_fanout_nodes(points=True)),
+                dict(c.reconvergent_fanout_nodes(points=True)),
+            )
+            self.assertEqual(cc.has_reconvergent_fanout(), c.has_reconvergent_fanout())
+
+    def test_pickle(self):
+        cc = cg.CompactCircuit.from_circuit(self.s27)
+        cg.sat.solve(cc)
+        self.assertNotIn("_encoder", cc.__getstate__())
+        cc2 = pickle.loads(pickle.dumps(cc))
+        self.assertSetEqual(cc2.edges(), cc.edges())
+        self.assertDictEqual(cg.sat.solve(cc2), cg.sat.solve(cc))
+
+    def test_round_trip(self):
+        c = cg.CompactCircuit.from_circuit(self.s27).to_circuit()
+        self.assertSetEqual(c.nodes(), self.s27.nodes())
+        self.assertSetEqual(c.edges(), self.s27.edges())
+        self.assertSetEqual(c.outputs(), self.s27.outputs())
+        self.assertEqual(c.blackboxes.keys(), self.s27.blackboxes.keys())
+        for n in c:
+            self.assertEqual(c.type(n), self.s27.type(n))
+
+    def test_cyclic(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "and", fanin="a")
+        c.add("d", "or", fanin="b")
+        c.connect("d", "b")
+        cc = cg.CompactCircuit.from_circuit(c)
+        self.assertTrue(cc.is_cyclic())
+        self.assertRaises(nx.NetworkXUnfeasible, cc.topo_sort)
+        self.assertRaises(nx.NetworkXUnfeasible, c.topo_sort)
+        self.assertListEqual(
+            list(cc.reconvergent_fanout_nodes()), list(c.reconvergent_fanout_nodes())
+        )
+
+    def test_levels(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "and")
+        c.add("d", "or", fanin=["a", "b"])
+        cc = cg.CompactCircuit.from_circuit(c)
+        self.assertDictEqual(cc.levels(), {"a": 0, "b": 0, "d": 1})
+        self.assertDictEqual(cc.levels(), c.levels())
+        self.assertEqual(cc.fanin_offsets.itemsize, 4)
+
+    def test_errors(self):
+        cc = cg.CompactCircuit.from_circuit(self.s27)
+        self.assertRaises(KeyError, cc.type, "not_a_node")
+        self.assertRaises(KeyError, cc.fanin, "not_a_node")
+        self.assertRaises(ValueError, cc.filter_type, "not_a_type")
+
+    def test_sat(self):
+        c = cg.tx.strip_blackboxes(self.c432)
+        cc = cg.CompactCircuit.from_circuit(c)
+        formula, variables = cg.sat.cnf(c)
+        compact_formula, compact_variables = cg.sat.cnf(cc)
+        self.assertEqual(len(formula.clauses), len(compact_formula.clauses))
+
+        o = sorted(c.outputs())[0]
+        result = cg.sat.solve(cc, {o: True})
+        self.assertTrue(result[o])
+        self.assertDictEqual(
+            cg.sat.solve(c, {i: result[i] for i in c.inputs()}), result
+        )
+
+    def test_io(self):
+        cc = cg.CompactCircuit.from_circuit(self.s27)
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "s27.v")
+            cg.to_file(cc, path)
+            c = cg.from_file(path, blackboxes=[cg.BlackBox("ff", ["CK", "D"], ["Q"])])
+            cc = cg.from_file(
+                path,
+                blackboxes=[cg.BlackBox("ff", ["CK", "D"], ["Q"])],
+                compact=True,
+            )
+        self.assertIsInstance(cc, cg.CompactCircuit)
+        self.assertSetEqual(c.nodes(), self.s27.nodes())
+        self.assertSetEqual(cc.edges(), self.s27.edges())
+        self.assertEqual(
+            cg.io.circuit_to_verilog(cc.to_circuit()).count(";"),
+            cg.io.circuit_to_verilog(cc).count(";"),
+        )
@@ -0,0 +1,85 @@
+import unittest
+from itertools import product
+
+import circuitgraph as cg
+
+
+def exhaustive_cuts(c, n, k, computed):
+    if n not in computed:
+        cuts = [frozenset([n])]
+        if c.fanin(n) and c.type(n) not in ["input", "bb_output"]:
+            merged = [frozenset()]
+            for f in c.fanin(n):
+                merged = [
+                    a | b
+                    for a, b in product(merged, exhaustive_cuts(c, f, k, computed))
+                    if len(a | b) <= k
+                ]
+            cuts += merged
+        computed[n] = cuts
+    return computed[n]
+
+
+class TestCuts(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.c17 = cg.from_lib("c17_gates")
+        cls.c432 = cg.from_lib("c432")
+
+    def test_priority_cuts(self):
+        for c in [self.c17, self.c432]:
+            for k in [2, 3, 4]:
+                node_cuts = cg.cuts.priority_cuts(c, k, max_cuts=None)
+                computed = {}
+                for n in c:
+                    cuts = exhaustive_cuts(c, n, k, computed)
+                    minimal = {a for a in cuts if not any(b < a for b in cuts)}
+                    self.assertSetEqual(
+                        {frozenset(cut) for cut in node_cuts[n]}, minimal
+                    )
+
+    def test_max_cuts(self):
+        node_cuts = cg.cuts.priority_cuts(self.c432, 5, max_cuts=4)
+        for n, cuts in node_cuts.items():
+            self.assertLessEqual(len(cuts), 5)
+            self.assertEqual(cuts[-1].leaves, (n,))
+            sizes = [len(cut) for cut in cuts[:-1]]
+            self.assertListEqual(sizes, sorted(sizes))
+            for cut in cuts:
+                self.assertLessEqual(len(cut), 5)
+
+        node_cuts = cg.cuts.priority_cuts(self.c432, 4, nodes="N223")
+        self.assertSetEqual(set(node_cuts), {"N223"})
+        self.assertSetEqual(
+            {frozenset(cut) for cut in node_cuts["N223"]},
+            {frozenset(cut) for cut in self.c432.kcuts("N223", 4)},
+        )
+
+        # kcuts fills in the cuts of the whole cone
+        computed = {}
+        self.c432.kcuts("N223", 4, computed)
+        cone = self.c432.transitive_fanin("N223") | {"N223"}
+        self.assertSetEqual(set(computed), cone)
+        for n in sorted(cone)[:10]:
+            self.assertEqual(computed[n], self.c432.kcuts(n, 4))
+
+    def test_truth_tables(self):
+        width = 256
+        patterns = cg.sim.random_patterns(self.c432, width, seed=0)
+        values = cg.sim.simulate(self.c432, patterns, width)
+        node_cuts = cg.cuts.priority_cuts(self.c432, 4, truth_tables=True)
+        for n, cuts in node_cuts.items():
+            for cut in cuts:
+                for i in range(0, width, 17):
+                    index = sum(
+                        (values[leaf] >> i & 1) << j for j, leaf in enumerate(cut)
+                    )
+                    self.assertEqual(cut.truth_table >> index & 1, values[n] >> i & 1)
+
+    def test_errors(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "and", fanin="a")
+        self.assertRaises(ValueError, cg.cuts.priority_cuts, c, 0)
+        c.connect("b", "b")
+        self.assertRaises(ValueError, cg.cuts.priority_cuts, c)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 import circuitgraph as cg
@@ -80,6 +81,208 @@ class TestIO(unittest.TestCase):
         different_output = cg.sat.solve(m, assumptions={"sat": True})
         self.assertFalse(different_output)
 
+    def test_parser_cache(self):
+        from circuitgraph.parsing import verilog
+
+        data = verilog._parser_data
+        try:
+            with tempfile.TemporaryDirectory() as d:
+                # setting the cache after a parse rebuilds the tables
+                cg.from_file(f"{self.test_path}/../c17.v")
+                cg.parsing.set_parser_cache(f"{d}/verilog.lark.cache")
+                g = cg.from_file(f"{self.test_path}/../c17.v")
+                self.assertTrue(os.path.exists(f"{d}/verilog.lark.cache"))
+                tables = verilog._parser_data
+
+                # later parses reuse the tables with a new transformer
+                g2 = cg.from_file(f"{self.test_path}/../c17.v")
+                self.assertIs(verilog._parser_data, tables)
+                self.assertSetEqual(g.edges(), g2.edges())
+                self.assertSetEqual(g.edges(), cg.from_lib("c17").edges())
+        finally:
+            cg.parsing.set_parser_cache(False)
+            verilog._parser_data = data
+
+    def test_verilog_connection_checks(self):
+        for netlist in [
+            "module top(a, b); input a, b; buf g0(w, a); buf g1(w, b); endmodule",
+            "module top(a); input a; ff f0(.D(a), .E(a)); endmodule",
+            "module top(a); input a; ff f0(.D(a)); ff f0(.D(a)); endmodule",
+        ]:
+            self.assertRaises(
+                ValueError,
+                cg.io.verilog_to_circuit,
+                netlist,
+                "top",
+                blackboxes=self.bbs,
+            )
+
+    def test_stream_verilog(self):
+        for path, name, bbs in [
+            ("../c432.v", None, []),
+            ("../s27.v", None, self.bbs),
+            ("../c17_assign.v", None, []),
+            ("test_correct_io.v", "test_correct_io", []),
+            ("test_correct_io.v", "test_module_bb", self.bbs),
+        ]:
+            path = f"{self.test_path}/{path}"
+            g = cg.from_file(path, name=name, blackboxes=bbs)
+            gs = cg.from_file(path, name=name, blackboxes=bbs, stream=True)
+            self.assertEqual(g.name, gs.name)
+            self.assertSetEqual(g.nodes(), gs.nodes())
+            self.assertSetEqual(g.edges(), gs.edges())
+            self.assertSetEqual(g.outputs(), gs.outputs())
+            self.assertDictEqual(g.blackboxes, gs.blackboxes)
+            for n in g:
+                self.assertEqual(g.type(n), gs.type(n))
+
+        # module selection, comments spanning lines, and unnamed primitives
+        netlist = """
+        module skipped(a, y); input a; output y; assign y = ~a; endmodule
+        /* module top(a, y);
+        */ module top(a, b, \\y[0] );
+          input a, // first
+                b;
+          output \\y[0] ;
+          and (\\y[0] , a, 1'b1), g1(w, a, b);
+        endmodule
+        """
+        c = cg.parsing.stream_parse_verilog_netlist(netlist.splitlines(True), [], "top")
+        self.assertEqual(c.name, "top")
+        self.assertSetEqual(c.fanin("\\y[0]"), {"a", "tie_1"})
+        self.assertSetEqual(c.outputs(), {"\\y[0]"})
+        self.assertSetEqual(c.fanin("w"), {"a", "b"})
+        self.assertRaises(
+            ValueError, cg.parsing.stream_parse_verilog_netlist, [], [], "top"
+        )
+
+    def test_stream_verilog_buses(self):
+        netlist = """
+        module top(a, s, y);
+          input [3:0] a;
+          input s;
+          output [0:1] y;
+          wire [1:0] w;
+          and g0(w[0], a[0], a[1]), g1(w[1], a[2], a[3]);
+          buf g2(z, \\a[0] );
+          assign y[0] = s ? w[0] : w[1], y[1] = a[3] ^~ (w[0] | !s);
+        endmodule
+        """
+        c = cg.io.verilog_to_circuit(netlist, "top", stream=True)
+        self.assertSetEqual(c.inputs(), {"s", "\\a[0]", "\\a[1]", "\\a[2]", "\\a[3]"})
+        self.assertSetEqual(c.outputs(), {"\\y[0]", "\\y[1]"})
+        self.assertSetEqual(c.fanin("\\w[1]"), {"\\a[2]", "\\a[3]"})
+        self.assertEqual(c.type("\\y[1]"), "xnor")
+
+        # bits are the same nodes as the equivalent escaped identifiers
+        self.assertSetEqual(c.fanout("\\a[0]"), {"\\w[0]", "z"})
+        self.assertSetEqual(
+            c.fanin("\\y[0]"), {"mux_a0_s_\\w[0]_\\w[1]", "mux_a1_s_\\w[0]_\\w[1]"}
+        )
+
+    def test_stream_verilog_errors(self):
+        netlist = """
+        module top(a, y);
+          input a;
+          output y;
+          nand g0(y, a a);
+        endmodule
+        """
+        with self.assertRaises(cg.parsing.VerilogParsingError) as cm:
+            cg.parsing.stream_parse_verilog_netlist(netlist.splitlines(True), [])
+        self.assertEqual(cm.exception.line, 5)
+        self.assertEqual(cm.exception.column, 24)
+        self.assertIn("^", str(cm.exception))
+
+        # only declared buses can be indexed
+        netlist = "module top(a, y); input a; output y; wire w; assign w[0] = a;"
+        with self.assertRaises(cg.parsing.VerilogParsingError) as cm:
+            cg.parsing.stream_parse_verilog_netlist([netlist, "endmodule"], [])
+        self.assertIn("w is not declared as a bus", str(cm.exception))
+
+        for netlist in [
+            "module top(a); input a; output y; endmodule",
+            "module top(a, y); input a; output y; endmodule",
+            "module top(a); input a; ff f0(.D(a)); endmodule",
+            "endmodule",
+            "module top(a); input a; wire a b; endmodule",
+            "module top(a); input a; buf g0(a); endmodule",
+            "module top(a); input a; /* endmodule",
+            "module top(a, y); input a; output y; buf g0(y, a), g1(y, a); endmodule",
+            "module top(a); input a; assign a = 1'b0; endmodule",
+            "module top(a); input [1:0] a; buf g0(w, a[2]); endmodule",
+            "module top(a); input [1:0] a; buf g0(w, a[1:0]); endmodule",
+            "module top(a); input [1:0] a; buf g0(w, a); endmodule",
+            "module top(a); input a; buf g0(1'b0, a); endmodule",
+            "module top(a); input a; and g0(w, a &); endmodule",
+            "module top(a); input a;",
+            "module top(a, y); input a; output y; assign; endmodule",
+            "module top(a, y); input a; output y; assign y = a,; endmodule",
+            "module top(a, y); input a; output y; wire w; assign w[0] = a; endmodule",
+            "module top(a, y); input a; output y; buf g0(y, a[0]); endmodule",
+            "module top(a, y); input a; output y; buf g0(u[0], a); endmodule",
+        ]:
+            self.assertRaises(
+                cg.parsing.VerilogParsingError,
+                cg.parsing.stream_parse_verilog_netlist,
+                [netlist],
+                [],
+            )
+
+    def test_from_files(self):
+        paths = [f"{self.test_path}/../{name}.v" for name in ["c17", "c432", "s27"]]
+        for workers in [1, 2]:
+            cs = cg.from_files(paths, workers=workers, blackboxes=self.bbs)
+            for path, c in zip(paths, cs):
+                g = cg.from_file(path, blackboxes=self.bbs)
+                self.assertEqual(c.name, g.name)
+                self.assertSetEqual(c.edges(), g.edges())
+
+        ccs = cg.from_files(paths[:2], workers=2, compact=True, stream=True)
+        self.assertIsInstance(ccs[1], cg.CompactCircuit)
+        self.assertSetEqual(ccs[1].edges(), cg.from_lib("c432").edges())
+
+        # split multi-module files
+        [modules, c17] = cg.from_files(
+            [f"{self.test_path}/test_correct_io.v", paths[0]],
+            workers=2,
+            all_modules=True,
+            blackboxes=self.bbs,
+        )
+        self.assertListEqual(
+            list(modules),
+            ["do_not_parse_0", "test_correct_io", "do_not_parse_1", "test_module_bb"],
+        )
+        g = cg.from_file(f"{self.test_path}/test_correct_io.v")
+        self.assertSetEqual(modules["test_correct_io"].edges(), g.edges())
+        self.assertListEqual(list(c17), ["c17"])
+
+    def test_from_files_escaped(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = f"{d}/escaped.v"
+            with open(path, "w") as f:
+                f.write("module a(i, \\o//a );\n  input i;\n  output \\o//a ;\n")
+                f.write("  buf g0(\\o//a , i); // comment\nendmodule\n")
+                f.write("module b(i, o);\n  input i;\n  output o;\n")
+                f.write("  not \\g0//b (o, i);\nendmodule\n")
+            for stream in [False, True]:
+                [modules] = cg.from_files([path], all_modules=True, stream=stream)
+                self.assertListEqual(list(modules), ["a", "b"])
+                self.assertSetEqual(modules["a"].outputs(), {"\\o//a"})
+                self.assertSetEqual(modules["b"].outputs(), {"o"})
+
+    def test_from_files_errors(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = f"{d}/bad.v"
+            with open(path, "w") as f:
+                f.write("module good(a);\n  input a;\nendmodule\n\n")
+                f.write("// module commented(a);\n")
+                f.write("module bad(a);\n  input a;\n  and g0(w a);\nendmodule\n")
+            for stream in [False, True]:
+                with self.assertRaises(cg.parsing.VerilogParsingError) as cm:
+                    cg.from_files([path], workers=2, all_modules=True, stream=stream)
+                self.assertEqual(cm.exception.line, 8)
+
     def test_incorrect_file_type(self):
         self.assertRaises(ValueError, cg.from_file, "setup.py")
 
@@ -36,6 +36,28 @@ class TestProps(unittest.TestCase):
 
         self.assertEqual(avg_sen, avg_sen_comp)
 
+    def test_influence_workers(self):
+        ns = ["G17", "n_20"]
+        influences = cg.props.influence(self.s27, ns, approx=False)
+        self.assertDictEqual(
+            cg.props.influence(self.s27, ns, approx=False, workers=2), influences
+        )
+        for n in ns:
+            sp = self.s27.startpoints(n)
+            self.assertSetEqual(set(influences[n]), sp)
+            base = {s: False for s in self.s27.startpoints()}
+            vectors = [
+                {**base, **dict(zip(sp, vs))}
+                for vs in product([False, True], repeat=len(sp))
+            ]
+            results = cg.sim.evaluate(self.s27, vectors)
+            for s in sp:
+                flipped = cg.sim.evaluate(
+                    self.s27, [{**v, s: not v[s]} for v in vectors]
+                )
+                count = sum(r[n] != f[n] for r, f in zip(results, flipped))
+                self.assertEqual(influences[n][s], count / len(vectors))
+
     def test_avg_sensitivity_supergates(self):
         c = cg.logic.adder(4, carry_in=True)
         total_influences = cg.props.avg_sensitivity(
@@ -84,6 +106,17 @@ class TestProps(unittest.TestCase):
 
         self.assertEqual(sen, sen_sim)
 
+    def test_sensitivity_timeout(self):
+        c = cg.from_lib("c880")
+        o = max(c.outputs(), key=lambda o: len(c.startpoints(o)))
+        lb, ub = cg.props.sensitivity(c, o, timeout=0)
+        self.assertLessEqual(0, lb)
+        self.assertLessEqual(ub, len(c.startpoints(o)))
+
+        n = "G17"
+        sen = cg.props.sensitivity(self.s27, n)
+        self.assertEqual(cg.props.sensitivity(self.s27, n, timeout=60), sen)
+
     def test_sensitize(self):
         # pick random node
         nr = choice(
@@ -135,6 +168,44 @@ class TestProps(unittest.TestCase):
             m += cg.sat.solve(self.s27, asmp)[n]
         self.assertEqual(m / (2 ** len(sp)), p)
 
+    def test_signal_probabilities(self):
+        probs = cg.props.signal_probabilities(self.s27, samples=20000, seed=0)
+        self.assertSetEqual(set(probs), self.s27.nodes())
+
+        # compute exact probs
+        sp = list(self.s27.startpoints())
+        vectors = [dict(zip(sp, vs)) for vs in product([False, True], repeat=len(sp))]
+        results = cg.sim.evaluate(self.s27, vectors)
+        for n, (p, err) in probs.items():
+            exact = sum(r[n] for r in results) / len(results)
+            # allow for some slack around the 95% interval
+            self.assertLessEqual(abs(p - exact), 2 * err + 0.01)
+        self.assertDictEqual(
+            cg.props.signal_probabilities(self.s27, samples=20000, seed=0), probs
+        )
+
+        # fix inputs using bias
+        bias = {s: 1.0 for s in sp}
+        probs = cg.props.signal_probabilities(self.s27, samples=100, bias=bias)
+        result = cg.sat.solve(self.s27, {s: True for s in sp})
+        z = 1.959964
+        for n, (p, err) in probs.items():
+            self.assertEqual(p, float(result[n]))
+            self.assertAlmostEqual(err, z**2 / (100 + z**2))
+
+        # constant nodes have a nonzero error bound
+        c = cg.Circuit()
+        c.add("i0", "input")
+        c.add("g0", "0")
+        probs = cg.props.signal_probabilities(c, samples=1000, seed=0)
+        p, err = probs["g0"]
+        self.assertEqual(p, 0)
+        self.assertAlmostEqual(err, z**2 / (1000 + z**2))
+
+        self.assertRaises(
+            ValueError, cg.props.signal_probabilities, self.s27, confidence=1
+        )
+
     def test_levelize(self):
         c = cg.Circuit()
         levels = {}
@@ -146,3 +217,13 @@ class TestProps(unittest.TestCase):
         levels[c.add("g2", "or", output=True, fanin=["const0", "g1"])] = 3
 
         self.assertEqual(levels, cg.props.levelize(c))
+
+    def test_depths(self):
+        c = cg.from_lib("c432")
+        for direction, depth in [("fanin", c.fanin_depth), ("fanout", c.fanout_depth)]:
+            for maximum in [True, False]:
+                depths = cg.props.depths(c, direction, maximum)
+                self.assertSetEqual(set(depths), c.nodes())
+                for n in sorted(c)[::10]:
+                    self.assertEqual(depths[n], depth(n, maximum))
+        self.assertRaises(ValueError, cg.props.depths, c, "sideways")
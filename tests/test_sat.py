@@ -1,11 +1,18 @@
+import gc
 import re
 import shutil
 import tempfile
 import unittest
+import weakref
 from itertools import product
 
 import circuitgraph as cg
 
+try:
+    import pycryptosat
+except ImportError:
+    pycryptosat = None
+
 
 class TestSat(unittest.TestCase):
     @classmethod
@@ -101,6 +108,231 @@ class TestSat(unittest.TestCase):
             cg.sat.model_count(self.s27, assumptions={s: True for s in startpoints}), 16
         )
 
+    def test_model_count_cone(self):
+        c = cg.tx.strip_blackboxes(self.s27)
+        sp = list(c.startpoints())
+        for o in c.outputs():
+            count = 0
+            for vs in product([False, True], repeat=len(sp)):
+                count += cg.sat.solve(c, dict(zip(sp, vs)))[o]
+            self.assertEqual(cg.sat.model_count(c, {o: True}), count)
+        self.assertEqual(cg.sat.model_count(c), 2 ** len(sp))
+        self.assertRaises(ValueError, cg.sat.model_count, c, {"not_a_node": True})
+
+    def test_encoder(self):
+        c = self.c17.copy()
+        encoder = cg.sat.Encoder(c)
+        formula = encoder.cnf("G16")
+        self.assertTrue(formula.clauses)
+        cone = c.transitive_fanin("G16") | {"G16"}
+        for clause in formula.clauses:
+            for v in clause:
+                self.assertIn(encoder.variables.obj(abs(v)), cone)
+
+        ids = {n: encoder.variables.id(n) for n in c}
+        full = encoder.cnf()
+        self.assertGreater(len(full.clauses), len(formula.clauses))
+        self.assertDictEqual(ids, {n: encoder.variables.id(n) for n in c})
+
+        # modified nodes are re-encoded
+        g = c.fanin("G16").pop()
+        assumptions = {i: True for i in c.startpoints("G16")}
+        value = cg.sat.solve(c, assumptions)[g]
+        c.set_type(g, "and" if c.type(g) != "and" else "or")
+        self.assertNotEqual(cg.sat.solve(c, assumptions)[g], value)
+        c.disconnect(c.fanin(g), g)
+        c.set_type(g, "0")
+        self.assertFalse(cg.sat.solve(c, {g: True}))
+        self.assertRaises(ValueError, encoder.cnf, "not_a_node")
+
+        # setting the graph invalidates cached clauses
+        c = cg.from_lib("c17")
+        cg.sat.solve(c)
+        g = c.graph.copy()
+        g.nodes["N22"]["type"] = "and"
+        c.graph = g
+        vector = {i: False for i in c.inputs()}
+        self.assertEqual(
+            cg.sat.solve(c, vector)["N22"], cg.sim.evaluate(c, [vector])[0]["N22"]
+        )
+
+    def test_encoder_freed(self):
+        refs = []
+        for _ in range(3):
+            c = cg.from_lib("c17")
+            cg.sat.solve(c)
+            refs.append(weakref.ref(c))
+        del c
+        gc.collect()
+        self.assertFalse(any(ref() for ref in refs))
+
+    def test_session(self):
+        c = cg.tx.strip_blackboxes(self.s27)
+        with cg.sat.Session(c) as session:
+            for o in c.outputs():
+                for v in [False, True]:
+                    result = session.solve({o: v})
+                    self.assertEqual(result[o], v)
+                    self.assertDictEqual(
+                        cg.sat.solve(c, {i: result[i] for i in c.startpoints()}),
+                        result,
+                    )
+            self.assertFalse(session.solve({"n_10": True, "n_7": True}))
+            self.assertSetEqual(set(session.solve(ns=["n_7"])), {"n_7"})
+            self.assertRaises(ValueError, session.solve, {"not_a_node": True})
+
+            # modifying the circuit rebuilds stale clauses
+            c.disconnect(c.fanin("n_10"), "n_10")
+            c.set_type("n_10", "1")
+            self.assertTrue(session.solve({"n_10": True, "n_7": True}))
+            self.assertFalse(session.solve({"n_10": False}))
+
+    def test_solve_batch(self):
+        c = cg.tx.strip_blackboxes(self.s27)
+        queries = [{o: v} for o in sorted(c.outputs()) for v in [False, True]]
+        queries.append({"n_10": True, "n_7": True})
+        for workers in [1, 2]:
+            results = dict(cg.sat.solve_batch(c, queries, workers=workers))
+            self.assertSetEqual(set(results), set(range(len(queries))))
+            self.assertFalse(results[len(queries) - 1])
+            for i, assumptions in enumerate(queries[:-1]):
+                self.assertTrue(results[i])
+                for n, v in assumptions.items():
+                    self.assertEqual(results[i][n], v)
+                self.assertDictEqual(
+                    cg.sat.solve(c, {s: results[i][s] for s in c.startpoints()}),
+                    results[i],
+                )
+
+        results = dict(
+            cg.sat.solve_batch(c, queries, ns=["n_7"], workers=1, conflicts=100)
+        )
+        self.assertSetEqual(set(results[0]), {"n_7"})
+
+        # in-process batches can be interleaved
+        batches = [
+            cg.sat.solve_batch(c, queries[:2], ns=["n_7"], workers=1),
+            cg.sat.solve_batch(self.c17, [{"G16": True}], ns=["G16"], workers=1),
+        ]
+        self.assertEqual(set(next(batches[0])[1]), {"n_7"})
+        self.assertListEqual(list(batches[1]), [(0, {"G16": True})])
+        self.assertEqual(set(next(batches[0])[1]), {"n_7"})
+        self.assertRaises(
+            ValueError, list, cg.sat.solve_batch(c, [{"not_a_node": True}])
+        )
+
+    def test_xor_encoding(self):
+        c = cg.Circuit()
+        ins = [c.add(f"i{i}", "input") for i in range(7)]
+        for w in range(2, 8):
+            c.add(f"xor{w}", "xor", fanin=ins[:w])
+            c.add(f"xnor{w}", "xnor", fanin=ins[:w])
+
+        for vs in product([False, True], repeat=len(ins)):
+            result = cg.sat.solve(c, dict(zip(ins, vs)))
+            for w in range(2, 8):
+                self.assertEqual(result[f"xor{w}"], sum(vs[:w]) % 2 == 1)
+                self.assertEqual(result[f"xnor{w}"], sum(vs[:w]) % 2 == 0)
+
+        # auxiliary variables are not named by strings
+        formula, variables = cg.sat.cnf(c)
+        for v in range(1, formula.nv + 1):
+            n = variables.obj(v)
+            self.assertTrue(n in c or isinstance(n, tuple))
+
+    @unittest.skipIf(pycryptosat is None, "pycryptosat is not installed")
+    def test_native_xor(self):
+        from pysat.solvers import CryptoMinisat
+
+        c = cg.Circuit()
+        ins = [c.add(f"i{i}", "input") for i in range(4)]
+        c.add("x", "xor", fanin=ins)
+        c.add("y", "xnor", fanin=ins[:3])
+        c.add("z", "and", fanin=["x", "y"])
+        solver, variables = cg.sat.construct_solver(
+            c, {"z": True}, solver_cls=CryptoMinisat, native_xor=True
+        )
+        count = 0
+        for model in solver.enum_models():
+            vs = [model[variables.id(i) - 1] > 0 for i in ins]
+            self.assertTrue(sum(vs) % 2 == 1 and sum(vs[:3]) % 2 == 0)
+            count += 1
+        self.assertEqual(count, 4)
+
+        with cg.sat.Session(c, CryptoMinisat, native_xor=True) as session:
+            self.assertTrue(session.solve({"z": True}))
+            self.assertFalse(session.solve({"z": True, "i3": False}))
+
+    def test_check_equivalence(self):
+        c = cg.from_lib("c432")
+        self.assertEqual(
+            cg.sat.check_equivalence(c, cg.tx.limit_fanin(c, 2)), (True, None)
+        )
+
+        # difference that random simulation is unlikely to find
+        c0 = cg.Circuit()
+        ins = [c0.add(f"i{i}", "input") for i in range(20)]
+        c0.add("o", "and", fanin=ins, output=True)
+        c0.add("z", "and", fanin=["i0", c0.add("i0_b", "not", fanin="i0")])
+        c0.set_output("z")
+        c1 = cg.Circuit()
+        for i in ins:
+            c1.add(i, "input")
+        c1.add("o", "nor", fanin=[c1.add(f"{i}_b", "not", fanin=i) for i in ins[1:]])
+        c1.set_output("o")
+        c1.add("z", "0", output=True)
+        equivalent, cex = cg.sat.check_equivalence(c0, c1)
+        self.assertFalse(equivalent)
+        self.assertNotEqual(cg.sat.solve(c0, cex)["o"], cg.sat.solve(c1, cex)["o"])
+
+        c1.connect(c1.add("i0_b", "not", fanin="i0"), "o")
+        self.assertEqual(cg.sat.check_equivalence(c0, c1), (True, None))
+
+    def test_write_dimacs(self):
+        c = cg.Circuit()
+        for i in "abcd":
+            c.add(i, "input")
+        c.add("e", "xnor", fanin=["a", "b", "c"])
+        c.add("f", "xor", fanin=["d", "e"])
+        c.add("g", "and", fanin=["e", "f"], output=True)
+
+        with tempfile.TemporaryDirectory() as d:
+            path = f"{d}/c.cnf"
+            variables = cg.sat.write_dimacs(
+                c, path, {"g": False}, c.inputs(), use_xor_clauses=True
+            )
+            with open(path) as f:
+                lines = f.read().splitlines()
+
+        ind = lines[0].split()
+        self.assertEqual(ind[:2], ["c", "ind"])
+        self.assertSetEqual({variables.obj(int(v)) for v in ind[2:-1]}, set(c.inputs()))
+        _, _, nv, num_clauses = lines[1].split()
+        self.assertEqual(int(num_clauses), len(lines) - 2)
+        clauses, xors = [], []
+        for line in lines[2:]:
+            if line.startswith("x"):
+                xors.append([int(v) for v in line[1:].split()[:-1]])
+            else:
+                clauses.append([int(v) for v in line.split()[:-1]])
+        self.assertEqual(len(xors), 2)
+
+        # the formula holds exactly for consistent values with g false
+        for vs in product([False, True], repeat=4):
+            values = cg.sat.solve(c, dict(zip("abcd", vs)))
+            for flip in [None, "e", "f"]:
+                assignment = {
+                    variables.id(n): v != (n == flip) for n, v in values.items()
+                }
+
+                def lit(v):
+                    return assignment[abs(v)] == (v > 0)
+
+                sat = all(any(lit(v) for v in cl) for cl in clauses) and all(
+                    sum(lit(v) for v in x) % 2 == 1 for x in xors
+                )
+                self.assertEqual(sat, flip is None and not values["g"])
+
     @unittest.skipIf(shutil.which("approxmc") is None, "Approxmc is not installed")
     def test_approx_model_count(self):
         # approxmc seems to be accurate in this range
@@ -0,0 +1,156 @@
+import unittest
+from itertools import product
+from random import getrandbits
+
+import circuitgraph as cg
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class TestSim(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.c17 = cg.from_lib("c17_gates")
+        cls.s27 = cg.tx.strip_blackboxes(cg.from_lib("s27"))
+
+    def test_simulate(self):
+        for c in [self.c17, self.s27]:
+            sp = list(c.startpoints())
+            vectors = [
+                dict(zip(sp, vs)) for vs in product([False, True], repeat=len(sp))
+            ]
+            results = cg.sim.evaluate(c, vectors)
+            for vector, result in zip(vectors, results):
+                self.assertDictEqual(result, cg.sat.solve(c, vector))
+
+    def test_compact(self):
+        cc = cg.CompactCircuit.from_circuit(self.s27)
+        self.assertEqual(cg.sim.structural_hash(cc), cg.sim.structural_hash(self.s27))
+        width = 64
+        patterns = cg.sim.random_patterns(cc, width, seed=0)
+        self.assertDictEqual(
+            cg.sim.simulate(cc, patterns, width),
+            cg.sim.simulate(self.s27, patterns, width),
+        )
+        vectors = cg.sim.unpack(patterns, width)
+        self.assertListEqual(
+            cg.sim.evaluate(cc, vectors), cg.sim.evaluate(self.s27, vectors)
+        )
+
+    def test_all_gates(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "input")
+        c.add("d", "input")
+        c.add("z", "0")
+        c.add("o", "1")
+        for t in cg.primitive_gates:
+            fanin = ["a"] if t in ["buf", "not"] else ["a", "b", "d"]
+            c.add(t, t, fanin=fanin, output=True)
+        c.add("and_z", "and", fanin=["a", "z"])
+        c.add("or_o", "or", fanin=["a", "o"])
+
+        sp = ["a", "b", "d"]
+        vectors = [dict(zip(sp, vs)) for vs in product([False, True], repeat=3)]
+        for vector, result in zip(vectors, cg.sim.evaluate(c, vectors)):
+            a, b, d = vector["a"], vector["b"], vector["d"]
+            self.assertEqual(result["buf"], a)
+            self.assertEqual(result["not"], not a)
+            self.assertEqual(result["and"], a and b and d)
+            self.assertEqual(result["nand"], not (a and b and d))
+            self.assertEqual(result["or"], a or b or d)
+            self.assertEqual(result["nor"], not (a or b or d))
+            self.assertEqual(result["xor"], a ^ b ^ d)
+            self.assertEqual(result["xnor"], not (a ^ b ^ d))
+            self.assertFalse(result["and_z"])
+            self.assertTrue(result["or_o"])
+
+    def test_x(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("u", "x")
+        c.add("g", "and", fanin=["a", "u"], output=True)
+        self.assertSetEqual(cg.sim.sim_inputs(c), {"a", "u"})
+        self.assertRaises(ValueError, cg.sim.simulate, c, {"a": 1}, 1)
+        values = cg.sim.simulate(c, {"a": 0b11, "u": 0b10}, width=2)
+        self.assertEqual(values["g"], 0b10)
+
+    def test_errors(self):
+        c = cg.Circuit()
+        c.add("a", "input")
+        c.add("b", "xor", fanin="a")
+        self.assertRaises(ValueError, cg.sim.simulate, c, {"a": 1})
+        c.connect("b", "b")
+        self.assertRaises(ValueError, cg.sim.simulate, c, {"a": 1}, 1)
+
+    def test_compile_circuit(self):
+        c = self.c17.copy()
+        compiled = cg.sim.compile_circuit(c)
+        self.assertIs(compiled, cg.sim.compile_circuit(c))
+        self.assertEqual(cg.sim.structural_hash(c), cg.sim.structural_hash(self.c17))
+
+        width = 32
+        patterns = cg.sim.random_patterns(c, width)
+        values = compiled(patterns, width)
+        self.assertSetEqual(set(values), c.nodes())
+
+        # modifying the circuit creates a new evaluator
+        g = c.fanin(c.outputs()).pop()
+        c.set_type(g, "and" if c.type(g) != "and" else "or")
+        recompiled = cg.sim.compile_circuit(c)
+        self.assertIsNot(compiled, recompiled)
+        for n, v in recompiled(patterns, width).items():
+            if n not in c.transitive_fanout(g) | {g}:
+                self.assertEqual(v, values[n])
+        self.assertNotEqual(recompiled(patterns, width)[g], values[g])
+
+        # replacing the graph recomputes the hash
+        c.graph = self.c17.graph.copy()
+        self.assertIs(cg.sim.compile_circuit(c), compiled)
+
+    def test_random_patterns(self):
+        width = 200
+        patterns = cg.sim.random_patterns(self.s27, width, seed=1)
+        self.assertSetEqual(set(patterns), self.s27.startpoints())
+        self.assertDictEqual(patterns, cg.sim.random_patterns(self.s27, width, 1))
+        values = cg.sim.simulate(self.s27, patterns, width)
+        vectors = cg.sim.unpack(patterns, width)
+        for i in [0, 57, 199]:
+            result = cg.sat.solve(self.s27, vectors[i])
+            for n in self.s27:
+                self.assertEqual(bool(values[n] >> i & 1), result[n])
+
+    def test_random_patterns_bias(self):
+        width = 20000
+        bias = {"G0": 0.0, "G1": 1.0, "G2": 0.25, "G3": 0.9}
+        patterns = cg.sim.random_patterns(self.s27, width, seed=2, bias=bias)
+        self.assertEqual(patterns["G0"], 0)
+        self.assertEqual(patterns["G1"], (1 << width) - 1)
+        for n in ["G2", "G3"]:
+            p = bin(patterns[n]).count("1") / width
+            self.assertAlmostEqual(p, bias[n], delta=0.02)
+        self.assertRaises(
+            ValueError, cg.sim.random_patterns, self.s27, width, bias={"G0": 2}
+        )
+
+    def test_pack_unpack(self):
+        values = {"a": getrandbits(100), "b": getrandbits(100)}
+        self.assertDictEqual(cg.sim.pack(cg.sim.unpack(values, 100)), values)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_simulate_numpy(self):
+        words = 4
+        patterns = {
+            n: np.array([getrandbits(64) for _ in range(words)], dtype=np.uint64)
+            for n in self.c17.startpoints()
+        }
+        values = cg.sim.simulate(self.c17, patterns)
+        for i in range(words):
+            int_values = cg.sim.simulate(
+                self.c17, {n: int(v[i]) for n, v in patterns.items()}, 64
+            )
+            for n in self.c17:
+                self.assertEqual(int(values[n][i]), int_values[n])
@@ -412,6 +412,27 @@ class TestTx(unittest.TestCase):
         # check answer
         self.assertEqual(sen_s, sen_sim)
 
+    def test_sensitivity_transform_share_logic(self):
+        c = self.c432
+        n = max(c.outputs(), key=lambda o: len(c.startpoints(o)))
+        sp = c.startpoints(n)
+        s = cg.tx.sensitivity_transform(c, n)
+        s_shared = cg.tx.sensitivity_transform(c, n, share_logic=True)
+        self.assertLess(len(s_shared), len(s))
+        self.assertSetEqual(s_shared.outputs(), s.outputs())
+        self.assertSetEqual(s_shared.inputs(), sp)
+
+        s_dif = cg.tx.sensitivity_transform(c, n, share_logic=True, popcount=False)
+        self.assertSetEqual(s_dif.outputs(), {f"dif_out_{i}" for i in sp})
+
+        for _ in range(10):
+            input_val = {i: bool(randint(0, 1)) for i in sp}
+            model = cg.sat.solve(s, input_val)
+            for t in [s_shared, s_dif]:
+                model_shared = cg.sat.solve(t, input_val)
+                for o in t.outputs():
+                    self.assertEqual(model_shared[o], model[o])
+
     def test_limit_fanin(self):
         k = 2
         c = self.c432